@@ -0,0 +1,66 @@
+"""
+Compare rows/second of CSV COPY and binary COPY into the staging table.
+
+usage:  python benchmarks/bench_copy.py [--rows N]
+
+A throwaway postgresql instance is started with testing.postgresql, so the
+postgresql server binaries must be on the PATH.  The rows are built by
+repeating tests/data/smoke.log.
+"""
+
+# standard library imports
+import argparse
+import pathlib
+import time
+from unittest import mock
+
+# 3rd party library imports
+import pandas as pd
+import psycopg
+import testing.postgresql
+
+# local imports
+from swlogs.loglogs import LogLogs
+from swlogs.migrations import migration_files
+
+
+def make_dataframe(nrows):
+    logfile = pathlib.Path(__file__).parents[1] / 'tests' / 'data' / 'smoke.log'
+    o = LogLogs(logfile)
+    o.parse_input_file()
+    df = o.df
+    return pd.concat([df] * (nrows // len(df)), ignore_index=True)
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--rows', type=int, default=1_000_000)
+    args = parser.parse_args()
+
+    with testing.postgresql.Postgresql() as postgresql:
+
+        connstr = postgresql.url()
+        with psycopg.connect(connstr, autocommit=True) as conn:
+            for p in migration_files():
+                for statement in p.read_text().split('\n\n'):
+                    conn.execute(statement.rstrip().rstrip(';'))
+
+        config = {'connection_string': connstr}
+        with mock.patch('swlogs.common.yaml.safe_load', return_value=config):
+            df = make_dataframe(args.rows)
+            for copy_format in ('csv', 'binary'):
+                o = LogLogs(copy_format=copy_format)
+                with o.conn.cursor() as cursor:
+                    cursor.execute('truncate swlogs.staging')
+                    t0 = time.time()
+                    o.copy_to_staging(cursor, df)
+                    t = time.time() - t0
+                o.conn.commit()
+                print(
+                    f'{copy_format:>6}:  {len(df)} rows in {t:.2f}s, '
+                    f'{len(df) / t:,.0f} rows/second'
+                )
+
+
+if __name__ == '__main__':
+    main()
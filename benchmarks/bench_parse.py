@@ -0,0 +1,59 @@
+"""
+Compare serial and multi-process parsing of an uncompressed access log.
+
+usage:  python benchmarks/bench_parse.py [--lines N] [--workers W ...]
+
+A synthetic log is built by repeating tests/data/smoke.log.  No database
+connection is needed.
+"""
+
+# standard library imports
+import argparse
+import pathlib
+import tempfile
+import time
+from unittest import mock
+
+# local imports
+from swlogs.access_logs import AccessLog
+from swlogs.common import CommonObj
+
+
+def make_log(path, nlines):
+    sample = pathlib.Path(__file__).parents[1] / 'tests' / 'data' / 'smoke.log'
+    lines = sample.read_text().splitlines(keepends=True)
+    with path.open('w') as f:
+        for i in range(nlines // len(lines)):
+            f.writelines(lines)
+
+
+def time_parse(path, workers):
+    with mock.patch.object(CommonObj, '__init__', new=lambda self: None):
+        o = AccessLog(path, chunk_mb=64, workers=workers)
+    t0 = time.time()
+    nrows = sum(len(data) for data in o.iter_records())
+    return nrows, time.time() - t0
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--lines', type=int, default=2_000_000)
+    parser.add_argument('--workers', type=int, nargs='+', default=[2, 4, 8])
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as d:
+        path = pathlib.Path(d) / 'access.log'
+        make_log(path, args.lines)
+
+        nrows, serial = time_parse(path, 1)
+        print(f'serial:     {nrows} rows in {serial:.2f}s')
+        for w in args.workers:
+            nrows, t = time_parse(path, w)
+            print(
+                f'{w} workers:  {nrows} rows in {t:.2f}s, '
+                f'speed-up {serial / t:.1f}x'
+            )
+
+
+if __name__ == '__main__':
+    main()
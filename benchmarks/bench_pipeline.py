@@ -0,0 +1,78 @@
+"""
+Compare loading a gzipped access log into the staging table one step at a
+time and with the pipelined ingest.
+
+usage:  python benchmarks/bench_pipeline.py [--lines N] [--chunk-mb MB]
+
+A throwaway postgresql instance is started with testing.postgresql, so the
+postgresql server binaries must be on the PATH.  A synthetic log is built by
+repeating tests/data/smoke.log.
+"""
+
+# standard library imports
+import argparse
+import gzip
+import pathlib
+import tempfile
+import time
+from unittest import mock
+
+# 3rd party library imports
+import psycopg
+import testing.postgresql
+
+# local imports
+from swlogs.loglogs import LogLogs
+from swlogs.migrations import migration_files
+
+
+def make_log(path, nlines):
+    sample = pathlib.Path(__file__).parents[1] / 'tests' / 'data' / 'smoke.log'
+    lines = sample.read_text().splitlines(keepends=True)
+    with gzip.open(path, 'wt') as f:
+        for i in range(nlines // len(lines)):
+            f.writelines(lines)
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--lines', type=int, default=1_000_000)
+    parser.add_argument('--chunk-mb', type=float, default=8)
+    args = parser.parse_args()
+
+    with (
+        tempfile.TemporaryDirectory() as tempdir,
+        testing.postgresql.Postgresql() as postgresql,
+    ):
+
+        logfile = pathlib.Path(tempdir) / 'access.log.gz'
+        make_log(logfile, args.lines)
+
+        connstr = postgresql.url()
+        with psycopg.connect(connstr, autocommit=True) as conn:
+            for p in migration_files():
+                for statement in p.read_text().split('\n\n'):
+                    conn.execute(statement.rstrip().rstrip(';'))
+
+        config = {'connection_string': connstr}
+        for pipeline in (False, True):
+            with mock.patch('swlogs.common.yaml.safe_load', return_value=config):  # noqa : E501
+                o = LogLogs(
+                    logfile,
+                    chunk_mb=args.chunk_mb,
+                    resolve_hostnames=False,
+                    pipeline=pipeline
+                )
+            t0 = time.time()
+            o.log_raw_chunked()
+            t = time.time() - t0
+
+            label = 'pipeline' if pipeline else 'sequential'
+            print(
+                f'{label:>10}:  {args.lines} lines in {t:.1f}s, '
+                f'{args.lines / t:,.0f} lines/second'
+            )
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,104 @@
+"""
+Compare computing the daily summary tables with one query per table against
+computing them with a single scan of the staging table.
+
+usage:  python benchmarks/bench_summary.py [--rows N] [--work-mem SIZE]
+
+A throwaway postgresql instance is started with testing.postgresql, so the
+postgresql server binaries must be on the PATH.  The staging table is filled
+with synthetic rows.
+"""
+
+# standard library imports
+import argparse
+import time
+from unittest import mock
+
+# 3rd party library imports
+import psycopg
+import testing.postgresql
+
+# local imports
+from swlogs.loglogs import LogLogs
+from swlogs.migrations import migration_files
+
+FILL_DIMENSIONS = """
+insert into swlogs.ua_dim (ua)
+select 'ua-' || n from generate_series(0, 4999) as n;
+
+insert into swlogs.url_dim (url)
+values
+    ('/robots.txt'),
+    ('/xmlui/handle/1/2'),
+    ('/sitemap_0.xml'),
+    ('/items/0a1b2c3d-0a1b-0a1b-0a1b-0a1b2c3d4e5f'),
+    ('/server/api')
+"""
+
+FILL_STAGING = """
+insert into swlogs.staging
+(ip, timestamp, status, ua_id, url_id, bytes, date, url_flags, net24, net16)
+select
+    ('10.' || (n %% 13) || '.' || (n %% 251) || '.' || (n %% 241))::cidr,
+    '2024-11-07 00:00:00-07'::timestamptz + (n %% 86400) * interval '1 second',
+    (array[200, 200, 200, 304, 404, 429, 500])[n %% 7 + 1],
+    n %% 5000 + 1,
+    n %% 5 + 1,
+    n %% 100000,
+    '2024-11-07'::date,
+    (array[1, 2, 4, 8, 0])[n %% 5 + 1],
+    (10::int8 << 24) + ((n %% 13) << 16) + ((n %% 251) << 8),
+    (10::int8 << 24) + ((n %% 13) << 16)
+from generate_series(1, %(rows)s) as n
+"""
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--rows', type=int, default=5_000_000)
+    parser.add_argument(
+        '--work-mem', help="e.g. '1GB', the default is the server's"
+    )
+    args = parser.parse_args()
+
+    with testing.postgresql.Postgresql() as postgresql:
+
+        connstr = postgresql.url()
+        with psycopg.connect(connstr, autocommit=True) as conn:
+            for p in migration_files():
+                for statement in p.read_text().split('\n\n'):
+                    conn.execute(statement.rstrip().rstrip(';'))
+            conn.execute(FILL_DIMENSIONS)
+            conn.execute(FILL_STAGING, {'rows': args.rows})
+            conn.execute('analyze swlogs.staging')
+
+        config = {'connection_string': connstr}
+        with mock.patch('swlogs.common.yaml.safe_load', return_value=config):
+            o = LogLogs()
+        o.log_date = o.find_log_date()
+
+        if args.work_mem is not None:
+            o.conn.execute(f"set work_mem = '{args.work_mem}'")
+            o.conn.commit()
+
+        for summary in ('serial', 'single-scan'):
+            with o.conn.cursor() as cursor:
+                for table in ('overall', 'bots', 'ip32', 'ip24', 'ip16'):
+                    cursor.execute(f'truncate swlogs.{table}')
+            o.conn.commit()
+
+            t0 = time.time()
+            if summary == 'single-scan':
+                o.log_summary()
+            else:
+                o.log_overall()
+                o.log_bots()
+                o.log_ip32()
+                o.log_ip24()
+                o.log_ip16()
+            t = time.time() - t0
+
+            print(f'{summary:>11}:  {args.rows} staging rows in {t:.1f}s')
+
+
+if __name__ == '__main__':
+    main()
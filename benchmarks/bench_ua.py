@@ -0,0 +1,100 @@
+"""
+Compare the per user agent cost of classifying with a linear scan of the rule
+table against classifying with the literal keyword prefilter.
+
+usage:  python benchmarks/bench_ua.py [logfile ...]
+
+The distinct user agents are taken from the given logfiles, or from the test
+logs plus a few common user agents if none are given.  Rule misses are the
+expensive case for the linear scan, so matched and unmatched user agents are
+reported separately.  No database connection is needed.
+"""
+
+# standard library imports
+import argparse
+import gzip
+import pathlib
+import re
+import time
+
+# local imports
+from swlogs.access_logs import LOGFILE_REGEX, UA_PREFILTER
+from swlogs.ua_regex import UA_REGEX_REPLACE
+
+EXTRA_USERAGENTS = [
+    'curl/8.5.0',
+    'python-requests/2.31.0',
+    'Go-http-client/1.1',
+    'Mozilla/5.0 (X11; Linux x86_64; rv:131.0) Gecko/20100101 Firefox/131.0',
+    'Mozilla/5.0 (compatible; SemrushBot/7~bl; +http://www.semrush.com/bot.html)',  # noqa : E501
+    'Mozilla/5.0 (compatible; AhrefsBot/7.0; +http://ahrefs.com/robot/)',
+]
+
+
+def linear_scan(s):
+    first_match = next(
+        filter(lambda x: x.search(s), UA_REGEX_REPLACE.keys()),
+        None
+    )
+    return UA_REGEX_REPLACE.get(first_match, s)
+
+
+def prefilter(s):
+    first_match = UA_PREFILTER.first_match(s)
+    return UA_REGEX_REPLACE.get(first_match, s)
+
+
+def read_useragents(paths):
+    regex = re.compile(LOGFILE_REGEX, re.X)
+    uas = set()
+    for path in paths:
+        opener = gzip.open if path.suffix == '.gz' else open
+        with opener(path, mode='rt') as f:
+            for line in f:
+                if (m := regex.match(line)) is not None:
+                    uas.add(m.group('user_agent'))
+    return sorted(uas)
+
+
+def time_classify(fcn, uas, repeat):
+    t0 = time.perf_counter()
+    for _ in range(repeat):
+        labels = [fcn(ua) for ua in uas]
+    t1 = time.perf_counter()
+    return labels, (t1 - t0) / (repeat * len(uas))
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('logfile', nargs='*', type=pathlib.Path)
+    parser.add_argument('--repeat', type=int, default=20)
+    args = parser.parse_args()
+
+    paths = args.logfile
+    if len(paths) == 0:
+        datadir = pathlib.Path(__file__).parents[1] / 'tests' / 'data'
+        paths = sorted(datadir.glob('*.log*'))
+        uas = read_useragents(paths) + EXTRA_USERAGENTS
+    else:
+        uas = read_useragents(paths)
+
+    matched = [ua for ua in uas if linear_scan(ua) != ua]
+    unmatched = [ua for ua in uas if linear_scan(ua) == ua]
+
+    print(f'{len(UA_REGEX_REPLACE)} rules')
+    for label, lst in (('matched', matched), ('unmatched', unmatched)):
+        if len(lst) == 0:
+            continue
+
+        expected, linear = time_classify(linear_scan, lst, args.repeat)
+        actual, filtered = time_classify(prefilter, lst, args.repeat)
+        assert actual == expected
+
+        print(f'{len(lst)} {label} user agents')
+        print(f'    linear scan:  {linear * 1e6:.1f} us per user agent')
+        print(f'    prefilter:    {filtered * 1e6:.1f} us per user agent')
+        print(f'    speed-up:     {linear / filtered:.1f}x')
+
+
+if __name__ == '__main__':
+    main()
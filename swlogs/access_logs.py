@@ -1,32 +1,208 @@
 #!/usr/bin/env python
 
 # standard library imports
+import collections
+import concurrent.futures
+import datetime as dt
+import functools
 import gzip
+import io
+import logging
 import pathlib
 import re
-import socket
+import time
 import warnings
 
 
 # 3rd party library imports
+import numpy as np
 import pandas as pd
 
 # local imports
 from .ua_regex import UA_REGEX_REPLACE
 from .common import CommonObj
+from .extras import EXTRA_COLUMNS, convert_extras
+from .ips import NETWORK_COLUMNS, network_keys
+from .pipeline import prefetch
+from .prefilter import RulePrefilter
+from .prefixes import PrefixTable
+from .resolve import HostnameResolver
+from .urls import classify_urls
 
 pd.options.display.float_format = '{:,.1f}'.format
 
+LOGFILE_REGEX = r"""
+    ^
+    (?P<ip>((\d{1,3}.){3}\d{1,3})
+           |
+           (([\w-]+[.]){3,4}([\w-]+))
+    )
+    \s*?
+    (?P<country>([A-Z]{2}|-))
+    \s*?
+    (-|[a-z0-9]{7})
+    \s*?
+    [\[]
+    (?P<timestamp>\d{2}/\w{3}/\d{4}:\d{2}:\d{2}:\d{2}\s-\d{4})
+    [\]]
+    \s*?
+    "(
+        -
+        |
+        \\n
+        |
+        0
+        |
+        (?P<method>(DELETE|GET|HEAD|OPTIONS|PATCH|POST|PROPFIND|PUT|SSTP_DUPLEX_POST))
+        \s
+        (?P<url>[^\?;]+)
+        ((\?|;)(?P<query_string>[^\s]+)?)?
+        \s
+        HTTP/[12].[01]
+    )"
+    \s
+    (?P<status>\d+)
+    \s
+    (?P<bytes>\d+|-)
+    \s+?
+    "(?P<referer>.*?(?="\s))"
+    \s
+    "(?P<user_agent>.*?(?="\s))"
+    (
+      \s+
+      "(?P<content_type>[^"]+)"
+      \s
+      (?P<remote_port>[0-9]+)
+    )?
+    """
+
+# Byte ranges for a parallel parse are never smaller than this.
+MIN_BYTE_RANGE = 1024 * 1024
+
+# How many byte ranges per worker may be parsed, or waiting to be used, at
+# once during a parallel parse.
+RANGES_IN_FLIGHT = 2
+
+# The chunk size of a pipelined parse when none is given, in megabytes.
+PIPELINE_CHUNK_MB = 8
+
+# Only the rules whose required literals occur in a user agent are tried.
+UA_PREFILTER = RulePrefilter(UA_REGEX_REPLACE.keys())
+
+# Number of raw user agent strings whose classification is remembered.
+UA_CACHE_SIZE = 2 ** 17
 
+# Each worker process in a parallel parse compiles the logfile regex once.
+_worker_regex = None
+
+
+@functools.lru_cache(maxsize=UA_CACHE_SIZE)
 def apply_regexes(s):
 
-    first_match = next(
-        filter(lambda x: x.search(s), UA_REGEX_REPLACE.keys()),
-        None
-    )
+    first_match = UA_PREFILTER.first_match(s)
     return UA_REGEX_REPLACE.get(first_match, s)
 
 
+def classify_useragents(s):
+    """
+    Classify a series of raw user agent strings.  There are far fewer
+    distinct user agents than log rows, so each distinct string is
+    classified only once and the labels are mapped back onto the rows.
+
+    Parameters
+    ----------
+    s : pandas.Series
+        Raw user agent strings
+
+    Returns
+    -------
+    pandas.Series
+        Classified user agents
+    """
+    codes, uniques = pd.factorize(s.to_numpy())
+    labels = np.array([apply_regexes(ua) for ua in uniques], dtype=object)
+    return pd.Series(labels[codes], index=s.index, name=s.name)
+
+
+def match_line(regex, idx, line, extra_fields=()):
+    """
+    Parse a single log line into a record tuple, with the values of any
+    extra fields on the end.  Lines that do not match are warned about and
+    None is returned.
+    """
+    if (m := regex.match(line)) is None:
+        msg = f"Did not match line {idx} {line}"
+        warnings.warn(msg)
+        return None
+        # raise RuntimeError(msg)
+
+    record = (
+        m.group('ip'),
+        m.group('timestamp'),
+        m.group('status'),
+        m.group('user_agent'),
+        m.group('url'),
+        m.group('bytes'),
+    )
+    if extra_fields:
+        record += tuple(m.group(name) for name in extra_fields)
+    return record
+
+
+def _init_worker():
+    global _worker_regex
+    _worker_regex = re.compile(LOGFILE_REGEX, re.X)
+
+
+def _parse_byte_range(args):
+    """
+    Parse the lines between two newline-aligned byte offsets of a logfile.
+    This runs in a worker process.
+    """
+    path, start, end, extra_fields = args
+
+    with open(path, mode='rb') as f:
+        f.seek(start)
+        raw = f.read(end - start)
+
+    data = []
+    for idx, line in enumerate(io.TextIOWrapper(io.BytesIO(raw))):
+        item = match_line(_worker_regex, idx, line, extra_fields)
+        if item is not None:
+            data.append(item)
+
+    return data
+
+
+def split_byte_ranges(path, size):
+    """
+    Split a file into byte ranges of approximately the given size, with each
+    range beginning at the start of a line.
+
+    Returns
+    -------
+    list of (start, end) tuples
+    """
+    filesize = path.stat().st_size
+
+    offsets = [0]
+    with path.open(mode='rb') as f:
+        pos = size
+        while pos < filesize:
+            # Move to the first line starting at or after pos.
+            f.seek(pos - 1)
+            f.readline()
+            pos = f.tell()
+            if pos >= filesize:
+                break
+            offsets.append(pos)
+            pos += size
+
+    offsets.append(filesize)
+
+    return list(zip(offsets[:-1], offsets[1:]))
+
+
 class AccessLog(CommonObj):
 
     """
@@ -40,14 +216,74 @@ class AccessLog(CommonObj):
         If True, compute views instead of hits.
     df_ip32 : pandas.DataFrame
         The top ip addresses in the current log
+    chunksize : int or None
+        If not None, parse the log in chunks of at most this many rows.
+    chunk_mb : float or None
+        If not None, parse the log in chunks of at most this many megabytes
+        of log text.
+    workers : int
+        If greater than one, parse an uncompressed log with this many
+        processes.  The chunks are then sized by chunk_mb, not chunksize.
+    pipeline : bool
+        If True, read, parse, and use the chunks of the log on separate
+        threads at the same time (see iter_chunks_pipelined).
+    resolver : HostnameResolver or None
+        Resolves ip fields that are hostnames.  If None, hostnames are not
+        resolved and such rows get a null ip.
+    prefix_table : PrefixTable or None
+        If not None, tags ip addresses and networks with the ASN and owner
+        of the most specific local prefix that contains them.
+    extra_fields : tuple of str
+        Optional fields of each log line (see swlogs/extras.py) to keep
+        along with the usual ones.
     """
 
-    def __init__(self, infile=None, useragent=None, views=False):
+    def __init__(
+        self,
+        infile=None,
+        useragent=None,
+        views=False,
+        chunksize=None,
+        chunk_mb=None,
+        workers=1,
+        resolve_hostnames=True,
+        prefixes=None,
+        extra_fields=(),
+        pipeline=False
+    ):
         super().__init__()
 
         self.infile = pathlib.Path(infile)
         self.useragent = useragent
         self.views = views
+        self.chunksize = chunksize
+        self.chunk_mb = chunk_mb
+        self.workers = workers
+        if workers > 1 and chunksize is not None:
+            msg = (
+                'The chunks of a parallel parse are byte ranges, use chunk_mb '
+                'rather than chunksize'
+            )
+            raise ValueError(msg)
+
+        # The stages can only overlap if there is more than one chunk.
+        self.pipeline = pipeline
+        if pipeline and chunksize is None and chunk_mb is None:
+            self.chunk_mb = PIPELINE_CHUNK_MB
+        if resolve_hostnames:
+            self.resolver = HostnameResolver()
+        else:
+            self.resolver = None
+        if prefixes:
+            self.prefix_table = PrefixTable(prefixes)
+        else:
+            self.prefix_table = None
+
+        for field in extra_fields:
+            if field not in EXTRA_COLUMNS:
+                msg = f'Unknown extra field {field}'
+                raise ValueError(msg)
+        self.extra_fields = tuple(extra_fields)
 
         self.setup_logfile_regex()
         self.setup_ua_regex()
@@ -86,91 +322,257 @@ class AccessLog(CommonObj):
 
     def setup_logfile_regex(self):
 
-        self.regex = re.compile(
-            r"""
-            ^
-            (?P<ip>((\d{1,3}.){3}\d{1,3})
-                   |
-                   (([\w-]+[.]){3,4}([\w-]+))
-            )
-            \s*?
-            (?P<country>([A-Z]{2}|-))
-            \s*?
-            (-|[a-z0-9]{7})
-            \s*?
-            [\[]
-            (?P<timestamp>\d{2}/\w{3}/\d{4}:\d{2}:\d{2}:\d{2}\s-\d{4})
-            [\]]
-            \s*?
-            "(
-                -
-                |
-                \\n
-                |
-                0
-                |
-                (?P<method>(DELETE|GET|HEAD|OPTIONS|PATCH|POST|PROPFIND|PUT|SSTP_DUPLEX_POST))
-                \s
-                (?P<url>[^\?;]+)
-                ((\?|;)(?P<query_string>[^\s]+)?)?
-                \s
-                HTTP/[12].[01]
-            )"
-            \s
-            (?P<status>\d+)
-            \s
-            (?P<bytes>\d+|-)
-            \s+?
-            "(?P<referer>.*?(?="\s))"
-            \s
-            "(?P<user_agent>.*?(?="\s))"
-            (
-              \s+
-              "(?P<content_type>[^"]+)"
-              \s
-              (?P<remote_port>[0-9]+)
-            )?
-            """,
-            re.X
-        )
+        self.regex = re.compile(LOGFILE_REGEX, re.X)
 
     def run(self):
 
         self.parse_input_file()
 
-        self.df['ua'] = self.df['ua'].apply(apply_regexes)
+        # The raw strings are kept for the user agent histograms.
+        self.df['raw_ua'] = self.df['ua']
+        self.df['ua'] = classify_useragents(self.df['ua'])
 
-    def parse_input_file(self):
+    def enrich(self, df, column='ip'):
+        """
+        Tag the rows of a dataframe with the asn and owner of the most
+        specific local prefix containing the ip address or network in the
+        given column.
+
+        Returns
+        -------
+        pandas.DataFrame
+            A copy of df with asn and owner columns added.
+        """
+        tags = self.prefix_table.lookup(df[column].astype(str))
+        return df.assign(asn=tags['asn'], owner=tags['owner'])
 
-        if str(self.infile).endswith('gz'):
-            fp = gzip.open(self.infile, mode='rt')
+    def iter_chunks(self):
+        """
+        Parse and classify the input file a chunk at a time, so that only a
+        single chunk is ever held in memory.
+
+        Yields
+        ------
+        pandas.DataFrame
+        """
+        if self.pipeline:
+            yield from self.iter_chunks_pipelined()
+            return
+
+        for data in self.iter_records():
+            yield self.records_to_chunk(data)
+
+    def iter_chunks_pipelined(self):
+        """
+        Parse and classify the input file a chunk at a time in a pipeline.
+        A reader thread reads (and decompresses) batches of raw lines, a
+        parser thread turns them into classified dataframes, and the caller
+        uses each chunk, e.g. copying it into the staging table, on its own
+        thread meanwhile.  Each stage is only a couple of chunks ahead of the
+        next.
+
+        With several workers, an uncompressed logfile is read and parsed by
+        the worker processes instead (see iter_records_parallel), and the
+        parser thread only builds the dataframes.
+
+        Yields
+        ------
+        pandas.DataFrame
+        """
+        parallel = self.workers > 1
+        if parallel and str(self.infile).endswith('gz'):
+            msg = 'Cannot parse a gzipped logfile in parallel.'
+            warnings.warn(msg)
+            parallel = False
+
+        if parallel:
+            batches = prefetch(self.iter_records_parallel())
+            parse = self.records_to_chunk
+        else:
+            batches = prefetch(self.iter_line_batches())
+
+            def parse(batch):
+                return self.records_to_chunk(self.parse_lines(batch))
+
+        chunks = prefetch(map(parse, batches))
+        try:
+            yield from chunks
+        finally:
+            chunks.close()
+            batches.close()
+
+    def iter_line_batches(self):
+        """
+        Read the input file, yielding batches of raw lines along with the
+        index of the first line of each.  A batch is yielded whenever it
+        reaches either the chunksize or the chunk_mb limit.  If neither
+        limit is set, the entire file is yielded at once.
+        """
+        max_rows = self.chunksize
+        if self.chunk_mb is None:
+            max_bytes = None
         else:
-            fp = self.infile.open()
+            max_bytes = int(self.chunk_mb * 1024 * 1024)
+
+        start = 0
+        lines = []
+        nbytes = 0
+        with self.open_input_file() as fp:
+            for line in fp:
+
+                lines.append(line)
+                nbytes += len(line)
+
+                if (
+                    (max_rows is not None and len(lines) >= max_rows)
+                    or (max_bytes is not None and nbytes >= max_bytes)
+                ):
+                    yield start, lines
+                    start += len(lines)
+                    lines = []
+                    nbytes = 0
+
+        if len(lines) > 0:
+            yield start, lines
+
+    def parse_lines(self, batch):
+        """
+        Parse a batch of raw lines from iter_line_batches into a list of log
+        records, skipping any lines that do not match.
+        """
+        start, lines = batch
 
         data = []
-        for idx, line in enumerate(fp):
+        for idx, line in enumerate(lines, start=start):
+            item = match_line(self.regex, idx, line, self.extra_fields)
+            if item is not None:
+                data.append(item)
 
-            if (m := self.regex.match(line)) is None:
-                msg = f"Did not match line {idx} {line}"
+        return data
+
+    def records_to_chunk(self, data):
+        """
+        Turn a list of parsed log records into a dataframe with classified
+        user agents, keeping the raw strings for the user agent histograms.
+        """
+        df = self.records_to_dataframe(data)
+        df['raw_ua'] = df['ua']
+        df['ua'] = classify_useragents(df['ua'])
+        return df
+
+    def open_input_file(self):
+        if str(self.infile).endswith('gz'):
+            return gzip.open(self.infile, mode='rt')
+        else:
+            return self.infile.open()
+
+    def iter_records(self):
+        """
+        Read the input file, yielding lists of parsed log records, one for
+        each batch of lines from iter_line_batches.
+        """
+        if self.workers > 1:
+            if str(self.infile).endswith('gz'):
+                msg = 'Cannot parse a gzipped logfile in parallel.'
                 warnings.warn(msg)
-                continue
-                # raise RuntimeError(msg)
-
-            item = (
-                m.group('ip'),
-                m.group('timestamp'),
-                m.group('status'),
-                m.group('user_agent'),
-                m.group('url'),
-                m.group('bytes'),
-            )
-            data.append(item)
+            else:
+                yield from self.iter_records_parallel()
+                return
+
+        for batch in self.iter_line_batches():
+            data = self.parse_lines(batch)
+            if len(data) > 0:
+                yield data
 
+    def iter_records_parallel(self):
+        """
+        Split the (uncompressed) input file into newline-aligned byte ranges
+        and parse them in a pool of worker processes.  The parsed records are
+        yielded one range at a time in file order.  The ranges are chunk_mb in
+        size if that is set, otherwise the file is divided evenly into several
+        ranges per worker.  Only a few ranges per worker are submitted ahead
+        of the one being yielded, so a slow consumer does not leave the
+        records of the whole file waiting in memory.
+        """
+        if self.chunk_mb is None:
+            size = self.infile.stat().st_size // (self.workers * 4)
+        else:
+            size = int(self.chunk_mb * 1024 * 1024)
+        size = max(size, MIN_BYTE_RANGE)
+
+        ranges = split_byte_ranges(self.infile, size)
+        args = [
+            (str(self.infile), start, end, self.extra_fields)
+            for start, end in ranges
+        ]
+
+        logging.warning(
+            f'Parsing {len(ranges)} byte ranges with {self.workers} workers.'
+        )
+        t0 = time.time()
+        nrows = 0
+
+        max_pending = RANGES_IN_FLIGHT * self.workers
+        pending = collections.deque()
+        with concurrent.futures.ProcessPoolExecutor(
+            max_workers=self.workers, initializer=_init_worker
+        ) as executor:
+            try:
+                for arg in args:
+                    if len(pending) >= max_pending:
+                        data = pending.popleft().result()
+                        nrows += len(data)
+                        yield data
+                    pending.append(executor.submit(_parse_byte_range, arg))
+
+                while len(pending) > 0:
+                    data = pending.popleft().result()
+                    nrows += len(data)
+                    yield data
+            finally:
+                # Do not parse the rest if the consumer has stopped early.
+                for future in pending:
+                    future.cancel()
+
+        t1 = time.time()
+        msg = (
+            f'iter_records_parallel:  '
+            f'parsed {nrows} rows in {t1-t0:.1f} seconds '
+            f'({nrows / max(t1 - t0, 1e-6):,.0f} rows/second) '
+            f'with {self.workers} workers.'
+        )
+        logging.warning(msg)
+
+    def parse_input_file(self):
+
+        data = []
+        for records in self.iter_records():
+            data.extend(records)
+
+        self.df = self.records_to_dataframe(data)
+
+    def records_to_dataframe(self, data):
+        """
+        Turn a list of parsed log records into a dataframe.  The timestamps
+        are converted to UTC, since a log may have more than one offset,
+        e.g. on the day that daylight saving time ends.  The log-local date
+        of each row is taken from the timestamp text before that.
+        """
         columns = ["ip", 'timestamp', "status", "ua", "url", 'bytes']
+        columns += list(self.extra_fields)
         df = pd.DataFrame(data, columns=columns)
 
+        # e.g. "07/Nov/2024:00:05:17 -0700" is on 07/Nov/2024.  A chunk has
+        # only a day or two, so each is parsed only once.
+        days = df['timestamp'].str[:11]
+        dates = {
+            day: dt.datetime.strptime(day, '%d/%b/%Y').date()
+            for day in days.unique()
+        }
+        df['date'] = days.map(dates).astype(object)
+
         df['timestamp'] = pd.to_datetime(
-            df['timestamp'], format='%d/%b/%Y:%H:%M:%S %z'
+            df['timestamp'], format='%d/%b/%Y:%H:%M:%S %z', utc=True
         )
         df['status'] = df['status'].astype(int)
 
@@ -182,15 +584,27 @@ class AccessLog(CommonObj):
 
         df['bytes'] = df['bytes'].apply(convert_bytes)
 
-        def fcn(x):
-            if re.search(r'\d{1,3}[.]\d{1,3}[.]\d{1,3}[.]\d{1,3}', x):
-                return x
+        df['url_flags'] = classify_urls(df['url'])
+
+        if self.extra_fields:
+            df = convert_extras(df)
+
+        # The ip field may be a hostname.  Resolve each distinct hostname
+        # only once.
+        is_hostname = ~df['ip'].str.contains(
+            r'\d{1,3}[.]\d{1,3}[.]\d{1,3}[.]\d{1,3}'
+        )
+        if is_hostname.any():
+            hostnames = df.loc[is_hostname, 'ip']
+            if self.resolver is None:
+                df.loc[is_hostname, 'ip'] = None
             else:
-                try:
-                    return socket.gethostbyname(x)
-                except:  # noqa : E501
-                    return x
+                mapping = self.resolver.resolve(hostnames.unique())
+                resolved = hostnames.map(mapping)
+                # Leave hostnames that could not be resolved as they were.
+                df.loc[is_hostname, 'ip'] = resolved.fillna(hostnames)
 
-        df.loc[:, 'ip'] = df['ip'].apply(fcn)
+        for masklen, keys in network_keys(df['ip']).items():
+            df[NETWORK_COLUMNS[masklen]] = keys
 
-        self.df = df
+        return df
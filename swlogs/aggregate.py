@@ -0,0 +1,452 @@
+# standard library imports
+
+# 3rd party library imports
+import pandas as pd
+
+# local imports
+from .extras import country_name
+from .ips import NETWORK_COLUMNS, network_from_key
+from .sketches import HLL_PRECISION, HyperLogLog, SpaceSaving, hll_registers
+from .urls import URL_FLAGS
+
+# How many of the top rows are kept in each table.
+TOP_N = {
+    'bots': 20,
+    'ip32': 30,
+    'ip24': 30,
+    'ip16': 30,
+}
+
+
+class DailyAggregator(object):
+    """
+    Compute the rows of the overall, bots, ip32, ip24, and ip16 tables from a
+    stream of parsed log chunks, the same as the SQL in swlogs/data does from
+    the staging table.  Each chunk is reduced to per-key counts on each of
+    its dates which are merged into running hash tables, so only the
+    distinct keys of each day are ever held in memory.  If the chunks have a
+    country column, the rows of the countries table are computed too.
+
+    With a capacity, the bots and ip tables are instead kept in Space-Saving
+    heavy hitter sketches for each day, so memory stays bounded however many
+    distinct keys there are.  Their hits are then overestimates by at most
+    the day's hits divided by the capacity, and the percentages are over the
+    hits seen while a key was monitored.  The results are exact as long as
+    there are no more distinct keys on a day than the capacity.
+
+    The rows are dated by the log-local dates of the timestamps, the same as
+    the date column of the staging table.
+
+    Attributes
+    ----------
+    date : datetime.date or None
+        The day of the logfile, recorded as the log_date of every row.  If
+        None, it is the date that most of the rows fall on.
+    counts : dict
+        Maps "overall" and "countries" to dataframes of counts indexed by
+        date (and country), and the bots and ip table names to dicts mapping
+        each date to a dataframe of counts indexed by key.
+    capacity : int or None
+        If not None, the capacity of the sketches.
+    sketches : dict or None
+        If not None, maps the bots and ip table names to dicts mapping each
+        date to a SpaceSaving sketch used instead of the counts.
+    """
+
+    def __init__(self, date=None, capacity=None):
+
+        self.date = date
+
+        self.counts = {
+            'overall': None,
+            'bots': {},
+            'ip32': {},
+            'ip24': {},
+            'ip16': {},
+        }
+        self.capacity = capacity
+        if capacity is None:
+            self.sketches = None
+        else:
+            self.sketches = {table: {} for table in TOP_N}
+
+    def update(self, df):
+        """
+        Merge the counts of a chunk of parsed log rows.
+        """
+        counts = pd.DataFrame({
+            'hits': 1,
+            'bytes': df['bytes'],
+            'errors': (df['status'] > 399).astype(int),
+            'c429': (df['status'] == 429).astype(int),
+        }, index=df.index)
+        for col, flag in URL_FLAGS.items():
+            counts[col] = ((df['url_flags'] & flag) > 0).astype(int)
+
+        dates = df['date']
+
+        keys = {'overall': dates}
+        if 'country' in df.columns:
+            keys['countries'] = [dates, df['country']]
+
+        for table, key in keys.items():
+            g = counts.groupby(key, dropna=False, sort=False).sum()
+            if self.counts.get(table) is None:
+                self.counts[table] = g
+            else:
+                self.counts[table] = self.counts[table].add(g, fill_value=0)
+
+        keys = {
+            'bots': df['ua'],
+            'ip32': df['ip'],
+            'ip24': df[NETWORK_COLUMNS[24]],
+            'ip16': df[NETWORK_COLUMNS[16]],
+        }
+
+        # A chunk almost always falls on a single date, so the rows of each
+        # date are picked out by position rather than grouping by the dates
+        # and keys together.
+        for date, positions in dates.groupby(dates, sort=False).indices.items():  # noqa : E501
+            day = counts.iloc[positions]
+            for table, key in keys.items():
+                g = day.groupby(
+                    key.iloc[positions], dropna=False, sort=False
+                ).sum()
+                if self.sketches is not None:
+                    sketches = self.sketches[table]
+                    if date not in sketches:
+                        sketches[date] = SpaceSaving(self.capacity)
+                    self.update_sketch(sketches[date], g)
+                elif date not in self.counts[table]:
+                    self.counts[table][date] = g
+                else:
+                    self.counts[table][date] = self.counts[table][date].add(
+                        g, fill_value=0
+                    )
+
+    def update_sketch(self, sketch, g):
+        """
+        Feed the per-key counts of a chunk into a sketch.  The hits are the
+        weight, and all of the counts (hits included) are accumulated with
+        it.
+        """
+        for key, row in zip(g.index, g.to_numpy()):
+            sketch.update(None if pd.isna(key) else key, row[0], row)
+
+    def top(self, table, date):
+        """
+        The counts of the busiest keys of a table on a day.  The "observed"
+        column is the number of hits that the other counts are over.
+        """
+        if self.sketches is None:
+            df = self.counts[table][date].astype(int)
+            df = df.sort_values('hits', ascending=False, kind='stable')
+            df = df.head(TOP_N[table])
+            return df.assign(observed=df['hits'])
+
+        columns = self.counts['overall'].columns
+        items = self.sketches[table][date].top(TOP_N[table])
+        df = pd.DataFrame(
+            [extra for _, _, _, extra in items],
+            index=[key for key, _, _, _ in items],
+            columns=columns,
+            dtype=int
+        )
+        df['observed'] = df['hits']
+        df['hits'] = [count for _, count, _, _ in items]
+        return df
+
+    def days(self):
+        """
+        The dates of the log rows, in order.
+        """
+        if self.sketches is None:
+            return sorted(self.counts['bots'])
+        return sorted(self.sketches['bots'])
+
+    def log_date(self):
+        """
+        The day of the logfile, or None if there were no rows.
+        """
+        if self.date is not None:
+            return self.date
+        if self.counts['overall'] is None:
+            return None
+        hits = self.counts['overall']['hits'].sort_index()
+        return hits.idxmax()
+
+    def tables(self):
+        """
+        Returns
+        -------
+        dict
+            Maps each table name to a dataframe of rows ready to be inserted.
+        """
+        tables = {}
+        if self.counts['overall'] is None:
+            return tables
+
+        log_date = self.log_date()
+
+        df = self.counts['overall'].astype(int)
+        tables['overall'] = pd.DataFrame({
+            'date': df.index,
+            'bytes': df['bytes'].to_numpy(),
+            'hits': df['hits'].to_numpy(),
+            'log_date': log_date,
+        })
+
+        frames = []
+        for date in self.days():
+            df = self.top('bots', date)
+            frames.append(pd.DataFrame({
+                'ua': df.index,
+                'hits': df['hits'].to_numpy(),
+                'error_pct': (df['errors'] / df['observed'] * 100).to_numpy(),  # noqa : E501
+                'c429': df['c429'].to_numpy(),
+                'robots': (df['robots'] > 0).to_numpy(),
+                'xmlui': (df['xmlui'] > 0).to_numpy(),
+                'sitemaps': (df['sitemaps'] > 0).to_numpy(),
+                'item_pct': (df['items'] / df['observed'] * 100).to_numpy(),
+                'date': date,
+                'log_date': log_date,
+            }))
+        tables['bots'] = pd.concat(frames, ignore_index=True)
+
+        for table, masklen in (('ip32', None), ('ip24', 24), ('ip16', 16)):
+            frames = []
+            for date in self.days():
+                df = self.top(table, date)
+                if masklen is None:
+                    ips = df.index
+                else:
+                    # Only the kept rows are turned back into networks.
+                    ips = [
+                        None if pd.isna(key)
+                        else network_from_key(key, masklen)
+                        for key in df.index
+                    ]
+                frames.append(pd.DataFrame({
+                    'ip': ips,
+                    'hits': df['hits'].to_numpy(),
+                    'error_pct': (df['errors'] / df['observed'] * 100).to_numpy(),  # noqa : E501
+                    'date': date,
+                    'log_date': log_date,
+                }))
+            tables[table] = pd.concat(frames, ignore_index=True)
+
+        if self.counts.get('countries') is not None:
+            df = self.counts['countries'].astype(int)
+            tables['countries'] = pd.DataFrame({
+                'date': df.index.get_level_values(0),
+                'country': [
+                    country_name(x) for x in df.index.get_level_values(1)
+                ],
+                'hits': df['hits'].to_numpy(),
+                'bytes': df['bytes'].to_numpy(),
+                'errors': df['errors'].to_numpy(),
+                'c429': df['c429'].to_numpy(),
+                'log_date': log_date,
+            })
+
+        return tables
+
+
+class DistinctCounts(object):
+    """
+    HyperLogLog sketches of the distinct client ip addresses and distinct
+    item urls of each user agent, computed from a stream of parsed log
+    chunks.  There may be a great many user agents, most of them seen only
+    a few times, so rather than a full set of registers per user agent only
+    the registers that are actually set are kept, as (user agent, register,
+    rank) rows.  A full sketch is only built for the user agents asked for.
+
+    Attributes
+    ----------
+    p : int
+        The precision of the sketches.
+    registers : dict
+        Maps "ips" and "items" to the compacted dataframe of set registers.
+    pending : dict
+        Maps "ips" and "items" to lists of dataframes of registers not yet
+        folded into the compacted ones.
+    """
+
+    def __init__(self, p=HLL_PRECISION):
+
+        self.p = p
+        self.registers = {'ips': None, 'items': None}
+        self.pending = {'ips': [], 'items': []}
+
+    def update(self, df):
+        """
+        Add a chunk of parsed, classified log rows.
+        """
+        is_item = (df['url_flags'] & URL_FLAGS['items']) > 0
+        values = {
+            'ips': df[['ua', 'ip']],
+            'items': df.loc[is_item, ['ua', 'url']],
+        }
+
+        for name, pairs in values.items():
+            pairs = pairs.dropna().drop_duplicates()
+            index, rank = hll_registers(pairs.iloc[:, 1], p=self.p)
+            new = pd.DataFrame({
+                'ua': pairs['ua'].to_numpy(),
+                'index': index,
+                'rank': rank,
+            })
+            self.pending[name].append(self.reduce(new))
+
+            # Compact once the pending registers outnumber the compacted
+            # ones, so each row is only compacted a few times.
+            npending = sum(len(x) for x in self.pending[name])
+            compacted = self.registers[name]
+            if compacted is None or npending > len(compacted):
+                self.compact(name)
+
+    def reduce(self, df):
+        """
+        Keep only the largest rank of each register of each user agent.
+        """
+        return df.groupby(['ua', 'index'], sort=False)['rank'].max().reset_index()  # noqa : E501
+
+    def compact(self, name):
+
+        frames = self.pending[name]
+        if self.registers[name] is not None:
+            frames = [self.registers[name]] + frames
+        self.registers[name] = self.reduce(pd.concat(frames))
+        self.pending[name] = []
+
+    def sketches(self, name, useragents):
+        """
+        Build the full sketches of some user agents.
+
+        Parameters
+        ----------
+        name : str
+            Either "ips" or "items".
+        useragents : list of str
+
+        Returns
+        -------
+        dict
+            Maps each user agent to a HyperLogLog sketch.
+        """
+        if len(self.pending[name]) > 0:
+            self.compact(name)
+
+        sketches = {ua: HyperLogLog(p=self.p) for ua in useragents}
+
+        df = self.registers[name]
+        if df is None:
+            return sketches
+
+        df = df[df['ua'].isin(useragents)]
+        for ua, g in df.groupby('ua'):
+            registers = sketches[ua].registers
+            registers[g['index'].to_numpy()] = g['rank'].to_numpy()
+
+        return sketches
+
+
+class HourlyRollup(object):
+    """
+    The hits, bytes, errors, and 429s of each user agent in each hour,
+    computed from a stream of parsed log chunks.
+
+    Attributes
+    ----------
+    counts : pandas.DataFrame or None
+        The counts indexed by user agent and hour.
+    """
+
+    def __init__(self):
+        self.counts = None
+
+    def update(self, df):
+        """
+        Merge the counts of a chunk of parsed, classified log rows.
+        """
+        counts = pd.DataFrame({
+            'hits': 1,
+            'bytes': df['bytes'],
+            'errors': (df['status'] > 399).astype(int),
+            'c429': (df['status'] == 429).astype(int),
+        }, index=df.index)
+
+        keys = [df['ua'].rename('ua'), df['timestamp'].dt.floor('h').rename('hour')]  # noqa : E501
+        g = counts.groupby(keys, sort=False).sum()
+
+        if self.counts is None:
+            self.counts = g
+        else:
+            self.counts = self.counts.add(g, fill_value=0)
+
+    def rows(self):
+        """
+        Returns
+        -------
+        pandas.DataFrame
+            One row per user agent and hour, ready to be inserted.
+        """
+        if self.counts is None:
+            columns = ['ua', 'hour', 'hits', 'bytes', 'errors', 'c429']
+            return pd.DataFrame(columns=columns)
+
+        return self.counts.astype(int).reset_index()
+
+
+class UAHistogram(object):
+    """
+    The hits, errors, 429s, and url category counts of each raw user agent
+    string on each date, computed from a stream of parsed log chunks, so
+    that the bots table can be rebuilt from them when the user agent rules
+    change.
+
+    Attributes
+    ----------
+    counts : pandas.DataFrame or None
+        The counts indexed by date and raw user agent.
+    """
+
+    def __init__(self):
+        self.counts = None
+
+    def update(self, df):
+        """
+        Merge the counts of a chunk of parsed log rows that still have their
+        raw user agent strings.
+        """
+        counts = pd.DataFrame({
+            'hits': 1,
+            'errors': (df['status'] > 399).astype(int),
+            'c429': (df['status'] == 429).astype(int),
+        }, index=df.index)
+        for col, flag in URL_FLAGS.items():
+            counts[col] = ((df['url_flags'] & flag) > 0).astype(int)
+
+        keys = [
+            df['date'],
+            df['raw_ua'].rename('raw_ua'),
+        ]
+        g = counts.groupby(keys, sort=False).sum()
+
+        if self.counts is None:
+            self.counts = g
+        else:
+            self.counts = self.counts.add(g, fill_value=0)
+
+    def rows(self):
+        """
+        Returns
+        -------
+        pandas.DataFrame
+            One row per date and raw user agent, ready to be inserted.
+        """
+        if self.counts is None:
+            columns = ['date', 'raw_ua', 'hits', 'errors', 'c429', *URL_FLAGS]  # noqa : E501
+            return pd.DataFrame(columns=columns)
+
+        return self.counts.astype(int).reset_index()
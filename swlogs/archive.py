@@ -0,0 +1,193 @@
+"""
+A columnar archive of the parsed, classified log rows.  Each day is kept as
+Parquet files under a date=YYYY-MM-DD directory, so that a question about
+past traffic reads only the days, columns, and row groups that it needs
+instead of parsing the logfiles again.
+
+The archive requires pyarrow, which is optional.
+"""
+
+# standard library imports
+import itertools
+import os
+import pathlib
+
+# 3rd party library imports
+try:
+    import pyarrow as pa
+    import pyarrow.dataset as ds
+    import pyarrow.parquet as pq
+except ImportError:
+    pa = None
+
+# local imports
+from .extras import EXTRA_COLUMNS
+from .ips import NETWORK_COLUMNS
+
+if pa is not None:
+
+    ARROW_TYPES = {
+        'int2': pa.int16(),
+        'int4': pa.int32(),
+        'text': pa.string(),
+    }
+
+    # The columns of the archive files.  Every file has every optional field,
+    # all missing if it was not loaded.  The timestamps are stored in UTC.
+    ARCHIVE_SCHEMA = pa.schema([
+        ('timestamp', pa.timestamp('us', tz='UTC')),
+        ('ip', pa.string()),
+        ('ua', pa.string()),
+        ('url', pa.string()),
+        ('status', pa.int32()),
+        ('bytes', pa.int64()),
+        ('url_flags', pa.int16()),
+        *[(column, pa.int64()) for column in NETWORK_COLUMNS.values()],
+        *[(name, ARROW_TYPES[type]) for name, type in EXTRA_COLUMNS.items()],
+    ])
+
+    PARTITIONING = ds.partitioning(
+        pa.schema([('date', pa.date32())]), flavor='hive'
+    )
+
+    # The archive as it is read, with the text columns that have few
+    # distinct values read back as categoricals, and the date of the
+    # directory of each file.
+    DICTIONARY_COLUMNS = ['ip', 'ua', 'url']
+    READ_SCHEMA = pa.schema([
+        *[
+            field.with_type(pa.dictionary(pa.int32(), pa.string()))
+            if field.name in DICTIONARY_COLUMNS else field
+            for field in ARCHIVE_SCHEMA
+        ],
+        ('date', pa.date32()),
+    ])
+
+
+class ParquetArchive(object):
+    """
+    Write the log rows of a run into the archive a chunk at a time, and read
+    them back.
+
+    Within each day the rows of a chunk are sorted by user agent, so that
+    the row group statistics let a user agent filter skip most of a file.
+    The text columns are dictionary encoded by the Parquet writer.
+
+    Each run writes one file per day, named for the span of local times it
+    covers, e.g. date=2024-11-07/000000-235959.parquet.  Like the raw rows
+    in swlogs.hits, files from earlier runs that fall within the span of a
+    new file are replaced, so reloading a logfile does not duplicate rows.
+
+    Attributes
+    ----------
+    directory : pathlib.Path
+        The root of the archive.
+    writers : dict
+        The writer of each day written so far in this run, along with its
+        temporary file and the first and last local time of its rows.
+    counter : iterator
+        Numbers the temporary files.
+    """
+
+    def __init__(self, directory):
+
+        if pa is None:
+            msg = 'The parquet archive requires pyarrow'
+            raise RuntimeError(msg)
+
+        self.directory = pathlib.Path(directory)
+        self.writers = {}
+        self.counter = itertools.count()
+
+    def write(self, df):
+        """
+        Add a chunk of classified log rows to the files of their days.
+        """
+        for date, day in df.groupby('date', sort=False):
+
+            day = day.sort_values(['ua', 'timestamp'], kind='stable')
+            start = day['timestamp'].min().strftime('%H%M%S')
+            stop = day['timestamp'].max().strftime('%H%M%S')
+
+            table = pa.Table.from_pandas(
+                day.reindex(columns=ARCHIVE_SCHEMA.names),
+                schema=ARCHIVE_SCHEMA,
+                preserve_index=False
+            )
+
+            if date not in self.writers:
+                path = self.directory / f'date={date}'
+                path.mkdir(parents=True, exist_ok=True)
+                # Files starting with a dot are not read until they are
+                # renamed by close().
+                tmp = path / f'.{os.getpid()}-{next(self.counter)}.tmp'
+                writer = pq.ParquetWriter(tmp, ARCHIVE_SCHEMA)
+                self.writers[date] = [writer, tmp, start, stop]
+            else:
+                entry = self.writers[date]
+                entry[2] = min(entry[2], start)
+                entry[3] = max(entry[3], stop)
+
+            self.writers[date][0].write_table(table)
+
+    def close(self):
+        """
+        Finish the files of this run, replacing any earlier files within
+        their spans.
+        """
+        for date, (writer, tmp, start, stop) in self.writers.items():
+            writer.close()
+
+            for path in tmp.parent.glob('*.parquet'):
+                first, last = path.stem.split('-')
+                if start <= first and last <= stop:
+                    path.unlink()
+
+            tmp.rename(tmp.parent / f'{start}-{stop}.parquet')
+
+        self.writers = {}
+
+    def read(
+        self, columns=None, start_date=None, end_date=None, useragents=None
+    ):
+        """
+        Read archived log rows.  Only the requested columns are read, whole
+        days outside of the dates are skipped, and the user agent filter is
+        pushed down to the row groups.
+
+        Parameters
+        ----------
+        columns : list of str or None
+            Read only these columns, e.g. ['timestamp', 'ua'].  The default
+            is all of them, plus the date.
+        start_date, end_date : datetime.date or None
+            Read only the days from start_date through end_date.
+        useragents : list of str or None
+            Read only the rows of these classified user agents.
+
+        Returns
+        -------
+        pandas.DataFrame
+            The ip, ua, and url columns are categoricals.
+        """
+        fmt = ds.ParquetFileFormat(dictionary_columns=DICTIONARY_COLUMNS)
+        dataset = ds.dataset(
+            self.directory,
+            schema=READ_SCHEMA,
+            format=fmt,
+            partitioning=PARTITIONING
+        )
+
+        filter = None
+        conditions = [
+            (start_date, ds.field('date') >= start_date),
+            (end_date, ds.field('date') <= end_date),
+            (useragents, ds.field('ua').isin(useragents or [])),
+        ]
+        for value, condition in conditions:
+            if value is None:
+                continue
+            filter = condition if filter is None else filter & condition
+
+        table = dataset.to_table(columns=columns, filter=filter)
+        return table.to_pandas()
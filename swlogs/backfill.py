@@ -0,0 +1,135 @@
+"""
+Load and summarize a backlog of logfiles, e.g. months of rotated and gzipped
+logs, several at a time.
+"""
+
+# standard library imports
+import concurrent.futures
+import glob
+import logging
+import pathlib
+import time
+
+# 3rd party library imports
+
+# local imports
+from .access_logs import PIPELINE_CHUNK_MB
+from .loglogs import LogLogs
+
+
+def _backfill_logfile(kwargs):
+    """
+    Load and summarize a single logfile in a worker process.
+
+    Returns
+    -------
+    datetime.date or None
+        The day of the logfile, or None if it had no log rows.
+    float
+        How many seconds it took.
+    """
+    t0 = time.time()
+    with LogLogs(**kwargs) as o:
+        o.run()
+    return o.log_date, time.time() - t0
+
+
+class Backfill(object):
+    """
+    Run each of many logfiles through LogLogs in a bounded pool of worker
+    processes.  The summary rows are stamped with the day found in each
+    logfile's own timestamps, and the rows of a day are replaced whenever
+    its logfile is loaded again, so the logfiles may be loaded in any order
+    and a failed backfill can simply be run again.
+
+    The workers cannot share the staging table, so each logfile is
+    summarized in process (see DailyAggregator).  Each logfile is parsed in
+    chunks, unless asked otherwise, so that the workers together hold only a
+    few chunks in memory rather than a whole day of log rows each.
+
+    Attributes
+    ----------
+    logfiles : list of pathlib.Path
+        The logfiles matching the glob patterns, in sorted order.
+    processes : int or None
+        The number of logfiles processed at once.  If None, one per CPU.
+    chunked : bool
+        If True and no chunk size is given, parse each logfile
+        PIPELINE_CHUNK_MB at a time.
+    options : dict
+        Keyword arguments passed to LogLogs for each logfile.
+    """
+
+    def __init__(self, patterns, processes=None, chunked=True, **options):
+
+        if isinstance(patterns, (str, pathlib.Path)):
+            patterns = [patterns]
+
+        paths = set()
+        for pattern in patterns:
+            paths.update(glob.glob(str(pattern)))
+        if len(paths) == 0:
+            msg = f'No logfiles match {", ".join(map(str, patterns))}'
+            raise ValueError(msg)
+        self.logfiles = [pathlib.Path(path) for path in sorted(paths)]
+
+        if options.get('summary', 'in-process') != 'in-process':
+            msg = 'The backfill summarizes each logfile in process'
+            raise ValueError(msg)
+
+        if (
+            chunked
+            and options.get('chunksize') is None
+            and options.get('chunk_mb') is None
+        ):
+            options['chunk_mb'] = PIPELINE_CHUNK_MB
+
+        self.processes = processes
+        self.chunked = chunked
+        self.options = {**options, 'summary': 'in-process'}
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        pass
+
+    def run(self):
+
+        logging.warning(
+            f'Starting backfill of {len(self.logfiles)} logfiles '
+            f'with {self.processes or "one per CPU"} processes'
+        )
+        t0 = time.time()
+
+        failed = []
+        with concurrent.futures.ProcessPoolExecutor(
+            max_workers=self.processes
+        ) as executor:
+            futures = {
+                executor.submit(
+                    _backfill_logfile, {'logfile': path, **self.options}
+                ): path
+                for path in self.logfiles
+            }
+            for future in concurrent.futures.as_completed(futures):
+                path = futures[future]
+                try:
+                    date, elapsed = future.result()
+                except Exception as e:
+                    logging.warning(f'backfill:  {path} failed:  {e!r}')
+                    failed.append(path)
+                    continue
+                logging.warning(
+                    f'backfill:  {path} ({date}) took {elapsed:.1f} seconds'
+                )
+
+        t1 = time.time()
+        logging.warning(f'Ending backfill, took {(t1 - t0):.1f} seconds')
+
+        if failed:
+            msg = (
+                f'{len(failed)} of {len(self.logfiles)} logfiles failed:  '
+                f'{", ".join(map(str, failed))}'
+            )
+            raise RuntimeError(msg)
@@ -3,9 +3,15 @@ import argparse
 import datetime as dt
 
 # local imports
+from swlogs.access_logs import PIPELINE_CHUNK_MB
+from swlogs.backfill import Backfill
+from swlogs.extras import EXTRA_COLUMNS
+from swlogs.live import LiveMonitor
 from swlogs.loglogs import LogLogs
 from swlogs.plots import Plot
+from swlogs.reclassify import Reclassify
 from swlogs.swreports import SWReport
+from swlogs.tail import TailLogs
 
 
 def plot():
@@ -28,10 +34,31 @@ def plot():
         type=int,
         default=5
     )
+    parser.add_argument(
+        '--hourly',
+        help='Plot the hourly hits of the top bots on a date',
+        action='store_true'
+    )
+    parser.add_argument(
+        '--useragent',
+        help='Restrict the hourly plot to this user agent'
+    )
+    parser.add_argument(
+        '--date',
+        type=dt.date.fromisoformat,
+        help='The date of the hourly plot.  The default is yesterday.'
+    )
 
     args = parser.parse_args()
 
-    with Plot(overall=args.overall, bots=args.bots, numbots=args.n) as o:
+    with Plot(
+        overall=args.overall,
+        bots=args.bots,
+        numbots=args.n,
+        hourly=args.hourly,
+        useragent=args.useragent,
+        thedate=args.date
+    ) as o:
         o.run()
 
 
@@ -44,10 +71,165 @@ def loglogs():
         help='Access log',
         default='/var/log/nginx/access.log.1'
     )
+    parser.add_argument(
+        '--chunksize',
+        help='Stream the logfile into the database this many rows at a time',
+        type=int
+    )
+    parser.add_argument(
+        '--chunk-mb',
+        help='Stream the logfile into the database this many MB at a time',
+        type=float
+    )
+    parser.add_argument(
+        '--workers',
+        help='Parse an uncompressed logfile with this many processes',
+        type=int,
+        default=1
+    )
+    parser.add_argument(
+        '--pipeline',
+        help=(
+            'Read, parse, and load the logfile on separate threads at the '
+            'same time, a chunk at a time'
+        ),
+        action='store_true'
+    )
+    parser.add_argument(
+        '--no-resolve',
+        help='Do not resolve hostnames in the ip field',
+        action='store_true'
+    )
+    parser.add_argument(
+        '--copy-format',
+        help='Load the raw log rows with CSV or binary COPY',
+        choices=['csv', 'binary'],
+        default='csv'
+    )
+    parser.add_argument(
+        '--summary',
+        help=(
+            'Compute the summary tables with a single scan of the staging '
+            'table, with one query per table (run one at a time or '
+            'concurrently), or in python without using the staging table'
+        ),
+        choices=['single-scan', 'serial', 'concurrent', 'in-process'],
+        default='single-scan'
+    )
+    parser.add_argument(
+        '--keep-raw',
+        help='Keep the raw log rows in the day partitions of swlogs.hits',
+        action='store_true'
+    )
+    parser.add_argument(
+        '--retention-days',
+        help='Drop the raw log partitions older than this many days',
+        type=int
+    )
+    parser.add_argument(
+        '--tail',
+        help=(
+            'Ingest only the lines appended to this live logfile since the '
+            'previous run into swlogs.hits, without computing the summary '
+            'tables'
+        )
+    )
+    parser.add_argument(
+        '--raw-date',
+        help=(
+            'Compute the summary tables from the raw log rows kept for this '
+            'day (YYYY-MM-DD) instead of from the logfile'
+        ),
+        type=dt.date.fromisoformat
+    )
+    parser.add_argument(
+        '--sketch-capacity',
+        help=(
+            'With --summary in-process, find the top user agents and ip '
+            'addresses with heavy hitter sketches of this capacity'
+        ),
+        type=int
+    )
+    parser.add_argument(
+        '--distinct-counts',
+        help=(
+            'Keep sketches of the distinct ip addresses and items of the top '
+            'user agents'
+        ),
+        action='store_true'
+    )
+    parser.add_argument(
+        '--hourly',
+        help='Add the hourly counts of each user agent to swlogs.hourly',
+        action='store_true'
+    )
+    parser.add_argument(
+        '--prefixes',
+        help=(
+            'Tag the ip tables with the ASN and owner of the most specific '
+            'prefix in these CSV files (prefix, asn, and owner columns)'
+        ),
+        nargs='+'
+    )
+    parser.add_argument(
+        '--extra-fields',
+        help=(
+            'Also load these optional fields of each log line into the '
+            'staging table.  With country, the traffic from each country is '
+            'added to swlogs.countries.'
+        ),
+        choices=list(EXTRA_COLUMNS),
+        nargs='+',
+        default=[]
+    )
+    parser.add_argument(
+        '--ua-histogram',
+        help=(
+            'Add the counts of each raw user agent string to '
+            'swlogs.ua_histogram, so that "swlogs reclassify" can rebuild '
+            'the bots table when the user agent rules change'
+        ),
+        action='store_true'
+    )
+    parser.add_argument(
+        '--archive-dir',
+        help=(
+            'Also write the parsed log rows to the day files of a Parquet '
+            'archive in this directory (requires pyarrow)'
+        )
+    )
 
     args = parser.parse_args()
 
-    with LogLogs(logfile=args.logfile) as o:
+    if args.tail is not None:
+        with TailLogs(
+            logfile=args.tail,
+            resolve_hostnames=not args.no_resolve,
+            copy_format=args.copy_format
+        ) as o:
+            o.run()
+        return
+
+    with LogLogs(
+        logfile=args.logfile,
+        chunksize=args.chunksize,
+        chunk_mb=args.chunk_mb,
+        workers=args.workers,
+        resolve_hostnames=not args.no_resolve,
+        copy_format=args.copy_format,
+        summary=args.summary,
+        keep_raw=args.keep_raw,
+        retention_days=args.retention_days,
+        raw_date=args.raw_date,
+        sketch_capacity=args.sketch_capacity,
+        distinct_counts=args.distinct_counts,
+        hourly=args.hourly,
+        prefixes=args.prefixes,
+        extra_fields=args.extra_fields,
+        archive_dir=args.archive_dir,
+        ua_histogram=args.ua_histogram,
+        pipeline=args.pipeline
+    ) as o:
         o.run()
 
 
@@ -59,6 +241,16 @@ def swreport():
     parser.add_argument('--ip16', action='store_true')
     parser.add_argument('--ip24', action='store_true')
     parser.add_argument('--ip32', action='store_true')
+    parser.add_argument(
+        '--countries',
+        action='store_true',
+        help='Report the traffic from each country.'
+    )
+    parser.add_argument(
+        '--hourly',
+        action='store_true',
+        help='Report the traffic in each hour of the date.'
+    )
     parser.add_argument('--useragent', help='Restrict to specific user agent')
 
     parser.add_argument(
@@ -77,6 +269,19 @@ def swreport():
         default=dt.date.today() - dt.timedelta(days=1),
         help=help
     )
+    parser.add_argument(
+        '--start-date',
+        type=dt.date.fromisoformat,
+        help='Start the report for a single user agent on this date.'
+    )
+    parser.add_argument(
+        '--distinct',
+        action='store_true',
+        help=(
+            'Include the distinct ip addresses and items of a single user '
+            'agent (requires --useragent).'
+        )
+    )
 
     args = parser.parse_args()
 
@@ -88,5 +293,183 @@ def swreport():
         thedate=args.date,
         useragent=args.useragent,
         robots=args.robots,
+        start_date=args.start_date,
+        distinct=args.distinct,
+        hourly=args.hourly,
+        countries=args.countries,
     ) as o:
         o.run()
+
+
+def swlogs_command():
+
+    parser = argparse.ArgumentParser(prog='swlogs')
+    subparsers = parser.add_subparsers(dest='command', required=True)
+
+    live = subparsers.add_parser(
+        'live',
+        help='Watch the top traffic in a live access log'
+    )
+    live.add_argument(
+        '--logfile',
+        help='Access log',
+        default='/var/log/nginx/access.log'
+    )
+    live.add_argument(
+        '--window',
+        help='Show the traffic over this many of the most recent minutes',
+        type=int,
+        default=5
+    )
+    live.add_argument(
+        '--top',
+        help='Show this many of the top user agents and networks',
+        type=int,
+        default=10
+    )
+    live.add_argument(
+        '--refresh',
+        help='Seconds between refreshes',
+        type=float,
+        default=2.0
+    )
+    live.add_argument(
+        '--from-start',
+        help='Read the logfile from the start instead of only new lines',
+        action='store_true'
+    )
+
+    reclassify = subparsers.add_parser(
+        'reclassify',
+        help=(
+            'Rebuild the bots table from the user agent histograms with the '
+            'current user agent rules'
+        )
+    )
+    reclassify.add_argument(
+        '--start-date',
+        type=dt.date.fromisoformat,
+        required=True,
+        help='Rebuild the days starting with this one (YYYY-MM-DD)'
+    )
+    reclassify.add_argument(
+        '--end-date',
+        type=dt.date.fromisoformat,
+        help='Rebuild the days through this one.  The default is the start.'
+    )
+
+    backfill = subparsers.add_parser(
+        'backfill',
+        help=(
+            'Load and summarize many rotated or gzipped logfiles at once, '
+            'each under the day of its own timestamps'
+        )
+    )
+    backfill.add_argument(
+        'logfiles',
+        help='Logfiles or glob patterns, e.g. "/var/log/nginx/access.log.*"',
+        nargs='+'
+    )
+    backfill.add_argument(
+        '--processes',
+        help='Process this many logfiles at once.  The default is one per CPU.',  # noqa : E501
+        type=int
+    )
+    backfill.add_argument(
+        '--chunk-mb',
+        help=(
+            'Parse each logfile this many MB at a time.  The default is '
+            f'{PIPELINE_CHUNK_MB}.'
+        ),
+        type=float
+    )
+    backfill.add_argument(
+        '--whole-file',
+        help=(
+            'Parse each logfile all at once rather than in chunks, which '
+            'takes a whole logfile of memory per process'
+        ),
+        action='store_true'
+    )
+    backfill.add_argument(
+        '--no-resolve',
+        help='Do not resolve hostnames in the ip field',
+        action='store_true'
+    )
+    backfill.add_argument(
+        '--sketch-capacity',
+        help=(
+            'Find the top user agents and ip addresses with heavy hitter '
+            'sketches of this capacity'
+        ),
+        type=int
+    )
+    backfill.add_argument(
+        '--hourly',
+        help='Add the hourly counts of each user agent to swlogs.hourly',
+        action='store_true'
+    )
+    backfill.add_argument(
+        '--ua-histogram',
+        help='Add the counts of each raw user agent string to swlogs.ua_histogram',  # noqa : E501
+        action='store_true'
+    )
+    backfill.add_argument(
+        '--prefixes',
+        help=(
+            'Tag the ip tables with the ASN and owner of the most specific '
+            'prefix in these CSV files (prefix, asn, and owner columns)'
+        ),
+        nargs='+'
+    )
+    backfill.add_argument(
+        '--extra-fields',
+        help='Also summarize these optional fields of each log line',
+        choices=list(EXTRA_COLUMNS),
+        nargs='+',
+        default=[]
+    )
+    backfill.add_argument(
+        '--archive-dir',
+        help=(
+            'Also write the parsed log rows to the day files of a Parquet '
+            'archive in this directory (requires pyarrow)'
+        )
+    )
+
+    args = parser.parse_args()
+
+    if args.command == 'backfill':
+        with Backfill(
+            args.logfiles,
+            processes=args.processes,
+            chunked=not args.whole_file,
+            chunk_mb=args.chunk_mb,
+            resolve_hostnames=not args.no_resolve,
+            sketch_capacity=args.sketch_capacity,
+            hourly=args.hourly,
+            ua_histogram=args.ua_histogram,
+            prefixes=args.prefixes,
+            extra_fields=args.extra_fields,
+            archive_dir=args.archive_dir
+        ) as o:
+            o.run()
+        return
+
+    if args.command == 'reclassify':
+        with Reclassify(
+            start_date=args.start_date,
+            end_date=args.end_date
+        ) as o:
+            o.run()
+        return
+
+    if args.command == 'live':
+        with LiveMonitor(
+            logfile=args.logfile,
+            window=args.window,
+            top=args.top,
+            refresh=args.refresh,
+            from_start=args.from_start
+        ) as o:
+            o.run()
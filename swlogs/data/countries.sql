@@ -0,0 +1,15 @@
+-- The two letter country codes are packed into small integers in the staging
+-- table (see swlogs/extras.py), and unpacked only for the summary rows.
+insert into swlogs.countries
+(date, country, hits, bytes, errors, c429, log_date)
+select
+    date,
+    chr(65 + country / 26) || chr(65 + mod(country, 26)) as country,
+    count(*) as hits,
+    sum(bytes) as bytes,
+    sum((status > 399)::int) as errors,
+    sum((status = 429)::int) as c429,
+    %(date)s::date as log_date
+from swlogs.staging
+group by 1, 2
+;
@@ -0,0 +1,127 @@
+-- Compute the overall, bots, ip32, ip24, and ip16 tables with a single scan
+-- of the staging table.  Each grouping set produces the rows for one of the
+-- summary tables, for each day of the log rows.  Every row also records the
+-- day of the logfile as its log_date.
+--
+-- With enough work_mem, postgresql computes all of the grouping sets with
+-- hash tables in one pass.  Otherwise some of them are computed by sorting.
+with agg as materialized (
+    select
+        case
+            when grouping(ua_id) = 0 then 'bots'
+            when grouping(ip) = 0 then 'ip32'
+            when grouping(net24) = 0 then 'ip24'
+            when grouping(net16) = 0 then 'ip16'
+            else 'overall'
+        end as kind,
+        ua_id,
+        ip as ip32,
+        -- Any address of a network determines the network, the integer keys
+        -- are only turned back into networks for the rows kept.
+        min(ip) as ip_min,
+        date,
+        count(*) as hits,
+        sum(bytes) as bytes,
+        sum(error) as errors,
+        sum(c429) as c429,
+        sum(robots) as robots,
+        sum(xmlui) as xmlui,
+        sum(sitemaps) as sitemaps,
+        sum(items) as items
+    from (
+        -- Evaluate the per-row tests just once, rather than once per
+        -- grouping set.  The url categories were classified when the log
+        -- was parsed (see swlogs/urls.py), so they are just bit tests.
+        select
+            ua_id,
+            ip,
+            net24,
+            net16,
+            date,
+            bytes,
+            (status > 399)::int as error,
+            (status = 429)::int as c429,
+            ((url_flags & %(robots)s) > 0)::int as robots,
+            ((url_flags & %(xmlui)s) > 0)::int as xmlui,
+            ((url_flags & %(sitemaps)s) > 0)::int as sitemaps,
+            ((url_flags & %(items)s) > 0)::int as items
+        from swlogs.staging
+    ) as s
+    group by grouping sets (
+        (ua_id, date),
+        (ip, date),
+        (net24, date),
+        (net16, date),
+        (date)
+    )
+),
+-- The busiest keys of each table on each day.
+ranked as (
+    select
+        *,
+        row_number() over (
+            partition by kind, date order by hits desc
+        ) as rank
+    from agg
+    where kind <> 'overall'
+),
+overall_insert as (
+    insert into swlogs.overall
+    (date, bytes, hits, log_date)
+    select date, bytes, hits, %(date)s::date
+    from agg
+    where kind = 'overall'
+),
+bots_insert as (
+    insert into swlogs.bots
+    (ua, hits, error_pct, c429, robots, xmlui, sitemaps, item_pct, date, log_date)
+    select
+        ua_dim.ua,
+        hits,
+        errors::real / hits::real * 100 as error_pct,
+        c429,
+        robots > 0 as robots,
+        xmlui > 0 as xmlui,
+        sitemaps > 0 as sitemaps,
+        items::real / hits::real * 100 as item_pct,
+        date,
+        %(date)s::date as log_date
+    from ranked
+        left join swlogs.ua_dim on ua_dim.id = ranked.ua_id
+    where kind = 'bots' and rank <= 20
+),
+ip32_insert as (
+    insert into swlogs.ip32
+    (ip, hits, error_pct, date, log_date)
+    select
+        ip32,
+        hits,
+        errors::real / hits::real * 100 as error_pct,
+        date,
+        %(date)s::date
+    from ranked
+    where kind = 'ip32' and rank <= 30
+),
+ip24_insert as (
+    insert into swlogs.ip24
+    (ip, hits, error_pct, date, log_date)
+    select
+        network(set_masklen(ip_min, 24)),
+        hits,
+        errors::real / hits::real * 100 as error_pct,
+        date,
+        %(date)s::date
+    from ranked
+    where kind = 'ip24' and rank <= 30
+)
+insert into swlogs.ip16
+(ip, hits, error_pct, date, log_date)
+select
+    network(set_masklen(ip_min, 16)),
+    hits,
+    errors::real / hits::real * 100 as error_pct,
+    date,
+    %(date)s::date
+from ranked
+where kind = 'ip16' and rank <= 30
+;
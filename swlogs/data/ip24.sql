@@ -1,32 +1,31 @@
+-- The top networks of each day of the logfile.  The errors are counted in
+-- the same grouping as the hits, so the rows of hostnames that were not
+-- resolved, which have a null network, keep their errors too.
 with hits_cte as (
-    select
-        network(set_masklen(ip, 24)) as ip,
-        count(*) as hits
-    from swlogs.staging
-    group by 1
-    order by 2 desc
-    limit 30
-),
-error_cte as (
-    select
-        network(set_masklen(ip, 24)) as ip,
-        count(*) as errors
-    from swlogs.staging
-    where status > 399
-    group by 1
+    select date, ip, hits, errors
+    from (
+        select
+            net24,
+            date,
+            network(set_masklen(min(ip), 24)) as ip,
+            count(*) as hits,
+            count(*) filter (where status > 399) as errors,
+            row_number() over (
+                partition by date order by count(*) desc
+            ) as rank
+        from swlogs.staging
+        group by net24, date
+    ) as s
+    where rank <= 30
 )
 insert into swlogs.ip24
-(ip, hits, error_pct, date)
+(ip, hits, error_pct, date, log_date)
 select
-    hits_cte.ip,
-    hits_cte.hits,
-    case
-        when errors is null then 0
-        else error_cte.errors::real / hits_cte.hits::real * 100
-    end as error_pct,
-    current_date - 1
-from hits_cte left join error_cte using(ip)
-order by 2 desc
+    ip,
+    hits,
+    errors::real / hits::real * 100 as error_pct,
+    date,
+    %(date)s::date
+from hits_cte
+order by 4, 2 desc
 ;
-
-
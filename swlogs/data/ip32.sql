@@ -1,31 +1,30 @@
+-- The top ip addresses of each day of the logfile.  The errors are counted
+-- in the same grouping as the hits, so the rows of hostnames that were not
+-- resolved, which have a null ip, keep their errors too.
 with hits_cte as (
-    select
-        ip,
-        count(*) as hits
-    from swlogs.staging
-    group by ip
-    order by 2 desc
-    limit 30
-),
-error_cte as (
-    select
-        ip,
-        count(*) as errors
-    from swlogs.staging
-    where status > 399
-    group by ip
+    select ip, date, hits, errors
+    from (
+        select
+            ip,
+            date,
+            count(*) as hits,
+            count(*) filter (where status > 399) as errors,
+            row_number() over (
+                partition by date order by count(*) desc
+            ) as rank
+        from swlogs.staging
+        group by ip, date
+    ) as s
+    where rank <= 30
 )
 insert into swlogs.ip32
-(ip, hits, error_pct, date)
+(ip, hits, error_pct, date, log_date)
 select
-    hits_cte.ip,
-    hits_cte.hits,
-    case
-        when errors is null then 0
-        else error_cte.errors::real / hits_cte.hits::real * 100
-    end as error_pct,
-    current_date - 1
-from hits_cte left join error_cte using(ip)
-order by 2 desc
+    ip,
+    hits,
+    errors::real / hits::real * 100 as error_pct,
+    date,
+    %(date)s::date
+from hits_cte
+order by 4, 2 desc
 ;
-
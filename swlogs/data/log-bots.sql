@@ -1,64 +1,77 @@
+-- The top user agents of each day of the logfile.
 with hits_cte as (
-    select 
-        useragent as ua,
-        count(*) as hits
-    from swlogs.staging
-    group by 1
-    order by hits desc 
-    limit 20
+    select ua_id, date, hits
+    from (
+        select
+            ua_id,
+            date,
+            count(*) as hits,
+            row_number() over (
+                partition by date order by count(*) desc
+            ) as rank
+        from swlogs.staging
+        group by ua_id, date
+    ) as s
+    where rank <= 20
 ),
 error_count_cte as (
     select 
-        useragent as ua,
+        ua_id,
+        date,
         count(*) as errors
     from swlogs.staging
     where status > 399
-    group by 1
+    group by ua_id, date
 ),
 c429_cte as (
     select 
-        useragent as ua,
+        ua_id,
+        date,
         count(*) as hits
     from swlogs.staging
     where status = 429
-    group by 1
+    group by ua_id, date
 ),
 robots_cte as (
     select 
-        useragent as ua,
+        ua_id,
+        date,
         count(*) as hits
     from swlogs.staging
-    where url ~ '/robots.txt'
-    group by 1
+    where (url_flags & %(robots)s) > 0
+    group by ua_id, date
 ),
 xmlui_cte as (
     select 
-        useragent as ua,
+        ua_id,
+        date,
         count(*) as hits
     from swlogs.staging
-    where url ~ '/xmlui'
-    group by 1
+    where (url_flags & %(xmlui)s) > 0
+    group by ua_id, date
 ),
 sitemaps_cte as (
     select 
-        useragent as ua,
+        ua_id,
+        date,
         count(*) as hits
     from swlogs.staging
-    where url ~ '/sitemap'
-    group by 1
+    where (url_flags & %(sitemaps)s) > 0
+    group by ua_id, date
 ),
 item_pct_cte as (
     select 
-        useragent as ua,
+        ua_id,
+        date,
         count(*) as hits
     from swlogs.staging
-    where url ~ '^/items/\w{8}-\w{4}-\w{4}-\w{4}-\w{12}$'
-    group by 1
+    where (url_flags & %(items)s) > 0
+    group by ua_id, date
 )
 insert into swlogs.bots
-(ua, hits, error_pct, c429, robots, xmlui, sitemaps, item_pct, date)
+(ua, hits, error_pct, c429, robots, xmlui, sitemaps, item_pct, date, log_date)
 select
-    hits_cte.ua as ua,
+    ua_dim.ua,
     hits_cte.hits,
     case
 	when error_count_cte.errors is null then 0
@@ -84,13 +97,15 @@ select
 	when item_pct_cte.hits is null then 0
         else item_pct_cte.hits::real / hits_cte.hits::real * 100
     end as item_pct,
-    current_date - 1 as date
+    hits_cte.date,
+    %(date)s::date as log_date
 from hits_cte
-    left join error_count_cte using(ua)
-    left join c429_cte using(ua)
-    left join robots_cte using(ua)
-    left join xmlui_cte using(ua)
-    left join sitemaps_cte using(ua)
-    left join item_pct_cte using(ua)
-order by hits desc
+    left join swlogs.ua_dim on ua_dim.id = hits_cte.ua_id
+    left join error_count_cte using(ua_id, date)
+    left join c429_cte using(ua_id, date)
+    left join robots_cte using(ua_id, date)
+    left join xmlui_cte using(ua_id, date)
+    left join sitemaps_cte using(ua_id, date)
+    left join item_pct_cte using(ua_id, date)
+order by hits_cte.date, hits desc
 ;
@@ -0,0 +1,10 @@
+insert into swlogs.overall
+(date, bytes, hits, log_date)
+select
+    date,
+    sum(bytes) as bytes,
+    count(*) as hits,
+    %(date)s::date as log_date
+from swlogs.staging
+group by 1
+;
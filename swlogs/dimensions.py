@@ -0,0 +1,91 @@
+"""
+Dictionary encoding of the user agent and url columns of the log rows.
+"""
+
+# standard library imports
+
+# 3rd party library imports
+import pandas as pd
+import psycopg
+
+# local imports
+
+
+class Dimension(object):
+    """
+    Map the distinct values of a text column to the integer surrogate keys
+    of a dimension table such as swlogs.ua_dim, adding the values that are
+    not there yet.  The keys are cached, so each distinct value goes to the
+    database only once per run, and the log rows only carry the keys.
+
+    The dimension table is updated on its own autocommitted connection, so
+    the cached keys always refer to committed rows whether or not the load
+    that first saw a value is rolled back.
+
+    Attributes
+    ----------
+    connstr : str
+        The postgresql connection string.
+    table, column : str
+        The dimension table and its text column.  The surrogate key column
+        is "id".
+    ids : dict
+        Caches the key of each value seen so far.
+    conn : database connection or None
+        The autocommitted connection, opened on the first lookup.
+    """
+
+    def __init__(self, connstr, table, column):
+        self.connstr = connstr
+        self.table = table
+        self.column = column
+        self.ids = {}
+        self.conn = None
+
+    def lookup(self, values):
+        """
+        Fetch the keys of values not in the cache, adding the values that are
+        not in the dimension table yet.
+        """
+        if self.conn is None:
+            self.conn = psycopg.connect(self.connstr, autocommit=True)
+
+        # The unique index is on md5(value), as a long value may not fit in
+        # a btree index entry.
+        sql = f"""
+        insert into {self.table} ({self.column})
+        select distinct v from unnest(%(values)s::text[]) as v
+        on conflict (md5({self.column})) do nothing
+        """
+        self.conn.execute(sql, {'values': values})
+
+        sql = f"""
+        select d.id, d.{self.column}
+        from unnest(%(values)s::text[]) as v
+            join {self.table} as d
+            on md5(d.{self.column}) = md5(v) and d.{self.column} = v
+        """
+        cursor = self.conn.execute(sql, {'values': values})
+        self.ids.update((value, id) for id, value in cursor.fetchall())
+
+    def encode(self, s):
+        """
+        Map a series of values to their keys.  Each distinct value is looked
+        up only once.
+
+        Returns
+        -------
+        pandas.Series
+            Nullable Int32 keys, missing where the value is missing.
+        """
+        codes, uniques = pd.factorize(s.to_numpy())
+
+        missing = [x for x in uniques if x not in self.ids]
+        if len(missing) > 0:
+            self.lookup(missing)
+
+        keys = pd.array(
+            [self.ids[x] for x in uniques] + [None], dtype='Int32'
+        )
+        # Missing values have a code of -1, which picks up the trailing None.
+        return pd.Series(keys[codes], index=s.index, name=s.name)
@@ -0,0 +1,78 @@
+"""
+The optional fields of a log line.  The logfile regex captures them on every
+line, but they are only kept, and loaded into the staging table, when they
+are asked for.
+"""
+
+# standard library imports
+
+# 3rd party library imports
+import pandas as pd
+
+# local imports
+
+# Each optional field, named as the logfile regex group that captures it, and
+# the postgresql type of its staging column.
+EXTRA_COLUMNS = {
+    'country': 'int2',
+    'referer': 'text',
+    'query_string': 'text',
+    'content_type': 'text',
+    'remote_port': 'int4',
+}
+
+
+def country_code(country):
+    """
+    Pack a two letter country code into a small integer, e.g. "AA" is 0 and
+    "US" is 538.  Anything else, such as the "-" of an unknown country, is
+    None.  The packing is undone in SQL with
+
+        chr(65 + country / 26) || chr(65 + country % 26)
+    """
+    if (
+        not isinstance(country, str)
+        or len(country) != 2
+        or not ('A' <= country[0] <= 'Z' and 'A' <= country[1] <= 'Z')
+    ):
+        return None
+    return (ord(country[0]) - 65) * 26 + (ord(country[1]) - 65)
+
+
+def country_name(code):
+    """
+    Undo country_code.
+    """
+    if pd.isna(code):
+        return None
+    return chr(65 + int(code) // 26) + chr(65 + int(code) % 26)
+
+
+def encode_countries(s):
+    """
+    Pack a series of country codes into small integers.  There are only a
+    couple of hundred countries, so each distinct value is packed only once.
+
+    Returns
+    -------
+    pandas.Series
+        Nullable Int16 codes.
+    """
+    codes, uniques = pd.factorize(s.to_numpy())
+    packed = pd.array(
+        [country_code(x) for x in uniques] + [None], dtype='Int16'
+    )
+    # Missing values have a code of -1, which picks up the trailing None.
+    return pd.Series(packed[codes], index=s.index, name=s.name)
+
+
+def convert_extras(df):
+    """
+    Convert the optional fields present in a dataframe of parsed log records
+    to the types of their staging columns.
+    """
+    if 'country' in df.columns:
+        df['country'] = encode_countries(df['country'])
+    if 'remote_port' in df.columns:
+        df['remote_port'] = pd.to_numeric(df['remote_port']).astype('Int32')
+    return df
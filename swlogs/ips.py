@@ -0,0 +1,139 @@
+"""
+Integer keys of the /24 and /16 networks of client ip addresses.  They are
+computed once, when the log is parsed, with vectorized bit masks, so that the
+network summaries group by plain integers rather than by calling
+network(set_masklen(ip, N)) on every row.
+"""
+
+# standard library imports
+import ipaddress
+
+# 3rd party library imports
+import numpy as np
+import pandas as pd
+
+# local imports
+
+# The network masks that are computed at parse time, and the staging column
+# that holds the key of each.
+NETWORK_COLUMNS = {
+    24: 'net24',
+    16: 'net16',
+}
+
+IPV4_REGEX = r'\d{1,3}\.\d{1,3}\.\d{1,3}\.\d{1,3}'
+
+# The keys of IPv6 networks are offset past every IPv4 address so that the
+# two families can never collide.
+IPV6_OFFSET = 2**32
+
+
+def parse_ips(uniques):
+    """
+    Convert ip address strings to integers.  The dotted quads of IPv4
+    addresses are converted all at once.  IPv6 addresses are rare, so they
+    are converted one at a time, and only their upper 64 bits are kept,
+    which is all that any network up to a /64 needs.
+
+    Parameters
+    ----------
+    uniques : numpy array of str
+        Distinct ip addresses.
+
+    Returns
+    -------
+    numpy arrays
+        The int64 IPv4 addresses, the uint64 upper halves of the IPv6
+        addresses, and boolean masks of which entries are valid IPv4 and
+        valid IPv6 addresses.
+    """
+    s = pd.Series(uniques, dtype=object)
+
+    v4 = np.zeros(len(s), dtype=np.int64)
+    matches = s.str.fullmatch(IPV4_REGEX).fillna(False)
+    is_v4 = matches.to_numpy(bool, copy=True)
+    if is_v4.any():
+        octets = s[is_v4].str.split('.', expand=True).astype(np.int64)
+        octets = octets.to_numpy()
+        v4[is_v4] = (
+            (octets[:, 0] << 24)
+            | (octets[:, 1] << 16)
+            | (octets[:, 2] << 8)
+            | octets[:, 3]
+        )
+        is_v4[is_v4] = (octets <= 255).all(axis=1)
+
+    v6 = np.zeros(len(s), dtype=np.uint64)
+    matches = s.str.contains(':', regex=False).fillna(False)
+    is_v6 = matches.to_numpy(bool, copy=True)
+    for i in np.flatnonzero(is_v6):
+        try:
+            v6[i] = int(ipaddress.IPv6Address(s[i])) >> 64
+        except ValueError:
+            is_v6[i] = False
+
+    return v4, v6, is_v4, is_v6
+
+
+def network_keys(s, masklens=tuple(NETWORK_COLUMNS)):
+    """
+    Compute the integer key of the network of each ip address for each mask
+    length.  Each distinct address is parsed only once.  IPv4 networks are
+    keyed by their network address, IPv6 networks by their prefix plus
+    IPV6_OFFSET.  Anything that is not an ip address gets a missing key.
+
+    Parameters
+    ----------
+    s : pandas.Series
+        ip address strings
+    masklens : iterable of int
+        No more than 32.
+
+    Returns
+    -------
+    dict
+        Maps each mask length to a nullable Int64 series of keys.
+    """
+    codes, uniques = pd.factorize(s.to_numpy())
+    v4, v6, is_v4, is_v6 = parse_ips(uniques)
+
+    # Missing addresses have a code of -1, which picks up a trailing invalid
+    # entry.
+    valid = np.append(is_v4 | is_v6, False)[codes]
+
+    keys = {}
+    for masklen in masklens:
+        mask = (2**32 - 1) ^ (2**(32 - masklen) - 1)
+        k = np.where(
+            is_v4,
+            v4 & mask,
+            IPV6_OFFSET + (v6 >> np.uint64(64 - masklen)).astype(np.int64)
+        )
+        k = np.append(k, 0)[codes]
+        keys[masklen] = pd.Series(
+            pd.arrays.IntegerArray(k, ~valid), index=s.index
+        )
+
+    return keys
+
+
+def network_from_key(key, masklen):
+    """
+    The network, e.g. "10.1.2.0/24", that network_keys gave a key to.
+    """
+    key = int(key)
+    if key < IPV6_OFFSET:
+        return str(ipaddress.IPv4Network((key, masklen)))
+    prefix = (key - IPV6_OFFSET) << (128 - masklen)
+    return str(ipaddress.IPv6Network((prefix, masklen)))
+
+
+def ip_prefix(ip, masklen):
+    """
+    Python equivalent of postgresql's network(set_masklen(ip, masklen)).
+    Anything that is not an ip address becomes None.
+    """
+    try:
+        return str(ipaddress.ip_network(f'{ip}/{masklen}', strict=False))
+    except ValueError:
+        return None
@@ -0,0 +1,292 @@
+"""
+Watch the traffic in a live access log.
+"""
+
+# standard library imports
+import collections
+import datetime as dt
+import functools
+import os
+import re
+import time
+
+# 3rd party library imports
+
+# local imports
+from .access_logs import LOGFILE_REGEX, apply_regexes, match_line
+from .ips import ip_prefix
+
+NETWORK_CACHE_SIZE = 2**16
+MINUTE_CACHE_SIZE = 2**10
+
+
+@functools.lru_cache(maxsize=NETWORK_CACHE_SIZE)
+def network24(ip):
+    """
+    The /24 network of an ip address.  Hostnames are not resolved, they are
+    counted as they are.
+    """
+    return ip_prefix(ip, 24) or ip
+
+
+@functools.lru_cache(maxsize=MINUTE_CACHE_SIZE)
+def _parse_minute(minute):
+    return dt.datetime.strptime(minute, '%d/%b/%Y:%H:%M %z')
+
+
+def parse_minute(timestamp):
+    """
+    The minute that a log timestamp falls in, e.g. "07/Nov/2024:00:05:17
+    -0700" falls in 2024-11-07 00:05-07:00.  Each minute is parsed only
+    once.
+    """
+    return _parse_minute(f'{timestamp[:17]} {timestamp[21:]}')
+
+
+def bound(counter, max_keys):
+    """
+    Keep a counter from growing past max_keys by discarding all but the most
+    common half of its keys.  The heavy hitters that the live view shows
+    are kept, only the long tail is lost.
+    """
+    if len(counter) > max_keys:
+        top = counter.most_common(max_keys // 2)
+        counter.clear()
+        counter.update(dict(top))
+
+
+class MinuteCounts(object):
+    """
+    The traffic counts for a single minute of the log.
+
+    Attributes
+    ----------
+    hits, c429 : int
+        The number of requests, and how many of them got a 429 response.
+    useragents, networks : collections.Counter
+        Hits by classified user agent and by /24 network.
+    useragents_429, networks_429 : collections.Counter
+        429 responses by classified user agent and by /24 network.
+    """
+
+    def __init__(self):
+        self.hits = 0
+        self.c429 = 0
+        self.useragents = collections.Counter()
+        self.networks = collections.Counter()
+        self.useragents_429 = collections.Counter()
+        self.networks_429 = collections.Counter()
+
+    def counters(self):
+        return [
+            self.useragents,
+            self.networks,
+            self.useragents_429,
+            self.networks_429,
+        ]
+
+
+class LiveMonitor(object):
+    """
+    Follow an access log and keep rolling per-minute counts of the top user
+    agents, /24 networks, and 429 responses over the last few minutes.  Only
+    the minutes in the window are kept, and each of their counters is
+    bounded, so memory use does not grow however long this runs or however
+    many distinct clients there are.
+
+    Attributes
+    ----------
+    logfile : path
+        The live access log.
+    window : int
+        Keep the minutes within this many minutes of the newest one.  Lines
+        that arrive late for an older minute are dropped.
+    top : int
+        Show this many of the top user agents and networks.
+    refresh : float
+        Seconds between refreshes of the view.
+    max_keys : int
+        The most keys that any one counter holds.
+    minutes : dict
+        Maps each minute in the window (a timezone-aware datetime) to its
+        MinuteCounts.
+    latest : datetime.datetime or None
+        The newest minute seen so far.
+    fp : file object
+        The open logfile.
+    inode : int
+        The inode of the open logfile, used to detect rotation.
+    """
+
+    def __init__(
+        self,
+        logfile='/var/log/nginx/access.log',
+        window=5,
+        top=10,
+        refresh=2.0,
+        max_keys=10000,
+        from_start=False
+    ):
+        self.logfile = logfile
+        self.window = window
+        self.top = top
+        self.refresh = refresh
+        self.max_keys = max_keys
+
+        self.regex = re.compile(LOGFILE_REGEX, re.X)
+        self.minutes = {}
+        self.latest = None
+        self.partial = ''
+
+        self.open_logfile(from_start=from_start)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.fp.close()
+
+    def open_logfile(self, from_start=True):
+        """
+        Open the logfile, positioned at the end unless from_start is True.
+        """
+        self.fp = open(self.logfile)
+        if not from_start:
+            self.fp.seek(0, 2)
+        self.inode = os.fstat(self.fp.fileno()).st_ino
+
+    def read_lines(self):
+        """
+        Read the complete lines appended to the logfile since the last call.
+        If the logfile was rotated or truncated, the rest of the old file is
+        read and the new one is reopened from the start.
+
+        Returns
+        -------
+        list of str
+        """
+        lines = self.read_available()
+
+        try:
+            stat = os.stat(self.logfile)
+        except FileNotFoundError:
+            # The logfile is between being rotated and recreated.
+            return lines
+
+        if stat.st_ino != self.inode or stat.st_size < self.fp.tell():
+            self.fp.close()
+            self.partial = ''
+            self.open_logfile(from_start=True)
+            lines.extend(self.read_available())
+
+        return lines
+
+    def read_available(self):
+        """
+        Read whatever is in the open logfile past the current position,
+        holding back a trailing partial line until it is complete.
+        """
+        text = self.partial + self.fp.read()
+        lines = text.splitlines(keepends=True)
+        if len(lines) > 0 and not lines[-1].endswith('\n'):
+            self.partial = lines.pop()
+        else:
+            self.partial = ''
+        return lines
+
+    def update(self, line):
+        """
+        Count a single log line.
+        """
+        if (item := match_line(self.regex, None, line)) is None:
+            return
+
+        ip, timestamp, status, ua, _, _ = item
+
+        minute = parse_minute(timestamp)
+        if self.latest is None or minute > self.latest:
+            self.latest = minute
+            oldest = minute - dt.timedelta(minutes=self.window - 1)
+            for key in [key for key in self.minutes if key < oldest]:
+                del self.minutes[key]
+        elif minute <= self.latest - dt.timedelta(minutes=self.window):
+            # Too late for the window.
+            return
+
+        if (counts := self.minutes.get(minute)) is None:
+            counts = self.minutes[minute] = MinuteCounts()
+
+        ua = apply_regexes(ua)
+        network = network24(ip)
+
+        counts.hits += 1
+        counts.useragents[ua] += 1
+        counts.networks[network] += 1
+        if status == '429':
+            counts.c429 += 1
+            counts.useragents_429[ua] += 1
+            counts.networks_429[network] += 1
+
+        for counter in counts.counters():
+            bound(counter, self.max_keys)
+
+    def totals(self):
+        """
+        Sum the counts over the minutes in the window.
+
+        Returns
+        -------
+        MinuteCounts
+        """
+        totals = MinuteCounts()
+        for counts in self.minutes.values():
+            totals.hits += counts.hits
+            totals.c429 += counts.c429
+            for total, counter in zip(totals.counters(), counts.counters()):
+                total.update(counter)
+        return totals
+
+    def render(self):
+        """
+        Format the current view as text.
+        """
+        totals = self.totals()
+
+        lines = [
+            f'{self.logfile}:  last {len(self.minutes)} minute(s), '
+            f'{totals.hits:,} hits, {totals.c429:,} 429s',
+            '',
+            f'{"minute":<24} {"hits":>10} {"429s":>10}',
+        ]
+        for minute, counts in sorted(self.minutes.items()):
+            label = minute.strftime('%d/%b/%Y:%H:%M %z')
+            lines.append(f'{label:<24} {counts.hits:>10,} {counts.c429:>10,}')  # noqa : E501
+
+        tables = [
+            ('user agent', totals.useragents, totals.useragents_429),
+            ('/24 network', totals.networks, totals.networks_429),
+        ]
+        for label, hits, c429 in tables:
+            lines.extend(['', f'{label:<60} {"hits":>10} {"429s":>10}'])
+            for key, n in hits.most_common(self.top):
+                lines.append(f'{key[:60]:<60} {n:>10,} {c429[key]:>10,}')
+
+        lines.extend(['', f'{"/24 network, most 429s":<60} {"429s":>10}'])
+        for key, n in totals.networks_429.most_common(self.top):
+            lines.append(f'{key[:60]:<60} {n:>10,}')
+
+        return '\n'.join(lines)
+
+    def run(self):
+        """
+        Follow the logfile, refreshing the view until interrupted.
+        """
+        try:
+            while True:
+                for line in self.read_lines():
+                    self.update(line)
+                # Clear the terminal and redraw.
+                print('\x1b[H\x1b[2J' + self.render(), flush=True)
+                time.sleep(self.refresh)
+        except KeyboardInterrupt:
+            pass
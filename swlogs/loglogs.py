@@ -1,13 +1,90 @@
 # standard library imports
+import datetime as dt
 import importlib.resources as ir
 import io
+import ipaddress
 import logging
 import time
+from concurrent.futures import ThreadPoolExecutor
 
 # 3rd party library imports
+import numpy as np
+import pandas as pd
+import psycopg
 
 # local imports
 from .access_logs import AccessLog
+from .aggregate import (
+    DailyAggregator, DistinctCounts, HourlyRollup, UAHistogram
+)
+from .archive import ParquetArchive
+from .dimensions import Dimension
+from .extras import EXTRA_COLUMNS
+from .urls import URL_FLAGS
+
+# The staging table columns that are always loaded and their postgresql types,
+# in the order that the dataframe columns are copied.  Any optional fields
+# asked for (see swlogs/extras.py) follow these.
+STAGING_COLUMNS = {
+    'ip': 'cidr',
+    'timestamp': 'timestamptz',
+    'status': 'int4',
+    'ua_id': 'int4',
+    'url_id': 'int4',
+    'bytes': 'int4',
+    'date': 'date',
+    'url_flags': 'int2',
+    'net24': 'int8',
+    'net16': 'int8',
+}
+
+# The ways that the daily summary tables can be computed.
+SUMMARY_METHODS = ('single-scan', 'serial', 'concurrent', 'in-process')
+
+# The tables whose rows from a logfile are replaced when the logfile is
+# summarized again, and the column holding the day of the logfile.  The rows
+# of most of them are dated by the log rows, so a day split between two
+# logfiles has rows from each, as do the hours around midnight in the hourly
+# rollup.  Only the tables that a run writes are replaced (see
+# LogLogs.summary_tables).
+SUMMARY_TABLES = {
+    'overall': 'log_date',
+    'bots': 'log_date',
+    'ip32': 'log_date',
+    'ip24': 'log_date',
+    'ip16': 'log_date',
+    'countries': 'log_date',
+    'bots_distinct': 'date',
+    'ua_histogram': 'log_date',
+    'hourly': 'log_date',
+}
+
+
+def ip_networks(s):
+    """
+    Convert a series of ip address strings to ipaddress network objects, for
+    binary COPY into a cidr column.  Each distinct address is converted only
+    once.  Anything that is not an address becomes None.
+    """
+    def convert(x):
+        try:
+            return ipaddress.ip_network(x)
+        except ValueError:
+            return None
+
+    codes, uniques = pd.factorize(s.to_numpy())
+    networks = np.array([convert(x) for x in uniques] + [None], dtype=object)
+
+    # Missing values have a code of -1, which picks up the trailing None.
+    return networks[codes].tolist()
+
+
+def nullable_ints(s):
+    """
+    Convert a nullable integer series to a list for binary COPY, with None
+    rather than pd.NA for the missing values.
+    """
+    return s.astype(object).where(s.notna(), None).tolist()
 
 
 class LogLogs(AccessLog):
@@ -21,113 +98,618 @@ class LogLogs(AccessLog):
     views : bool
         If True, compute views instead of hits.
     conn : database connection
+    chunksize, chunk_mb : int, float, or None
+        If either is not None, stream the logfile into the database in chunks
+        bounded by this many rows or megabytes instead of all at once.
+    workers : int
+        Parse an uncompressed logfile with this many processes.
+    pipeline : bool
+        If True, read the logfile, parse and classify it, and copy it into
+        the staging table (or summarize it in process) on separate threads
+        at the same time, a chunk at a time.
+    resolve_hostnames : bool
+        If False, do not try to resolve ip fields that are hostnames.
+    copy_format : str
+        Either 'csv' or 'binary'.  With 'binary', the log rows are written
+        with typed binary COPY instead of being serialized to CSV text.
+    summary : str
+        How the daily summary tables are computed from the staging table.
+        With 'single-scan', all of them come from one pass over staging.
+        With 'serial', each table is computed by its own query.  With
+        'concurrent', those queries are run at the same time.  With
+        'in-process', the tables are computed in python while the logfile is
+        parsed and the staging table is not used at all.
+    keep_raw : bool
+        If True, keep the raw log rows in the day partitions of swlogs.hits
+        instead of discarding them with the next load of the staging table.
+    retention_days : int or None
+        If not None, drop the partitions of swlogs.hits older than this many
+        days.
+    sketch_capacity : int or None
+        With the 'in-process' summary, keep the top user agents and ip
+        addresses in heavy hitter sketches of this capacity instead of
+        counting every distinct key exactly.
+    raw_date : datetime.date or None
+        If not None, compute the summary tables from the raw rows kept in
+        swlogs.hits for this day instead of from the logfile.
+    distinct : DistinctCounts or None
+        If not None, sketches of the distinct ip addresses and item urls of
+        each user agent are computed while parsing and stored alongside the
+        bots rows.
+    hourly : HourlyRollup or None
+        If not None, the hourly counts of each user agent are computed while
+        parsing and added to swlogs.hourly.
+    ua_histogram : UAHistogram or None
+        If not None, the counts of each raw user agent string are computed
+        while parsing and added to swlogs.ua_histogram, so that the bots
+        table can later be rebuilt with new user agent rules.
+    prefixes : path, list of paths, or None
+        If not None, CSV files of network prefixes used to tag the rows of
+        the ip tables with their ASN and owner.
+    extra_fields : tuple of str
+        Optional fields of each log line to load into the staging table
+        along with the usual ones.  With 'country', the countries table is
+        computed too.
+    ua_dim, url_dim : Dimension
+        Map the classified user agents and the urls to the integer keys that
+        are loaded into the staging table in their place.
+    archive : ParquetArchive or None
+        If not None, the parsed and classified log rows are also written to
+        the day files of this Parquet archive.
+    log_date : datetime.date or None
+        The day of the logfile, recorded with each of its summary rows.  It
+        is the date that most of the log rows fall on, found once they are
+        loaded.  The summary rows themselves are computed for each date of
+        the log rows.
     """
     def __init__(
         self,
         logfile='/var/log/nginx/access.log.1',
-        views=False
+        views=False,
+        chunksize=None,
+        chunk_mb=None,
+        workers=1,
+        resolve_hostnames=True,
+        copy_format='csv',
+        summary='single-scan',
+        keep_raw=False,
+        retention_days=None,
+        raw_date=None,
+        sketch_capacity=None,
+        distinct_counts=False,
+        hourly=False,
+        prefixes=None,
+        extra_fields=(),
+        archive_dir=None,
+        ua_histogram=False,
+        pipeline=False
     ):
-        super().__init__(logfile)
+        super().__init__(
+            logfile,
+            chunksize=chunksize,
+            chunk_mb=chunk_mb,
+            workers=workers,
+            resolve_hostnames=resolve_hostnames,
+            prefixes=prefixes,
+            extra_fields=extra_fields,
+            pipeline=pipeline
+        )
 
-    def log_ip16(self):
+        if copy_format not in ('csv', 'binary'):
+            msg = f'Unknown COPY format {copy_format}'
+            raise ValueError(msg)
+        self.copy_format = copy_format
+
+        if summary not in SUMMARY_METHODS:
+            msg = f'Unknown summary method {summary}'
+            raise ValueError(msg)
+        self.summary = summary
+
+        if keep_raw and summary == 'in-process':
+            msg = 'Keeping the raw log rows requires the staging table'
+            raise ValueError(msg)
+        self.keep_raw = keep_raw
+        self.retention_days = retention_days
+
+        if raw_date is not None and summary == 'in-process':
+            msg = 'Summarizing the raw log rows requires the staging table'
+            raise ValueError(msg)
+        if raw_date is not None and pipeline:
+            msg = 'The pipeline parses the logfile'
+            raise ValueError(msg)
+        self.raw_date = raw_date
+        self.sketch_capacity = sketch_capacity
+
+        if distinct_counts and raw_date is not None:
+            msg = 'Distinct counts are computed while parsing the logfile'
+            raise ValueError(msg)
+        self.distinct = DistinctCounts() if distinct_counts else None
+
+        if hourly and raw_date is not None:
+            msg = 'The hourly rollup is computed while parsing the logfile'
+            raise ValueError(msg)
+        self.hourly = HourlyRollup() if hourly else None
+
+        if ua_histogram and raw_date is not None:
+            msg = (
+                'The user agent histogram is computed while parsing the '
+                'logfile'
+            )
+            raise ValueError(msg)
+        self.ua_histogram = UAHistogram() if ua_histogram else None
+
+        if archive_dir is not None and raw_date is not None:
+            msg = 'The parquet archive is written while parsing the logfile'
+            raise ValueError(msg)
+        if archive_dir is None:
+            self.archive = None
+        else:
+            self.archive = ParquetArchive(archive_dir)
+
+        self.ua_dim = Dimension(self.connstr, 'swlogs.ua_dim', 'ua')
+        self.url_dim = Dimension(self.connstr, 'swlogs.url_dim', 'url')
+
+        self.log_date = None
+
+    def execute_sql_file(self, filename, label, conn=None):
+        """
+        Run one of the SQL files in swlogs/data and commit.  The url category
+        flags and the day of the logfile are passed as query parameters.
+
+        Parameters
+        ----------
+        filename : str
+            The SQL file.
+        label : str
+            Identifies the statement in the log messages.
+        conn : database connection or None
+            Run the statement on this connection instead of self.conn.
+
+        Returns
+        -------
+        float
+            How many seconds the statement took.
+        """
+        if conn is None:
+            conn = self.conn
 
-        logging.warning('Starting log_ip16')
+        logging.warning(f'Starting {label}')
         t0 = time.time()
 
-        sql = ir.files('swlogs.data').joinpath('ip16.sql').read_text()
+        sql = ir.files('swlogs.data').joinpath(filename).read_text()
 
-        with self.conn.cursor() as cursor:
-            cursor.execute(sql)
+        with conn.cursor() as cursor:
+            cursor.execute(sql, {**URL_FLAGS, 'date': self.log_date})
 
-        self.conn.commit()
+        conn.commit()
 
         t1 = time.time()
-        logging.warning(f'Ending log_ip16, took {(t1 - t0):.1f} seconds')
+        logging.warning(f'Ending {label}, took {(t1 - t0):.1f} seconds')
 
-    def log_ip24(self):
+        return t1 - t0
 
-        logging.warning('Starting log_ip24')
+    def log_summary(self):
+        """
+        Compute all of the daily summary tables in a single scan of the
+        staging table.
+        """
+        self.execute_sql_file('daily-summary.sql', 'log_summary')
+
+    def log_in_process(self):
+        """
+        Compute the daily summary tables while parsing the logfile, inserting
+        only the summary rows.  The raw log rows never reach the database.
+        """
+        logging.warning('Starting log_in_process')
         t0 = time.time()
 
-        sql = ir.files('swlogs.data').joinpath('ip24.sql').read_text()
+        agg = DailyAggregator(capacity=self.sketch_capacity)
+        if self.chunksize is None and self.chunk_mb is None:
+            super().run()
+            agg.update(self.df)
+            self.update_rollups(self.df)
+        else:
+            for df in self.iter_chunks():
+                agg.update(df)
+                self.update_rollups(df)
+
+        t1 = time.time()
+        logging.warning(f'log_in_process:  took {(t1 - t0):.1f} seconds to aggregate')  # noqa : E501
+
+        self.log_date = agg.log_date()
+        if self.log_date is None:
+            logging.warning('log_in_process:  no log rows to summarize')
+            return
+        self.clear_summary()
 
         with self.conn.cursor() as cursor:
-            cursor.execute(sql)
+            for table, df in agg.tables().items():
+                sql = (
+                    f'insert into swlogs.{table} ({", ".join(df.columns)}) '
+                    f'values ({", ".join(["%s"] * df.shape[1])})'
+                )
+                # Python objects rather than numpy scalars, with None for
+                # missing values.
+                df = df.astype(object)
+                rows = df.where(df.notna(), None).to_numpy().tolist()
+                cursor.executemany(sql, rows)
 
         self.conn.commit()
 
-        t1 = time.time()
-        logging.warning(f'Ending log_ip24, took {(t1 - t0):.1f} seconds')
-
-    def log_ip32(self):
+        t2 = time.time()
+        logging.warning(f'Ending log_in_process, took {(t2 - t0):.1f} seconds')
 
-        logging.warning('Starting log_ip32')
+    def update_rollups(self, df):
+        """
+        Add a chunk of classified log rows to the distinct count sketches,
+        the hourly rollup, the user agent histogram, and the parquet
+        archive, if they are being kept.
+        """
+        if self.distinct is not None:
+            self.distinct.update(df)
+        if self.hourly is not None:
+            self.hourly.update(df)
+        if self.ua_histogram is not None:
+            self.ua_histogram.update(df)
+        if self.archive is not None:
+            self.archive.write(df)
+
+    def log_distinct(self):
+        """
+        Store the sketches of the distinct ip addresses and item urls of the
+        logfile's top user agents in swlogs.bots_distinct, under the day of
+        the logfile.
+        """
+        logging.warning('Starting log_distinct')
         t0 = time.time()
 
-        sql = ir.files('swlogs.data').joinpath('ip32.sql').read_text()
-
         with self.conn.cursor() as cursor:
-            cursor.execute(sql)
+
+            sql = """
+            select distinct ua from swlogs.bots where log_date = %(date)s
+            """
+            cursor.execute(sql, {'date': self.log_date})
+            useragents = [row[0] for row in cursor.fetchall()]
+
+            ips = self.distinct.sketches('ips', useragents)
+            items = self.distinct.sketches('items', useragents)
+
+            sql = """
+            insert into swlogs.bots_distinct
+            (ua, date, ip_hll, item_hll)
+            values (%(ua)s, %(date)s, %(ip_hll)s, %(item_hll)s)
+            on conflict (ua, date) do update set
+                ip_hll = excluded.ip_hll,
+                item_hll = excluded.item_hll
+            """
+            params = [
+                {
+                    'ua': ua,
+                    'date': self.log_date,
+                    'ip_hll': ips[ua].to_bytes(),
+                    'item_hll': items[ua].to_bytes(),
+                }
+                for ua in useragents
+            ]
+            cursor.executemany(sql, params)
 
         self.conn.commit()
 
         t1 = time.time()
-        logging.warning(f'Ending log_ip32, took {(t1 - t0):.1f} seconds')
+        logging.warning(f'Ending log_distinct, took {(t1 - t0):.1f} seconds')
 
-    def log_bots(self):
+    def log_hourly(self):
         """
-        Summarize the top bot information.
+        Add the hourly counts of each user agent to swlogs.hourly.  The first
+        and last hours of a logfile are usually split with the neighboring
+        logfiles, so the rows are stamped with the day of the logfile and the
+        reports add up the rows of each hour.
         """
-        logging.warning('Starting log_bots')
+        logging.warning('Starting log_hourly')
         t0 = time.time()
 
-        sql = ir.files('swlogs.data').joinpath('log-bots.sql').read_text()
+        df = self.hourly.rows()
+        cols = ['ua', 'hour', 'hits', 'bytes', 'errors', 'c429']
 
         with self.conn.cursor() as cursor:
+
+            sql = """
+            create temporary table hourly_load (
+                ua        TEXT,
+                hour      timestamp with time zone,
+                hits      INTEGER,
+                bytes     bigint,
+                errors    INTEGER,
+                c429      INTEGER
+            )
+            on commit drop
+            """
             cursor.execute(sql)
 
+            sql = f'copy hourly_load ({", ".join(cols)}) from stdin'
+            with cursor.copy(sql) as copy:
+                rows = zip(
+                    df['ua'].tolist(),
+                    df['hour'].tolist(),
+                    df['hits'].tolist(),
+                    df['bytes'].tolist(),
+                    df['errors'].tolist(),
+                    df['c429'].tolist(),
+                )
+                for row in rows:
+                    copy.write_row(row)
+
+            sql = f"""
+            insert into swlogs.hourly (log_date, {", ".join(cols)})
+            select %(date)s::date, {", ".join(cols)}
+            from hourly_load
+            on conflict (ua, hour, log_date) do update set
+                hits = hourly.hits + excluded.hits,
+                bytes = hourly.bytes + excluded.bytes,
+                errors = hourly.errors + excluded.errors,
+                c429 = hourly.c429 + excluded.c429
+            """
+            cursor.execute(sql, {'date': self.log_date})
+
         self.conn.commit()
 
         t1 = time.time()
-        logging.warning(f'Ending log_bots, took {(t1 - t0):.1f} seconds')
+        msg = (
+            f'Ending log_hourly, took {(t1 - t0):.1f} seconds '
+            f'to insert {df.shape[0]} rows.'
+        )
+        logging.warning(msg)
 
-    def log_overall(self):
+    def log_ua_histogram(self):
         """
-        Record the total bytes and number of hits for the day
+        Add the counts of each raw user agent string on each day of the log
+        rows to swlogs.ua_histogram.
         """
+        logging.warning('Starting log_ua_histogram')
+        t0 = time.time()
+
+        df = self.ua_histogram.rows()
+        cols = ['date', 'raw_ua', 'hits', 'errors', 'c429', *URL_FLAGS]
+
         with self.conn.cursor() as cursor:
 
             sql = """
-            insert into swlogs.overall
-            (date, bytes, hits)
-            select
-                timestamp::date as date,
-                sum(bytes) as bytes,
-                count(*) as hits
-            from swlogs.staging
-            group by 1
+            create temporary table ua_histogram_load (
+                date      DATE,
+                raw_ua    TEXT,
+                hits      INTEGER,
+                errors    INTEGER,
+                c429      INTEGER,
+                robots    INTEGER,
+                xmlui     INTEGER,
+                sitemaps  INTEGER,
+                items     INTEGER
+            )
+            on commit drop
             """
             cursor.execute(sql)
 
+            sql = f'copy ua_histogram_load ({", ".join(cols)}) from stdin'
+            with cursor.copy(sql) as copy:
+                for row in zip(*[df[col].tolist() for col in cols]):
+                    copy.write_row(row)
+
+            sql = f"""
+            insert into swlogs.ua_histogram (log_date, {", ".join(cols)})
+            select %(date)s::date, {", ".join(cols)}
+            from ua_histogram_load
+            on conflict (date, log_date, md5(raw_ua)) do update set
+                hits = ua_histogram.hits + excluded.hits,
+                errors = ua_histogram.errors + excluded.errors,
+                c429 = ua_histogram.c429 + excluded.c429,
+                robots = ua_histogram.robots + excluded.robots,
+                xmlui = ua_histogram.xmlui + excluded.xmlui,
+                sitemaps = ua_histogram.sitemaps + excluded.sitemaps,
+                items = ua_histogram.items + excluded.items
+            """
+            cursor.execute(sql, {'date': self.log_date})
+
         self.conn.commit()
 
+        t1 = time.time()
+        msg = (
+            f'Ending log_ua_histogram, took {(t1 - t0):.1f} seconds '
+            f'to insert {df.shape[0]} rows.'
+        )
+        logging.warning(msg)
+
+    def log_prefixes(self):
+        """
+        Tag the rows of the ip tables from the logfile with the ASN and owner
+        of their most specific local prefix.  Only the few rows kept in each
+        table are looked up, rather than every log row, and the rows of
+        earlier logfiles are not looked up again.
+        """
+        logging.warning('Starting log_prefixes')
+        t0 = time.time()
+
+        nrows = 0
+        with self.conn.cursor() as cursor:
+
+            for table in ('ip32', 'ip24', 'ip16'):
+
+                sql = f"""
+                select date, ip::text as ip
+                from swlogs.{table}
+                where log_date = %(log_date)s
+                  and asn is null and owner is null
+                """
+                params = {'log_date': self.log_date}
+                df = pd.read_sql(sql, self.engine, params=params)
+
+                df = self.enrich(df)
+                df = df[df['asn'].notna() | df['owner'].notna()]
+
+                sql = f"""
+                update swlogs.{table}
+                set asn = %(asn)s, owner = %(owner)s
+                where log_date = %(log_date)s
+                  and date = %(date)s and ip = %(ip)s::cidr
+                """
+                params = [
+                    {
+                        'log_date': self.log_date,
+                        'date': date,
+                        'ip': ip,
+                        'asn': None if pd.isna(asn) else int(asn),
+                        'owner': None if pd.isna(owner) else owner,
+                    }
+                    for date, ip, asn, owner in df.itertuples(index=False)
+                ]
+                cursor.executemany(sql, params)
+                nrows += len(params)
+
+        self.conn.commit()
+
+        t1 = time.time()
+        msg = (
+            f'Ending log_prefixes, took {(t1 - t0):.1f} seconds '
+            f'to tag {nrows} rows.'
+        )
+        logging.warning(msg)
+
+    def log_countries(self):
+        """
+        Summarize the traffic from each country.
+        """
+        self.execute_sql_file('countries.sql', 'log_countries')
+
+    def log_ip16(self):
+        self.execute_sql_file('ip16.sql', 'log_ip16')
+
+    def log_ip24(self):
+        self.execute_sql_file('ip24.sql', 'log_ip24')
+
+    def log_ip32(self):
+        self.execute_sql_file('ip32.sql', 'log_ip32')
+
+    def log_bots(self):
+        """
+        Summarize the top bot information.
+        """
+        self.execute_sql_file('log-bots.sql', 'log_bots')
+
+    def log_overall(self):
+        """
+        Record the total bytes and number of hits for the day
+        """
+        self.execute_sql_file('overall.sql', 'log_overall')
+
+    def log_concurrent(self):
+        """
+        Compute each of the summary tables with its own query, running the
+        queries at the same time on their own connections.  They only read
+        from the staging table and each writes to a different table, so
+        this phase takes as long as the slowest query rather than the sum of
+        them all.
+        """
+        logging.warning('Starting log_concurrent')
+        t0 = time.time()
+
+        statements = [
+            ('overall.sql', 'log_overall'),
+            ('log-bots.sql', 'log_bots'),
+            ('ip32.sql', 'log_ip32'),
+            ('ip24.sql', 'log_ip24'),
+            ('ip16.sql', 'log_ip16'),
+        ]
+
+        def execute(filename, label):
+            with psycopg.connect(self.connstr) as conn:
+                return self.execute_sql_file(filename, label, conn=conn)
+
+        with ThreadPoolExecutor(max_workers=len(statements)) as executor:
+            futures = [executor.submit(execute, *x) for x in statements]
+            elapsed = [future.result() for future in futures]
+
+        t1 = time.time()
+        msg = (
+            f'Ending log_concurrent, took {(t1 - t0):.1f} seconds, '
+            f'the queries took {sum(elapsed):.1f} seconds in total'
+        )
+        logging.warning(msg)
+
+    def copy_to_staging(self, cursor, df, table='swlogs.staging'):
+        """
+        Bulk copy a dataframe of log rows into the staging table, or into
+        another table with the same columns such as swlogs.hits.
+        """
+        df = df.assign(
+            ua_id=self.ua_dim.encode(df['ua']),
+            url_id=self.url_dim.encode(df['url'])
+        )
+        if self.copy_format == 'binary':
+            self.copy_to_staging_binary(cursor, df, table=table)
+        else:
+            self.copy_to_staging_csv(cursor, df, table=table)
+
+    def staging_columns(self):
+        """
+        The staging table columns that are loaded, and their postgresql
+        types, in the order that the dataframe columns are copied.
+        """
+        columns = dict(STAGING_COLUMNS)
+        for field in self.extra_fields:
+            columns[field] = EXTRA_COLUMNS[field]
+        return columns
+
+    def copy_to_staging_csv(self, cursor, df, table='swlogs.staging'):
+
+        columns = self.staging_columns()
+
+        buffer = io.StringIO()
+        df = df[list(columns)]
+        df.to_csv(buffer, index=False)
+        buffer.seek(0)
+        sql = (
+            f'copy {table} ({", ".join(columns)}) '
+            f'from stdin with (format csv, header)'
+        )
+        with cursor.copy(sql) as copy:
+            while data := buffer.read(1048576):
+                copy.write(data)
+
+    def copy_to_staging_binary(self, cursor, df, table='swlogs.staging'):
+        """
+        Write the rows with binary COPY.  The values go to the server already
+        typed, so neither side has to format or parse text.
+        """
+        columns = self.staging_columns()
+
+        values = []
+        for col in columns:
+            if col == 'ip':
+                values.append(ip_networks(df['ip']))
+            elif pd.api.types.is_extension_array_dtype(df[col]):
+                values.append(nullable_ints(df[col]))
+            else:
+                values.append(df[col].tolist())
+
+        sql = (
+            f'copy {table} ({", ".join(columns)}) '
+            f'from stdin with (format binary)'
+        )
+        with cursor.copy(sql) as copy:
+            copy.set_types(list(columns.values()))
+            for row in zip(*values):
+                copy.write_row(row)
+
     def log_raw(self):
         """
         Record the raw log rows
         """
         logging.warning('Starting bulk insert of daily log items.')
         t0 = time.time()
-        cols = ['ip', 'timestamp', 'status', 'ua', 'url', 'bytes']
         with self.conn.cursor() as cursor:
 
             cursor.execute('truncate swlogs.staging')
-
-            buffer = io.StringIO()
-            self.df[cols].to_csv(buffer, index=False)
-            buffer.seek(0)
-            with cursor.copy('copy swlogs.staging from stdin with (format csv, header)') as copy:  # noqa E501
-                while data := buffer.read(1048576):
-                    copy.write(data)
+            self.copy_to_staging(cursor, self.df)
+            self.update_rollups(self.df)
 
         t1 = time.time()
         msg = (
@@ -138,13 +720,279 @@ class LogLogs(AccessLog):
 
         self.conn.commit()
 
+    def log_raw_from_hits(self):
+        """
+        Fill the staging table with the raw rows kept in swlogs.hits for a
+        single day, e.g. rows that were ingested incrementally over the
+        course of the day, instead of parsing a logfile.
+        """
+        logging.warning(f'Starting load of raw log items for {self.raw_date}.')
+        t0 = time.time()
+
+        cols = ', '.join([*STAGING_COLUMNS, *EXTRA_COLUMNS])
+        with self.conn.cursor() as cursor:
+
+            cursor.execute('truncate swlogs.staging')
+
+            sql = f"""
+            insert into swlogs.staging ({cols})
+            select {cols}
+            from swlogs.hits
+            where date = %(date)s
+            """
+            cursor.execute(sql, {'date': self.raw_date})
+            nrows = cursor.rowcount
+
+        t1 = time.time()
+        msg = (
+            f'log_raw_from_hits:  '
+            f'took {t1-t0} seconds to load {nrows} rows.'
+        )
+        logging.warning(msg)
+
+        self.conn.commit()
+
+    def log_raw_chunked(self):
+        """
+        Parse, classify, and record the raw log rows one chunk at a time so
+        that memory use does not grow with the size of the logfile.  With the
+        pipeline, the next chunks are read and parsed while each one is
+        copied.
+        """
+        logging.warning('Starting chunked bulk insert of daily log items.')
+        t0 = time.time()
+        nrows = 0
+        with self.conn.cursor() as cursor:
+
+            cursor.execute('truncate swlogs.staging')
+
+            for df in self.iter_chunks():
+                self.copy_to_staging(cursor, df)
+                self.update_rollups(df)
+                nrows += df.shape[0]
+
+        t1 = time.time()
+        msg = (
+            f'log_raw_chunked:  '
+            f'took {t1-t0} seconds to insert {nrows} rows.'
+        )
+        logging.warning(msg)
+
+        self.conn.commit()
+
+    def create_hits_partition(self, cursor, date):
+        """
+        Create the partition of swlogs.hits for a single day, if it does not
+        already exist.
+        """
+        sql = (
+            f"create table if not exists swlogs.hits_{date:%Y%m%d} "
+            f"partition of swlogs.hits "
+            f"for values from ('{date}') to ('{date + dt.timedelta(days=1)}')"
+        )
+        cursor.execute(sql)
+
+    def archive_raw(self):
+        """
+        Move the raw log rows from staging into the day partitions of
+        swlogs.hits.  Any rows already stored over the same span of time are
+        replaced first, so reloading a logfile does not duplicate rows and
+        only touches the partitions of the days in that logfile.
+        """
+        logging.warning('Starting archive_raw')
+        t0 = time.time()
+
+        cols = ', '.join([*STAGING_COLUMNS, *EXTRA_COLUMNS])
+
+        with self.conn.cursor() as cursor:
+
+            sql = """
+            select date, min(timestamp), max(timestamp), count(*)
+            from swlogs.staging
+            group by date
+            order by date
+            """
+            cursor.execute(sql)
+            days = cursor.fetchall()
+
+            for date, start, stop, nrows in days:
+
+                self.create_hits_partition(cursor, date)
+
+                sql = """
+                delete from swlogs.hits
+                where date = %(date)s
+                  and timestamp between %(start)s and %(stop)s
+                """
+                cursor.execute(sql, {'date': date, 'start': start, 'stop': stop})  # noqa : E501
+
+                sql = f"""
+                insert into swlogs.hits ({cols})
+                select {cols}
+                from swlogs.staging
+                where date = %(date)s
+                """
+                cursor.execute(sql, {'date': date})
+
+                logging.warning(f'archive_raw:  {nrows} rows for {date}')
+
+        self.conn.commit()
+
+        t1 = time.time()
+        logging.warning(f'Ending archive_raw, took {(t1 - t0):.1f} seconds')
+
+    def drop_old_partitions(self):
+        """
+        Detach and drop the partitions of swlogs.hits for days older than the
+        retention period.
+        """
+        cutoff = dt.date.today() - dt.timedelta(days=self.retention_days)
+
+        with self.conn.cursor() as cursor:
+
+            sql = """
+            select c.relname
+            from pg_inherits i
+                join pg_class c on c.oid = i.inhrelid
+            where i.inhparent = 'swlogs.hits'::regclass
+            order by 1
+            """
+            cursor.execute(sql)
+            partitions = [row[0] for row in cursor.fetchall()]
+
+            for partition in partitions:
+                date = dt.datetime.strptime(partition, 'hits_%Y%m%d').date()
+                if date >= cutoff:
+                    continue
+
+                logging.warning(f'Dropping partition {partition}')
+                cursor.execute(
+                    f'alter table swlogs.hits detach partition swlogs.{partition}'  # noqa : E501
+                )
+                cursor.execute(f'drop table swlogs.{partition}')
+
+        self.conn.commit()
+
     def run(self):
-        super().run()
 
-        self.log_raw()
+        if self.summary == 'in-process':
+            self.log_in_process()
+        else:
+            self.load_and_summarize()
+
+        if self.archive is not None:
+            self.archive.close()
+
+        if self.prefix_table is not None:
+            self.log_prefixes()
+
+        if self.distinct is not None:
+            self.log_distinct()
+
+        if self.hourly is not None:
+            self.log_hourly()
 
-        self.log_overall()
-        self.log_bots()
-        self.log_ip32()
-        self.log_ip24()
-        self.log_ip16()
+        if self.ua_histogram is not None:
+            self.log_ua_histogram()
+
+        if self.keep_raw:
+            self.archive_raw()
+
+        if self.retention_days is not None:
+            self.drop_old_partitions()
+
+    def find_log_date(self):
+        """
+        The day of the rows in the staging table, the date that most of them
+        fall on.  A rotated logfile usually has a few rows from either side
+        of midnight, which are summarized under their own dates.
+
+        Returns
+        -------
+        datetime.date or None
+            None if the staging table is empty.
+        """
+        sql = """
+        select date
+        from swlogs.staging
+        group by 1
+        order by count(*) desc, 1
+        limit 1
+        """
+        with self.conn.cursor() as cursor:
+            cursor.execute(sql)
+            row = cursor.fetchone()
+
+        return None if row is None else row[0]
+
+    def summary_tables(self):
+        """
+        The summary tables that this run writes, and the column holding the
+        day of the logfile in each.  The optional tables kept by an earlier
+        run are left alone by a run that does not write them.
+        """
+        optional = {
+            'countries': 'country' in self.extra_fields,
+            'bots_distinct': self.distinct is not None,
+            'ua_histogram': self.ua_histogram is not None,
+            'hourly': self.hourly is not None,
+        }
+        return {
+            table: column for table, column in SUMMARY_TABLES.items()
+            if optional.get(table, True)
+        }
+
+    def clear_summary(self):
+        """
+        Delete the summary rows already stored from the logfile, so that
+        summarizing it again replaces them rather than adding to them.  The
+        rows of the same dates from neighboring logfiles are left alone.
+        """
+        with self.conn.cursor() as cursor:
+            for table, column in self.summary_tables().items():
+                sql = f'delete from swlogs.{table} where {column} = %(date)s'
+                cursor.execute(sql, {'date': self.log_date})
+                if cursor.rowcount > 0:
+                    msg = (
+                        f'clear_summary:  replacing {cursor.rowcount} rows '
+                        f'of {table} for {self.log_date}'
+                    )
+                    logging.warning(msg)
+
+        self.conn.commit()
+
+    def load_and_summarize(self):
+        """
+        Load the raw log rows into the staging table, from either the logfile
+        or swlogs.hits, and compute the summary tables from there.
+        """
+        if self.raw_date is not None:
+            self.log_raw_from_hits()
+        elif self.chunksize is None and self.chunk_mb is None:
+            super().run()
+            self.log_raw()
+        else:
+            self.log_raw_chunked()
+
+        if self.raw_date is not None:
+            self.log_date = self.raw_date
+        else:
+            self.log_date = self.find_log_date()
+        if self.log_date is None:
+            logging.warning('load_and_summarize:  no log rows to summarize')
+            return
+        self.clear_summary()
+
+        if self.summary == 'single-scan':
+            self.log_summary()
+        elif self.summary == 'concurrent':
+            self.log_concurrent()
+        else:
+            self.log_overall()
+            self.log_bots()
+            self.log_ip32()
+            self.log_ip24()
+            self.log_ip16()
+
+        if 'country' in self.extra_fields:
+            self.log_countries()
@@ -0,0 +1,11 @@
+# standard library imports
+import importlib.resources as ir
+
+
+def migration_files():
+    """
+    The migration files in the order that they are applied, which is by
+    number, so that migration10.sql follows migration9.sql.
+    """
+    files = ir.files('swlogs.migrations').glob('*.sql')
+    return sorted(files, key=lambda p: int(p.stem.removeprefix('migration')))
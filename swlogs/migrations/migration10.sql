@@ -0,0 +1,29 @@
+-- Optional fields of each log line (see swlogs/extras.py), only loaded when
+-- they are asked for.  The country is packed into a small integer.
+alter table swlogs.staging
+    add column if not exists country smallint,
+    add column if not exists referer text,
+    add column if not exists query_string text,
+    add column if not exists content_type text,
+    add column if not exists remote_port integer;
+
+alter table swlogs.hits
+    add column if not exists country smallint,
+    add column if not exists referer text,
+    add column if not exists query_string text,
+    add column if not exists content_type text,
+    add column if not exists remote_port integer;
+
+-- Hits, bytes, errors, and 429s from each country.  A null country is one
+-- that the log did not know.
+CREATE TABLE IF NOT EXISTS swlogs.countries (
+    id        int generated always as identity primary key,
+    date      DATE,
+    country   char(2),
+    hits      bigint,
+    bytes     bigint,
+    errors    bigint,
+    c429      bigint
+);
+
+create index if not exists countries_date_idx on swlogs.countries (date);
@@ -0,0 +1,45 @@
+-- Dimension tables of the classified user agents and the urls, so that the
+-- staging table and swlogs.hits carry small integer keys (see
+-- swlogs/dimensions.py) instead of repeating the text on every row.  The
+-- unique indexes are on md5() of the text because a long url may not fit in
+-- a btree index entry.
+CREATE TABLE IF NOT EXISTS swlogs.ua_dim (
+    id        int generated always as identity primary key,
+    ua        TEXT not null
+);
+
+create unique index if not exists ua_dim_md5_idx on swlogs.ua_dim (md5(ua));
+
+CREATE TABLE IF NOT EXISTS swlogs.url_dim (
+    id        int generated always as identity primary key,
+    url       TEXT not null
+);
+
+create unique index if not exists url_dim_md5_idx on swlogs.url_dim (md5(url));
+
+alter table swlogs.staging
+    add column if not exists ua_id integer,
+    add column if not exists url_id integer;
+
+alter table swlogs.hits
+    add column if not exists ua_id integer,
+    add column if not exists url_id integer;
+
+-- Key the raw rows that were kept before the dimension tables existed.
+insert into swlogs.ua_dim (ua)
+select distinct useragent from swlogs.hits where useragent is not null
+on conflict (md5(ua)) do nothing;
+
+insert into swlogs.url_dim (url)
+select distinct url from swlogs.hits where url is not null
+on conflict (md5(url)) do nothing;
+
+update swlogs.hits as h
+set ua_id = d.id
+from swlogs.ua_dim as d
+where h.ua_id is null and md5(h.useragent) = md5(d.ua) and h.useragent = d.ua;
+
+update swlogs.hits as h
+set url_id = d.id
+from swlogs.url_dim as d
+where h.url_id is null and md5(h.url) = md5(d.url) and h.url = d.url;
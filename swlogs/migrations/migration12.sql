@@ -0,0 +1,19 @@
+-- Hits, errors, 429s, and url category counts of each raw user agent string
+-- on each day of swlogs.bots, so that the bots table can be rebuilt from
+-- them with new user agent rules (see swlogs/reclassify.py) instead of by
+-- parsing the logfiles again.  The unique index is on md5() of the string
+-- because a long user agent may not fit in a btree index entry.
+CREATE TABLE IF NOT EXISTS swlogs.ua_histogram (
+    date      DATE not null,
+    raw_ua    TEXT not null,
+    hits      INTEGER,
+    errors    INTEGER,
+    c429      INTEGER,
+    robots    INTEGER,
+    xmlui     INTEGER,
+    sitemaps  INTEGER,
+    items     INTEGER
+);
+
+create unique index if not exists ua_histogram_date_md5_idx
+on swlogs.ua_histogram (date, md5(raw_ua));
@@ -0,0 +1,19 @@
+-- The overall and countries rows are dated by the timestamps of the log
+-- rows, so a logfile that spans midnight adds rows for two dates.  Each row
+-- also records the day of the logfile it came from, so that summarizing a
+-- logfile again replaces just its own rows.  The rows from before this are
+-- each from a single logfile of that day.
+alter table swlogs.overall
+    add column if not exists log_date date;
+
+update swlogs.overall set log_date = date where log_date is null;
+
+create index if not exists overall_log_date_idx on swlogs.overall (log_date);
+
+alter table swlogs.countries
+    add column if not exists log_date date;
+
+update swlogs.countries set log_date = date where log_date is null;
+
+create index if not exists countries_log_date_idx
+on swlogs.countries (log_date);
@@ -0,0 +1,42 @@
+-- The rows of the tables of top keys are dated by the log rows too, so a
+-- logfile that spans midnight adds rows for each day it has, and a day split
+-- between two logfiles has rows from both.  As with the overall and
+-- countries tables, each row records the day of the logfile it came from.
+-- The rows from before this are each from a single logfile of that day.
+alter table swlogs.bots
+    add column if not exists log_date date;
+
+update swlogs.bots set log_date = date where log_date is null;
+
+create index if not exists bots_log_date_idx on swlogs.bots (log_date);
+
+alter table swlogs.ip32
+    add column if not exists log_date date;
+
+update swlogs.ip32 set log_date = date where log_date is null;
+
+create index if not exists ip32_log_date_idx on swlogs.ip32 (log_date);
+
+alter table swlogs.ip24
+    add column if not exists log_date date;
+
+update swlogs.ip24 set log_date = date where log_date is null;
+
+create index if not exists ip24_log_date_idx on swlogs.ip24 (log_date);
+
+alter table swlogs.ip16
+    add column if not exists log_date date;
+
+update swlogs.ip16 set log_date = date where log_date is null;
+
+create index if not exists ip16_log_date_idx on swlogs.ip16 (log_date);
+
+alter table swlogs.ua_histogram
+    add column if not exists log_date date;
+
+update swlogs.ua_histogram set log_date = date where log_date is null;
+
+drop index if exists swlogs.ua_histogram_date_md5_idx;
+
+create unique index if not exists ua_histogram_date_log_date_md5_idx
+on swlogs.ua_histogram (date, log_date, md5(raw_ua));
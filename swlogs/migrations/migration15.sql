@@ -0,0 +1,15 @@
+-- The hourly rollup records the day of the logfile each row came from, so
+-- that loading a logfile again replaces its hours rather than adding to
+-- them.  The first and last hours of a logfile are still shared with the
+-- neighboring logfiles, as separate rows.  The rows from before this are
+-- dated by their hours.
+alter table swlogs.hourly
+    add column if not exists log_date date;
+
+update swlogs.hourly set log_date = hour::date where log_date is null;
+
+alter table swlogs.hourly drop constraint if exists hourly_pkey;
+
+alter table swlogs.hourly add primary key (ua, hour, log_date);
+
+create index if not exists hourly_log_date_idx on swlogs.hourly (log_date);
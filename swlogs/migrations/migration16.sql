@@ -0,0 +1,5 @@
+-- How many of the rows already ingested are stamped with the last timestamp,
+-- so that if the position in the logfile is lost and it is read again from
+-- the start, exactly those rows of that second can be skipped.
+alter table swlogs.checkpoints
+    add column if not exists last_count integer;
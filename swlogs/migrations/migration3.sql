@@ -0,0 +1,19 @@
+-- The log-local date of each raw row, used to route it to its partition of
+-- swlogs.hits.
+alter table swlogs.staging add column if not exists date date;
+
+-- Raw log rows, kept with one partition per day.  Queries that filter on
+-- date only read the partitions they need, and reloading or dropping a day
+-- only touches that day's partition.  The partitions are created as needed
+-- and are named hits_YYYYMMDD.
+CREATE TABLE IF NOT EXISTS swlogs.hits (
+    ip        cidr,
+    timestamp timestamp with time zone,
+    status    INTEGER,
+    useragent text,
+    url       text,
+    bytes     INTEGER,
+    date      DATE not null
+) partition by range (date);
+
+create index if not exists hits_timestamp_idx on swlogs.hits (timestamp);
@@ -0,0 +1,10 @@
+-- How far into each live logfile the incremental ingestion has read.  The
+-- inode identifies the file that the byte offset refers to, so that log
+-- rotation can be detected.
+CREATE TABLE IF NOT EXISTS swlogs.checkpoints (
+    logfile        text primary key,
+    inode          bigint,
+    byte_offset    bigint,
+    last_timestamp timestamp with time zone,
+    updated        timestamp with time zone
+);
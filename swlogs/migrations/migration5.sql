@@ -0,0 +1,11 @@
+-- HyperLogLog sketches of the distinct client ip addresses and distinct
+-- item urls of each user agent in swlogs.bots on each day.  Sketches of
+-- different days can be merged to count distinct visitors over any range of
+-- dates.
+CREATE TABLE IF NOT EXISTS swlogs.bots_distinct (
+    ua        TEXT,
+    date      DATE,
+    ip_hll    bytea,
+    item_hll  bytea,
+    primary key (ua, date)
+);
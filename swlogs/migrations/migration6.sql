@@ -0,0 +1,14 @@
+-- Hits, bytes, errors, and 429s of each classified user agent in each hour,
+-- so that questions about when during the day the traffic happened do not
+-- need the raw log rows.
+CREATE TABLE IF NOT EXISTS swlogs.hourly (
+    ua        TEXT,
+    hour      timestamp with time zone,
+    hits      INTEGER,
+    bytes     bigint,
+    errors    INTEGER,
+    c429      INTEGER,
+    primary key (ua, hour)
+);
+
+create index if not exists hourly_hour_idx on swlogs.hourly (hour);
@@ -0,0 +1,5 @@
+-- The url category bit flags (see swlogs/urls.py) computed when the log is
+-- parsed, so that the summaries do not need to match urls against regexes.
+alter table swlogs.staging add column if not exists url_flags smallint;
+
+alter table swlogs.hits add column if not exists url_flags smallint;
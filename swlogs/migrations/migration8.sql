@@ -0,0 +1,10 @@
+-- The integer keys of the /24 and /16 networks of the client ip address (see
+-- swlogs/ips.py) computed when the log is parsed, so that the network
+-- summaries group by integers.
+alter table swlogs.staging
+    add column if not exists net24 bigint,
+    add column if not exists net16 bigint;
+
+alter table swlogs.hits
+    add column if not exists net24 bigint,
+    add column if not exists net16 bigint;
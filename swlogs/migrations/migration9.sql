@@ -0,0 +1,13 @@
+-- The ASN and owner of the most specific local prefix (see swlogs/prefixes.py)
+-- containing each row of the ip tables.
+alter table swlogs.ip32
+    add column if not exists asn bigint,
+    add column if not exists owner text;
+
+alter table swlogs.ip24
+    add column if not exists asn bigint,
+    add column if not exists owner text;
+
+alter table swlogs.ip16
+    add column if not exists asn bigint,
+    add column if not exists owner text;
@@ -0,0 +1,84 @@
+"""
+Run the stages of loading a logfile on their own threads, connected by
+bounded queues, so that reading, parsing, and copying into the database
+overlap instead of taking turns.
+"""
+
+# standard library imports
+import queue
+import threading
+
+# How many items a stage may get ahead of the next one.
+QUEUE_SIZE = 2
+
+# Marks the end of the items, along with any exception that ended them.
+_DONE = object()
+
+
+def prefetch(iterable, maxsize=QUEUE_SIZE):
+    """
+    Iterate over an iterable on a background thread, staying at most maxsize
+    items ahead of the consumer.  Chaining these, e.g.
+    prefetch(map(parse, prefetch(read()))), runs each stage on its own
+    thread, so the wall time approaches that of the slowest stage rather
+    than the sum of them all, while only a few items are ever held in
+    memory.
+
+    The threads share the GIL, so the stages only truly overlap where they
+    spend their time outside of it, e.g. in zlib, in pandas and numpy, or
+    waiting on the database.
+
+    Parameters
+    ----------
+    iterable : iterable
+        Produces the items on the background thread.
+    maxsize : int
+        The size of the queue between the thread and the consumer.
+
+    Yields
+    ------
+    The items of the iterable, in order.  An exception raised by the
+    iterable is raised again in the consumer.  If the consumer stops early,
+    the thread is stopped too.
+    """
+    q = queue.Queue(maxsize=maxsize)
+    stop = threading.Event()
+
+    def put(item):
+        # Give up once the consumer has gone away.
+        while not stop.is_set():
+            try:
+                q.put(item, timeout=0.1)
+                return True
+            except queue.Full:
+                pass
+        return False
+
+    def produce():
+        it = iter(iterable)
+        try:
+            for item in it:
+                if not put((item, None)):
+                    return
+            put((_DONE, None))
+        except BaseException as e:
+            put((_DONE, e))
+        finally:
+            # Let an upstream stage stop as well.
+            if hasattr(it, 'close'):
+                it.close()
+
+    thread = threading.Thread(target=produce, daemon=True)
+    thread.start()
+
+    try:
+        while True:
+            item, exc = q.get()
+            if item is _DONE:
+                if exc is not None:
+                    raise exc
+                return
+            yield item
+    finally:
+        stop.set()
+        thread.join()
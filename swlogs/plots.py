@@ -17,22 +17,84 @@ sns.set()
 class Plot(CommonObj):
     """
     Plot hit history of top n bots
+
+    Attributes
+    ----------
+    hourly : bool
+        If true, plot the hourly hits of the top n bots (or of a single user
+        agent) on a date.
+    useragent : str or None
+        Restrict the hourly plot to this user agent.
+    date : datetime.date
+        The date of the hourly plot, the default is yesterday.
     """
 
-    def __init__(self, bots=False, overall=False, numbots=5):
+    def __init__(
+        self,
+        bots=False,
+        overall=False,
+        numbots=5,
+        hourly=False,
+        useragent=None,
+        thedate=None
+    ):
         super().__init__()
 
         self.bots = bots
         self.overall = overall
         self.n = numbots
+        self.hourly = hourly
+        self.useragent = useragent
+        if thedate is None:
+            self.date = date.today() - timedelta(days=1)
+        else:
+            self.date = thedate
 
     def run(self):
 
         if self.bots:
             self.plot_bots()
+        elif self.hourly:
+            self.plot_hourly()
         else:
             self.plot_overall()
 
+    def plot_hourly(self):
+
+        params = {'date': self.date.isoformat(), 'n': self.n}
+        if self.useragent is None:
+            # the top n bots on the date
+            top = """
+                select ua from hourly
+                where hour >= %(date)s::date and hour < %(date)s::date + 1
+                    and ua <> 'dspace-internal'
+                group by ua
+                order by sum(hits) desc
+                limit %(n)s
+            """
+        else:
+            top = 'select %(useragent)s as ua'
+            params['useragent'] = self.useragent
+
+        sql = f"""
+            with top as ({top})
+            select hour, ua, sum(hits) as hits
+            from hourly join top using (ua)
+            where hour >= %(date)s::date and hour < %(date)s::date + 1
+            group by hour, ua
+            order by hour asc
+        """
+        df = pd.read_sql(sql, self.engine, params=params)
+
+        fig, ax = plt.subplots()
+        sns.lineplot(data=df, x='hour', y='hits', hue='ua', ax=ax)
+
+        ax.set_xlabel('')
+        ax.set_title(f'Hourly hits, {self.date.isoformat()}')
+
+        fig.autofmt_xdate()
+        plt.show()
+
     def plot_bots(self):
 
         # Get the top n bots for yesterday.
@@ -41,17 +103,20 @@ class Plot(CommonObj):
             select ua from bots
             where date = '{yesterday.isoformat()}'::date
                 and ua <> 'dspace-internal'
-            order by hits desc
+            group by ua
+            order by sum(hits) desc
             limit {self.n}
             """
         df = pd.read_sql(sql, self.engine)
         ua = df['ua']
 
-        # select history for those bots
+        # select history for those bots, merging the rows of days split
+        # between two logfiles
         sql = f"""
-            select date, ua, hits
+            select date, ua, sum(hits) as hits
             from bots
             where ua in ('{'\', \''.join([x for x in ua.values])}')
+            group by date, ua
             order by date asc
         """
         df = pd.read_sql(sql, self.engine)
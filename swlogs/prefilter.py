@@ -0,0 +1,206 @@
+"""
+Prefilter for the user agent rule table.
+
+Most user agents are misses against most of the rules in UA_REGEX_REPLACE,
+yet every rule has to be tried in order until one of them hits.  Each rule,
+however, can only match a string that contains the words the rule requires
+(e.g. "bingbot" or "YandexBot").  Splitting a user agent into words once
+leaves only the few rules whose words are all present to actually be run.
+
+The required words are found with the regex parser of the re module, which
+is private.  If it cannot be imported, or has changed shape, no words are
+required by any rule and every rule is simply tried in order.
+"""
+
+# standard library imports
+import collections
+import re
+
+try:
+    from re import _constants as sre_constants
+    from re import _parser as sre_parse
+    _REPEATS = (
+        sre_constants.MAX_REPEAT,
+        sre_constants.MIN_REPEAT,
+        sre_constants.POSSESSIVE_REPEAT,
+    )
+except (ImportError, AttributeError):
+    sre_constants = sre_parse = None
+    _REPEATS = ()
+
+# 3rd party library imports
+
+# local imports
+
+WORD_REGEX = re.compile(r'\w+')
+
+
+def _is_nonword(op, av):
+    """
+    Can this regex element only ever match a single non-word character, e.g.
+    whitespace?
+    """
+    if op is sre_constants.LITERAL:
+        return WORD_REGEX.match(chr(av)) is None
+    elif op is sre_constants.IN:
+        return all(_is_nonword(*item) for item in av)
+    elif op is sre_constants.CATEGORY:
+        return av in (
+            sre_constants.CATEGORY_SPACE, sre_constants.CATEGORY_NOT_WORD
+        )
+    else:
+        return False
+
+
+def required_words(regex):
+    """
+    Find the words (runs of word characters) that any string matched by a
+    regex must contain as whole words.  A word qualifies only if it is
+    literal text in the regex and both of its neighbors are known to be
+    non-word characters, e.g. "YandexBot" in "compatible;\\sYandexBot/3".
+
+    Parameters
+    ----------
+    regex : compiled regular expression
+
+    Returns
+    -------
+    set of str
+        Empty if the regex requires no words that can be relied upon, e.g. if
+        it is case insensitive, or if the regex parser is not available.
+    """
+    if sre_parse is None or regex.flags & re.IGNORECASE:
+        return set()
+
+    # Runs of contiguous text that must appear in any match.  Elements that
+    # match a single non-word character, such as whitespace, are represented
+    # by a space.
+    runs = []
+    current = []
+
+    def flush():
+        if len(current) > 0:
+            runs.append(''.join(current))
+            current.clear()
+
+    def walk(parsed):
+        for op, av in parsed:
+            if op is sre_constants.LITERAL:
+                current.append(chr(av))
+            elif _is_nonword(op, av):
+                current.append(' ')
+            elif op is sre_constants.AT:
+                # anchors are zero-width, the text on either side is still
+                # contiguous
+                pass
+            elif op is sre_constants.SUBPATTERN:
+                group, add_flags, del_flags, p = av
+                if add_flags & re.IGNORECASE:
+                    flush()
+                else:
+                    walk(p)
+            elif (
+                op in _REPEATS
+                and av[0] >= 1
+                and len(av[2]) == 1
+                and _is_nonword(*av[2][0])
+            ):
+                # e.g. \s+
+                current.append(' ')
+            elif op in _REPEATS and av[0] >= 1:
+                # The body must appear at least once, but is not contiguous
+                # with what surrounds it.
+                flush()
+                walk(av[2])
+                flush()
+            else:
+                flush()
+
+    try:
+        walk(sre_parse.parse(regex.pattern, regex.flags))
+    except AttributeError:
+        # The private parser has changed, so no words can be relied upon.
+        return set()
+    flush()
+
+    words = set()
+    for run in runs:
+        for m in WORD_REGEX.finditer(run):
+            if m.start() > 0 and m.end() < len(run):
+                words.add(m.group())
+
+    return words
+
+
+class RulePrefilter(object):
+    """
+    Select the first matching rule from an ordered list of regexes, running
+    only the rules whose required words all occur in the string.  The result
+    is the same as trying every rule in order.
+
+    Each rule is indexed under its least common required word.  A string is
+    split into words once, and only the rules indexed under those words are
+    considered.
+
+    Attributes
+    ----------
+    rules : list of compiled regular expressions
+    rule_words : list of frozenset
+        The words required by each rule.
+    index : dict
+        Maps a word to the rules indexed under it.
+    always : list of int
+        Rules with no required words, these are always candidates.
+    """
+
+    def __init__(self, rules):
+
+        self.rules = list(rules)
+        self.rule_words = [frozenset(required_words(r)) for r in self.rules]
+
+        # How many rules require each word?
+        counts = collections.Counter(
+            word for words in self.rule_words for word in words
+        )
+
+        self.index = collections.defaultdict(list)
+        self.always = []
+        for rule, words in enumerate(self.rule_words):
+            if len(words) == 0:
+                self.always.append(rule)
+            else:
+                word = min(words, key=lambda x: (counts[x], -len(x), x))
+                self.index[word].append(rule)
+
+        self.index = dict(self.index)
+
+    def candidates(self, text):
+        """
+        Returns
+        -------
+        list of int
+            In order, the rules that might match text.
+        """
+        words = set(WORD_REGEX.findall(text))
+
+        candidates = list(self.always)
+        for word in words.intersection(self.index):
+            candidates.extend(
+                rule for rule in self.index[word]
+                if self.rule_words[rule] <= words
+            )
+
+        return sorted(candidates)
+
+    def first_match(self, text):
+        """
+        Returns
+        -------
+        compiled regular expression or None
+            The first rule that matches text.
+        """
+        for rule in self.candidates(text):
+            if self.rules[rule].search(text):
+                return self.rules[rule]
+
+        return None
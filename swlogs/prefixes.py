@@ -0,0 +1,176 @@
+"""
+Longest prefix matching of ip addresses against local tables of network
+prefixes, such as ASN announcements or the published ip ranges of crawlers.
+"""
+
+# standard library imports
+import ipaddress
+
+# 3rd party library imports
+import numpy as np
+import pandas as pd
+
+# local imports
+from .ips import parse_ips
+
+# The bits of an address that are matched.  Only the upper 64 bits of IPv6
+# addresses are kept, so longer IPv6 prefixes are matched as /64s.
+ADDRESS_BITS = {4: 32, 6: 64}
+
+
+class PrefixTable(object):
+    """
+    Tag ip addresses and networks with the ASN and owner of the most specific
+    prefix that contains them.
+
+    The prefixes are read from CSV files with "prefix", "asn", and "owner"
+    columns, e.g.
+
+        prefix,asn,owner
+        52.160.0.0/11,8075,Microsoft
+        52.167.144.0/24,8075,Bingbot
+
+    Either the asn or the owner may be left blank.  If the same prefix is
+    listed more than once, the last one wins.
+
+    Nested prefixes are flattened into sorted, non-overlapping intervals,
+    each labeled with the most specific prefix covering it, so that a lookup
+    is a single binary search.
+
+    Attributes
+    ----------
+    prefixes : pandas.DataFrame
+        The asn, owner, ip version, mask length, and first and last address
+        of each prefix.
+    intervals : dict
+        Caches the interval starts and the prefix labeling each interval,
+        keyed by ip version and the longest mask length included.
+    """
+
+    def __init__(self, paths):
+
+        if isinstance(paths, (str, bytes)) or not hasattr(paths, '__iter__'):
+            paths = [paths]
+
+        # The owners stay python objects, so that a blank one is None rather
+        # than the NaN of a string column.
+        dtype = {'prefix': str, 'asn': 'Int64', 'owner': object}
+        df = pd.concat(
+            [pd.read_csv(path, dtype=dtype) for path in paths],
+            ignore_index=True
+        )
+
+        version, masklen, first, last = [], [], [], []
+        for prefix in df['prefix']:
+            net = ipaddress.ip_network(prefix, strict=False)
+            bits = ADDRESS_BITS[net.version]
+            # Shift the addresses down to the bits that are matched.
+            shift = net.max_prefixlen - bits
+            version.append(net.version)
+            masklen.append(min(net.prefixlen, bits))
+            first.append(int(net.network_address) >> shift)
+            last.append(int(net.broadcast_address) >> shift)
+
+        self.prefixes = pd.DataFrame({
+            'asn': df['asn'],
+            'owner': pd.Series(
+                [x if isinstance(x, str) else None for x in df['owner']],
+                dtype=object
+            ),
+            'version': version,
+            'masklen': masklen,
+            'first': pd.Series(first, dtype=object),
+            'last': pd.Series(last, dtype=object),
+        })
+        self.intervals = {}
+
+    def get_intervals(self, version, maxlen):
+        """
+        Flatten the prefixes of one ip version that are no longer than maxlen
+        into non-overlapping intervals.
+
+        Returns
+        -------
+        numpy arrays
+            The first address of each interval, sorted, and the row of the
+            prefix that labels it, or -1 if no prefix covers it.
+        """
+        key = (version, maxlen)
+        if key in self.intervals:
+            return self.intervals[key]
+
+        top = 2**ADDRESS_BITS[version]
+        dtype = np.int64 if version == 4 else np.uint64
+
+        df = self.prefixes
+        df = df[(df['version'] == version) & (df['masklen'] <= maxlen)]
+
+        # Paint the least specific prefixes first so that the more specific
+        # ones overwrite them.  The sort is stable, so among duplicates the
+        # last one listed wins.
+        df = df.sort_values('masklen', kind='stable')
+
+        # Each prefix covers the intervals from its first address up to the
+        # address after its last one, if there is one.
+        stops = [x + 1 for x in df['last']]
+        starts = sorted(set(df['first']) | set(stops) | {0})
+        starts = np.array([x for x in starts if x < top], dtype=dtype)
+
+        lo = np.searchsorted(starts, np.array(list(df['first']), dtype=dtype))
+        hi = [
+            len(starts) if x == top else np.searchsorted(starts, dtype(x))
+            for x in stops
+        ]
+
+        labels = np.full(len(starts), -1, dtype=np.int64)
+        for row, i, j in zip(df.index, lo, hi):
+            labels[i:j] = row
+
+        self.intervals[key] = starts, labels
+        return starts, labels
+
+    def lookup(self, s):
+        """
+        Find the most specific prefix containing each ip address or network.
+        A network, e.g. "10.1.2.0/24", only matches prefixes that contain the
+        whole network.  Each distinct value is looked up only once.
+
+        Parameters
+        ----------
+        s : pandas.Series
+            ip addresses or networks
+
+        Returns
+        -------
+        pandas.DataFrame
+            The asn and owner of each value, indexed like s.  Both are
+            missing where no prefix matches.
+        """
+        codes, uniques = pd.factorize(s.to_numpy())
+
+        parts = pd.Series(uniques, dtype=object).str.split('/', n=1)
+        addresses = parts.str[0].to_numpy()
+        masklens = pd.to_numeric(parts.str[1]).fillna(128).to_numpy(int)
+
+        v4, v6, is_v4, is_v6 = parse_ips(addresses)
+
+        rows = np.full(len(uniques), -1, dtype=np.int64)
+        for version, values, valid in ((4, v4, is_v4), (6, v6, is_v6)):
+            maxlens = np.minimum(masklens, ADDRESS_BITS[version])
+            for maxlen in np.unique(maxlens[valid]):
+                starts, labels = self.get_intervals(version, maxlen)
+                idx = valid & (maxlens == maxlen)
+                i = np.searchsorted(starts, values[idx], side='right') - 1
+                rows[idx] = labels[i]
+
+        # Missing values have a code of -1, which picks up a trailing
+        # unmatched entry.  Unmatched rows are -1 too, which take() fills
+        # with missing values.
+        rows = np.append(rows, -1)[codes]
+        asn = self.prefixes['asn'].array.take(rows, allow_fill=True)
+        owner = np.append(self.prefixes['owner'].to_numpy(), None)[rows]
+
+        return pd.DataFrame({
+            'asn': asn,
+            'owner': pd.Series(owner, dtype=object, index=s.index),
+        }, index=s.index)
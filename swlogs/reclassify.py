@@ -0,0 +1,122 @@
+"""
+Rebuild the bots table from the user agent histograms with the current user
+agent rules, without reading any logfiles.
+"""
+
+# standard library imports
+import logging
+import time
+
+# 3rd party library imports
+import pandas as pd
+
+# local imports
+from .access_logs import classify_useragents
+from .aggregate import TOP_N
+from .common import CommonObj
+from .urls import URL_FLAGS
+
+
+class Reclassify(CommonObj):
+    """
+    Re-apply UA_REGEX_REPLACE to the raw user agent strings counted in
+    swlogs.ua_histogram and replace the rows of swlogs.bots for each day
+    in a range that has a histogram.  A day split between two logfiles has
+    rows and a histogram from each, and each is rebuilt from its own.  Days
+    without a histogram are left alone.
+
+    The sketches of swlogs.bots_distinct cannot be rebuilt this way, so
+    they keep the user agents of the rules they were computed with.
+
+    Attributes
+    ----------
+    start_date, end_date : datetime.date
+        Rebuild the days from start_date through end_date.
+    """
+
+    def __init__(self, start_date, end_date=None):
+        super().__init__()
+
+        self.start_date = start_date
+        self.end_date = start_date if end_date is None else end_date
+
+    def bots(self, df):
+        """
+        Compute the rows of the bots table from the histogram of one day of
+        one logfile.
+
+        Parameters
+        ----------
+        df : pandas.DataFrame
+            The counts of each raw user agent string on the day.
+
+        Returns
+        -------
+        pandas.DataFrame
+            The top user agents under the current rules, ready to be
+            inserted.
+        """
+        counts = ['hits', 'errors', 'c429', *URL_FLAGS]
+        g = df[counts].groupby(classify_useragents(df['raw_ua'])).sum()
+        g = g.sort_values('hits', ascending=False, kind='stable')
+        g = g.head(TOP_N['bots'])
+
+        return pd.DataFrame({
+            'ua': g.index,
+            'hits': g['hits'].to_numpy(),
+            'error_pct': (g['errors'] / g['hits'] * 100).to_numpy(),
+            'c429': g['c429'].to_numpy(),
+            'robots': (g['robots'] > 0).to_numpy(),
+            'xmlui': (g['xmlui'] > 0).to_numpy(),
+            'sitemaps': (g['sitemaps'] > 0).to_numpy(),
+            'item_pct': (g['items'] / g['hits'] * 100).to_numpy(),
+        })
+
+    def run(self):
+
+        logging.warning(
+            f'Starting reclassify of {self.start_date} to {self.end_date}'
+        )
+        t0 = time.time()
+
+        sql = """
+            select *
+            from swlogs.ua_histogram
+            where date between %(start)s and %(end)s
+        """
+        params = {'start': self.start_date, 'end': self.end_date}
+        histograms = pd.read_sql(sql, self.engine, params=params)
+
+        with self.conn.cursor() as cursor:
+
+            groups = histograms.groupby(['date', 'log_date'])
+            for (date, log_date), df in groups:
+
+                df = self.bots(df)
+
+                sql = """
+                    delete from swlogs.bots
+                    where date = %(date)s and log_date = %(log_date)s
+                """
+                cursor.execute(sql, {'date': date, 'log_date': log_date})
+
+                sql = (
+                    f'insert into swlogs.bots ({", ".join(df.columns)}, date, log_date) '  # noqa : E501
+                    f'values ({", ".join(["%s"] * df.shape[1])}, %s, %s)'
+                )
+                # Python objects rather than numpy scalars.
+                rows = df.astype(object).to_numpy().tolist()
+                cursor.executemany(
+                    sql, [[*row, date, log_date] for row in rows]
+                )
+
+                msg = (
+                    f'reclassify:  {df.shape[0]} bots for {date} '
+                    f'from the logfile of {log_date}'
+                )
+                logging.warning(msg)
+
+        self.conn.commit()
+
+        t1 = time.time()
+        logging.warning(f'Ending reclassify, took {(t1 - t0):.1f} seconds')
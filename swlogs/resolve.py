@@ -0,0 +1,179 @@
+# standard library imports
+import concurrent.futures
+import json
+import logging
+import pathlib
+import socket
+import tempfile
+import time
+
+# 3rd party library imports
+
+# local imports
+
+
+class HostnameResolver(object):
+    """
+    Resolve hostnames to ip addresses.  Each unique hostname is looked up at
+    most once, the lookups are made concurrently, and the results are kept in
+    a cache that is persisted to disk so that it can be shared across daily
+    runs.
+
+    Attributes
+    ----------
+    cache : dict
+        Maps each hostname to a list of [ip address or None, lookup time].
+        Failed lookups are cached too, so that a dead hostname is not
+        retried on every run.
+    cachefile : path or None
+        Persist the cache here.  If None, the cache lives only in memory.
+    ttl : float
+        Cached entries older than this many seconds are looked up again.
+    timeout : float
+        Give up on lookups that have not finished after this many seconds.
+    max_workers : int
+        Number of lookups to run concurrently.
+    """
+
+    def __init__(
+        self,
+        cachefile=pathlib.Path.home() / '.cache/swlogs/hostnames.json',
+        ttl=7 * 86400,
+        timeout=5.0,
+        max_workers=16
+    ):
+
+        if cachefile is None:
+            self.cachefile = None
+        else:
+            self.cachefile = pathlib.Path(cachefile)
+        self.ttl = ttl
+        self.timeout = timeout
+        self.max_workers = max_workers
+
+        self.cache = {}
+        self.load_cache()
+
+        # Hostnames whose lookups timed out during this run.  These are not
+        # retried until the next run.
+        self.timed_out = set()
+
+    def load_cache(self):
+
+        if self.cachefile is None:
+            return
+
+        self.cache = self.read_cache()
+
+    def read_cache(self):
+        """
+        Returns
+        -------
+        dict
+            The cache on disk, empty if there is none yet.
+        """
+        if not self.cachefile.exists():
+            return {}
+
+        try:
+            return json.loads(self.cachefile.read_text())
+        except ValueError:
+            msg = f'Ignoring corrupt hostname cache {self.cachefile}'
+            logging.warning(msg)
+            return {}
+
+    def save_cache(self):
+        """
+        Write the cache atomically so that a crashed run cannot leave behind
+        a partial file.  Other processes, e.g. the workers of a backfill, may
+        be saving the same cache, so it is merged with what is on disk now,
+        keeping the newer lookup of each hostname, and written to a temporary
+        file of its own.
+        """
+        if self.cachefile is None:
+            return
+
+        cache = self.read_cache()
+        for k, v in self.cache.items():
+            if k not in cache or v[1] > cache[k][1]:
+                cache[k] = v
+
+        now = time.time()
+        cache = {k: v for k, v in cache.items() if now - v[1] < self.ttl}
+
+        self.cachefile.parent.mkdir(parents=True, exist_ok=True)
+        with tempfile.NamedTemporaryFile(
+            mode='w',
+            dir=self.cachefile.parent,
+            prefix=f'.{self.cachefile.name}.',
+            delete=False
+        ) as f:
+            f.write(json.dumps(cache))
+        pathlib.Path(f.name).replace(self.cachefile)
+
+    def resolve(self, hostnames):
+        """
+        Resolve hostnames, consulting the cache first.
+
+        Parameters
+        ----------
+        hostnames : iterable of str
+
+        Returns
+        -------
+        dict
+            Maps each hostname to its ip address, or to None if it could not
+            be resolved in time.
+        """
+        now = time.time()
+        hostnames = set(hostnames)
+
+        stale = [
+            h for h in hostnames
+            if h not in self.timed_out
+            and (h not in self.cache or now - self.cache[h][1] >= self.ttl)
+        ]
+
+        if len(stale) > 0:
+            self.lookup(stale)
+            self.save_cache()
+
+        return {h: self.cache[h][0] for h in hostnames}
+
+    def lookup(self, hostnames):
+
+        logging.warning(f'Resolving {len(hostnames)} hostnames.')
+        t0 = time.time()
+
+        executor = concurrent.futures.ThreadPoolExecutor(
+            max_workers=self.max_workers
+        )
+        futures = {
+            executor.submit(socket.gethostbyname, h): h for h in hostnames
+        }
+        done, not_done = concurrent.futures.wait(
+            futures, timeout=self.timeout
+        )
+
+        # Do not wait for lookups that are hung.
+        executor.shutdown(wait=False, cancel_futures=True)
+
+        for future in done:
+            try:
+                ip = future.result()
+            except (OSError, UnicodeError):
+                ip = None
+            self.cache[futures[future]] = [ip, t0]
+
+        # Lookups that timed out are not persisted, they will be retried on
+        # the next run.
+        for future in not_done:
+            self.cache[futures[future]] = [None, 0]
+            self.timed_out.add(futures[future])
+
+        t1 = time.time()
+        msg = (
+            f'Resolved {len(done)} hostnames in {t1-t0:.1f} seconds, '
+            f'{len(not_done)} timed out.'
+        )
+        logging.warning(msg)
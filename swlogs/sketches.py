@@ -0,0 +1,242 @@
+"""
+Streaming summaries that use bounded memory.
+"""
+
+# standard library imports
+import functools
+import hashlib
+import heapq
+import itertools
+
+# 3rd party library imports
+import numpy as np
+import pandas as pd
+
+# local imports
+
+
+class SpaceSaving(object):
+    """
+    The Space-Saving heavy hitters algorithm (Metwally, Agrawal, and El
+    Abbadi), with weighted updates.  At most capacity keys are monitored.
+    When a new key arrives and the summary is full, the key with the
+    smallest count is evicted and the new key inherits its count, which is
+    recorded as the new key's maximum overestimate.
+
+    With N the total weight seen, the guarantees are:
+
+        * every count is an overestimate by at most its error, i.e.
+          count - error <= true count <= count
+        * every error is at most N / capacity
+        * every key whose true count exceeds N / capacity is monitored
+
+    Along with its count, each monitored key can accumulate a vector of
+    extra quantities (e.g. errors and 429s) that are summed over the updates
+    seen while the key was monitored, i.e. over the last count - error of
+    its weight.  If no key was ever evicted, all of the results are exact.
+
+    Attributes
+    ----------
+    capacity : int
+        The most keys monitored at once.
+    counts : dict
+        Maps each monitored key to a [count, error, extra] list.
+    heap : list
+        (count, sequence, key) entries, the smallest count on top.  Entries
+        whose count is out of date are skipped and discarded lazily.
+    total : number
+        The total weight seen.
+    """
+
+    def __init__(self, capacity):
+
+        if capacity < 1:
+            msg = 'The capacity must be at least 1.'
+            raise ValueError(msg)
+
+        self.capacity = capacity
+        self.counts = {}
+        self.heap = []
+        self.sequence = itertools.count()
+        self.total = 0
+
+    def __len__(self):
+        return len(self.counts)
+
+    def push(self, key, count):
+        heapq.heappush(self.heap, (count, next(self.sequence), key))
+
+        # Keep the stale entries from piling up.
+        if len(self.heap) > 4 * self.capacity:
+            self.heap = [
+                (entry[0], next(self.sequence), key)
+                for key, entry in self.counts.items()
+            ]
+            heapq.heapify(self.heap)
+
+    def pop_min(self):
+        """
+        Remove and return the monitored key with the smallest count.
+        """
+        while True:
+            count, _, key = heapq.heappop(self.heap)
+            if key in self.counts and self.counts[key][0] == count:
+                return key
+
+    def update(self, key, weight=1, extra=None):
+        """
+        Count an occurrence of key.
+
+        Parameters
+        ----------
+        key : hashable
+        weight : number
+            How many occurrences to count.
+        extra : numpy array or None
+            Quantities to accumulate along with the count.
+        """
+        self.total += weight
+
+        if key in self.counts:
+            entry = self.counts[key]
+            entry[0] += weight
+        elif len(self.counts) < self.capacity:
+            entry = self.counts[key] = [weight, 0, None]
+        else:
+            evicted = self.pop_min()
+            floor = self.counts.pop(evicted)[0]
+            entry = self.counts[key] = [floor + weight, floor, None]
+
+        if extra is not None:
+            if entry[2] is None:
+                entry[2] = np.array(extra, copy=True)
+            else:
+                entry[2] += extra
+
+        self.push(key, entry[0])
+
+    def top(self, n=None):
+        """
+        The monitored keys with the largest counts.  Ties are broken in
+        favor of the key monitored first.
+
+        Returns
+        -------
+        list of (key, count, error, extra) tuples
+        """
+        items = sorted(
+            self.counts.items(), key=lambda item: item[1][0], reverse=True
+        )
+        return [
+            (key, count, error, extra)
+            for key, (count, error, extra) in items[:n]
+        ]
+
+
+# The number of HyperLogLog registers is 2**HLL_PRECISION.  With 4096
+# one-byte registers the standard error of a count is about 1.6%.
+HLL_PRECISION = 12
+HASH_CACHE_SIZE = 2**17
+
+
+@functools.lru_cache(maxsize=HASH_CACHE_SIZE)
+def hash64(value):
+    """
+    A 64-bit hash of a string that, unlike hash(), is the same in every
+    process, so that sketches can be stored and merged later.
+    """
+    digest = hashlib.blake2b(value.encode(), digest_size=8).digest()
+    return int.from_bytes(digest, 'big')
+
+
+def hll_registers(values, p=HLL_PRECISION):
+    """
+    Find the HyperLogLog register that each value updates and the value it
+    updates it with.  Each distinct value is hashed only once.
+
+    Parameters
+    ----------
+    values : pandas.Series of str
+
+    Returns
+    -------
+    numpy arrays
+        The register index and rank of each value.
+    """
+    nbits = 64 - p
+    codes, uniques = pd.factorize(values.to_numpy())
+
+    index = np.empty(len(uniques), dtype=np.int32)
+    rank = np.empty(len(uniques), dtype=np.uint8)
+    for i, value in enumerate(uniques):
+        h = hash64(value)
+        index[i] = h >> nbits
+        # The position of the leftmost 1 bit in the remaining bits.
+        rank[i] = nbits - (h & ((1 << nbits) - 1)).bit_length() + 1
+
+    return index[codes], rank[codes]
+
+
+class HyperLogLog(object):
+    """
+    The HyperLogLog distinct count estimator (Flajolet, Fusy, Gandouet, and
+    Meunier).  Sketches of the same precision can be merged, and the count
+    of the merged sketch is the count of the union of their values.
+
+    Attributes
+    ----------
+    p : int
+        The precision, there are 2**p registers.
+    registers : numpy.ndarray
+        One uint8 register per hash bucket, the largest rank seen there.
+    """
+
+    def __init__(self, p=HLL_PRECISION, registers=None):
+
+        self.p = p
+        if registers is None:
+            self.registers = np.zeros(2**p, dtype=np.uint8)
+        else:
+            self.registers = registers
+
+    @classmethod
+    def from_bytes(cls, data):
+        """
+        Restore a sketch saved with to_bytes.
+        """
+        registers = np.frombuffer(data, dtype=np.uint8).copy()
+        return cls(p=len(registers).bit_length() - 1, registers=registers)
+
+    def to_bytes(self):
+        return self.registers.tobytes()
+
+    def add(self, values):
+        """
+        Add a series of string values to the sketch.
+        """
+        index, rank = hll_registers(values, p=self.p)
+        np.maximum.at(self.registers, index, rank)
+
+    def merge(self, other):
+        """
+        Fold another sketch into this one.
+        """
+        if other.p != self.p:
+            msg = 'Cannot merge sketches of different precision.'
+            raise ValueError(msg)
+        np.maximum(self.registers, other.registers, out=self.registers)
+
+    def count(self):
+        """
+        Estimate the number of distinct values added.
+        """
+        m = len(self.registers)
+        alpha = 0.7213 / (1 + 1.079 / m)
+        estimate = alpha * m**2 / np.sum(2.0 ** -self.registers.astype(float))
+
+        # Linear counting is more accurate for small cardinalities.
+        zeros = np.count_nonzero(self.registers == 0)
+        if estimate <= 2.5 * m and zeros > 0:
+            estimate = m * np.log(m / zeros)
+
+        return int(round(estimate))
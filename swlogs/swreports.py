@@ -11,6 +11,7 @@ import pandas as pd
 
 # local imports
 from .common import CommonObj
+from .sketches import HyperLogLog
 
 pd.options.display.float_format = '{:,.1f}'.format
 pd.options.display.max_columns = 200
@@ -30,6 +31,17 @@ class SWReport(CommonObj):
         If true, generate the ip24 report
     ip32 : bool
         If true, generate the ip32 report
+    start_date : datetime.date or None
+        If not None, the report for a single user agent starts on this date.
+    hourly : bool
+        If true, report the hourly traffic on the date, restricted to the
+        user agent if one is given.
+    distinct : bool
+        If true, the report for a single user agent includes estimates of the
+        distinct ip addresses and item urls on each day and over all of the
+        days.
+    countries : bool
+        If true, report the traffic from each country on the date.
     """
 
     def __init__(
@@ -40,7 +52,11 @@ class SWReport(CommonObj):
         overall=False,
         useragent=None,
         thedate=None,
-        robots=None
+        robots=None,
+        start_date=None,
+        distinct=False,
+        hourly=False,
+        countries=False
     ):
         super().__init__()
 
@@ -54,6 +70,10 @@ class SWReport(CommonObj):
             self.date = thedate
         self.useragent = useragent
         self.robots = robots
+        self.start_date = start_date
+        self.distinct = distinct
+        self.hourly = hourly
+        self.countries = countries
 
     def run(self):
 
@@ -65,10 +85,22 @@ class SWReport(CommonObj):
             df = self.run_ip24_report()
         elif self.ip32:
             df = self.run_ip32_report()
+        elif self.hourly:
+            df = self.run_hourly_report()
+        elif self.countries:
+            df = self.run_countries_report()
         else:
             df = self.run_bots_report()
 
-        print(df)
+        if self.distinct and self.useragent is not None:
+            daily, totals = self.run_distinct_report()
+            df = df.join(daily)
+            print(df)
+            print()
+            print(f"distinct ips over all days:  {totals['ips']:,}")
+            print(f"distinct items over all days:  {totals['items']:,}")
+        else:
+            print(df)
 
     def run_ip16_report(self):
         """
@@ -79,9 +111,12 @@ class SWReport(CommonObj):
             select
                 date,
                 ip,
-                hits
+                sum(hits) as hits,
+                max(asn) as asn,
+                max(owner) as owner
             from ip16
             where date = '{self.date.isoformat()}'
+            group by date, ip
             order by hits desc
         """
         df = pd.read_sql(sql, self.engine, index_col='date')
@@ -98,9 +133,12 @@ class SWReport(CommonObj):
             select
                 date,
                 ip,
-                hits
+                sum(hits) as hits,
+                max(asn) as asn,
+                max(owner) as owner
             from ip24
             where date = '{self.date.isoformat()}'
+            group by date, ip
             order by hits desc
         """
         df = pd.read_sql(sql, self.engine, index_col='date')
@@ -116,15 +154,72 @@ class SWReport(CommonObj):
             select
                 date,
                 ip,
-                hits as hits
+                sum(hits) as hits,
+                max(asn) as asn,
+                max(owner) as owner
             from ip32
             where date = '{self.date.isoformat()}'
+            group by date, ip
             order by hits desc
         """
         df = pd.read_sql(sql, self.engine, index_col='date')
 
         return df
 
+    def run_hourly_report(self):
+        """
+        Get the hits, bytes, errors, and 429s in each hour of the date, for
+        all user agents or for a single user agent.
+        """
+        params = {'date': self.date.isoformat()}
+        lst = [
+            'hour >= %(date)s::date',
+            'hour < %(date)s::date + 1',
+        ]
+        if self.useragent is not None:
+            lst.append('ua = %(useragent)s')
+            params['useragent'] = self.useragent
+
+        where_condition = ' AND '.join(lst)
+
+        sql = f"""
+            select
+                hour,
+                sum(hits) as hits,
+                sum(bytes) as bytes,
+                sum(errors) as errors,
+                sum(c429) as c429
+            from hourly
+            where {where_condition}
+            group by hour
+            order by hour
+        """
+        df = pd.read_sql(sql, self.engine, params=params, index_col='hour')
+
+        return df
+
+    def run_countries_report(self):
+        """
+        Get the hits, bytes, errors, and 429s from each country on the date,
+        busiest first.
+        """
+        sql = """
+            select
+                country,
+                sum(hits) as hits,
+                sum(bytes) as bytes,
+                sum(errors)::real / sum(hits)::real * 100 as error_pct,
+                sum(c429) as c429
+            from countries
+            where date = %(date)s
+            group by country
+            order by hits desc
+        """
+        params = {'date': self.date.isoformat()}
+        df = pd.read_sql(sql, self.engine, params=params, index_col='country')
+
+        return df
+
     def run_overall(self):
 
         sql = """
@@ -156,26 +251,36 @@ class SWReport(CommonObj):
             lst.append('ua = %(useragent)s')
             params['date'] = self.date.isoformat()
             params['useragent'] = self.useragent
+            if self.start_date is not None:
+                lst.append('date >= %(start_date)s')
+                params['start_date'] = self.start_date.isoformat()
+
+        where_condition = ' AND '.join(lst)
 
         # was robots specified?
         if self.robots is not None and self.robots:
-            lst.append('robots')
-
-        where_condition = ' AND '.join(lst)
+            having_condition = 'having bool_or(robots)'
+        else:
+            having_condition = ''
 
+        # A day split between two logfiles has rows from each, so they are
+        # merged.
         sql = f"""
             select
                 date,
                 ua,
-                hits,
-                error_pct,
-                c429,
-                robots,
-                xmlui,
-                sitemaps,
-                item_pct
+                sum(hits) as hits,
+                sum(error_pct * hits) / sum(hits) as error_pct,
+                sum(c429) as c429,
+                bool_or(robots) as robots,
+                bool_or(xmlui) as xmlui,
+                bool_or(sitemaps) as sitemaps,
+                sum(item_pct * hits) / sum(hits) as item_pct
             from bots
             where {where_condition}
+            group by date, ua
+            {having_condition}
+            order by date, hits desc
         """
 
         df = pd.read_sql(sql, self.engine, params=params, index_col='date')
@@ -186,3 +291,48 @@ class SWReport(CommonObj):
             df = df.drop(labels='ua', axis='columns')
 
         return df
+
+    def run_distinct_report(self):
+        """
+        Estimate the distinct ip addresses and item urls of a single user
+        agent on each day from the daily sketches, and over all of the days
+        by merging them.  The raw log rows are not needed.
+
+        Returns
+        -------
+        pandas.DataFrame
+            The distinct ips and items of each day.
+        dict
+            The distinct ips and items over all of the days.
+        """
+        params = {
+            'useragent': self.useragent,
+            'date': self.date.isoformat(),
+        }
+        lst = ['ua = %(useragent)s', 'date <= %(date)s']
+        if self.start_date is not None:
+            lst.append('date >= %(start_date)s')
+            params['start_date'] = self.start_date.isoformat()
+
+        where_condition = ' AND '.join(lst)
+
+        sql = f"""
+            select date, ip_hll, item_hll
+            from bots_distinct
+            where {where_condition}
+            order by date
+        """
+        df = pd.read_sql(sql, self.engine, params=params, index_col='date')
+
+        totals = {'ips': HyperLogLog(), 'items': HyperLogLog()}
+        daily = {'distinct_ips': [], 'distinct_items': []}
+        for ip_hll, item_hll in zip(df['ip_hll'], df['item_hll']):
+            for name, data in [('ips', ip_hll), ('items', item_hll)]:
+                sketch = HyperLogLog.from_bytes(data)
+                daily[f'distinct_{name}'].append(sketch.count())
+                totals[name].merge(sketch)
+
+        daily = pd.DataFrame(daily, index=df.index)
+        totals = {name: sketch.count() for name, sketch in totals.items()}
+
+        return daily, totals
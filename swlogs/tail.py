@@ -0,0 +1,253 @@
+# standard library imports
+import io
+import logging
+import time
+import warnings
+
+# 3rd party library imports
+
+# local imports
+from .access_logs import classify_useragents, match_line
+from .loglogs import LogLogs
+
+# The most of the logfile read in one run, in megabytes.
+MAX_READ_MB = 64
+
+
+class TailLogs(LogLogs):
+    """
+    Incrementally ingest the lines appended to a live logfile since the
+    previous run into the day partitions of swlogs.hits.  How far the
+    logfile has been read is checkpointed in swlogs.checkpoints in the same
+    transaction as the rows themselves, and that transaction holds an
+    advisory lock on the logfile, so each line is ingested exactly once
+    however often this is run, even when runs overlap.  A run reads at most
+    max_mb of the logfile, the next run carries on from there.
+
+    Rotation is detected by the inode of the logfile changing.  The rest of
+    the previous file is then read from the rotated logfile (the same name
+    with a ".1" suffix) before the new file is read from the beginning.
+
+    If the position in the logfile is lost, the logfile is read from the
+    beginning, skipping the rows stamped before the last timestamp ingested
+    and as many of the rows stamped at it as were ingested.  That assumes
+    the logfile holds all of the rows of that second, as when it has been
+    rewritten with its earlier lines.  Otherwise some new rows of that
+    second are skipped as well.
+
+    Attributes
+    ----------
+    rotated : path
+        Where the previous logfile is found after rotation.
+    max_mb : float
+        Read at most this many megabytes of the logfile in one run.
+    """
+
+    def __init__(
+        self,
+        logfile='/var/log/nginx/access.log',
+        resolve_hostnames=True,
+        copy_format='csv',
+        max_mb=MAX_READ_MB
+    ):
+        super().__init__(
+            logfile,
+            resolve_hostnames=resolve_hostnames,
+            copy_format=copy_format
+        )
+
+        self.rotated = self.infile.with_name(self.infile.name + '.1')
+        self.max_mb = max_mb
+
+    def lock(self):
+        """
+        Take the advisory lock on the logfile for the rest of the current
+        transaction, waiting for any other run on the same logfile to
+        commit first.  A row lock on the checkpoint would not do, since
+        there is no checkpoint row before the first run.
+        """
+        sql = 'select pg_advisory_xact_lock(hashtext(%(logfile)s))'
+        with self.conn.cursor() as cursor:
+            cursor.execute(sql, {'logfile': str(self.infile)})
+
+    def read_checkpoint(self):
+        """
+        Returns
+        -------
+        tuple or None
+            The inode, byte offset, last timestamp, and the number of rows
+            ingested with that timestamp from the previous run, or None if
+            the logfile has never been ingested.
+        """
+        sql = """
+        select inode, byte_offset, last_timestamp, last_count
+        from swlogs.checkpoints
+        where logfile = %(logfile)s
+        """
+        with self.conn.cursor() as cursor:
+            cursor.execute(sql, {'logfile': str(self.infile)})
+            return cursor.fetchone()
+
+    def write_checkpoint(
+        self, cursor, inode, offset, last_timestamp, last_count
+    ):
+
+        sql = """
+        insert into swlogs.checkpoints
+        (logfile, inode, byte_offset, last_timestamp, last_count, updated)
+        values (
+            %(logfile)s, %(inode)s, %(offset)s,
+            %(last_timestamp)s, %(last_count)s, now()
+        )
+        on conflict (logfile) do update set
+            inode = excluded.inode,
+            byte_offset = excluded.byte_offset,
+            last_timestamp = coalesce(
+                excluded.last_timestamp, checkpoints.last_timestamp
+            ),
+            last_count = coalesce(
+                excluded.last_count, checkpoints.last_count
+            ),
+            updated = excluded.updated
+        """
+        params = {
+            'logfile': str(self.infile),
+            'inode': inode,
+            'offset': offset,
+            'last_timestamp': last_timestamp,
+            'last_count': last_count,
+        }
+        cursor.execute(sql, params)
+
+    def pending_ranges(self, checkpoint):
+        """
+        Work out which bytes have been appended since the checkpoint.
+
+        Returns
+        -------
+        list of (path, start, end) tuples
+            The byte ranges to read, in order.
+        bool
+            True if the position in the logfile was lost, e.g. the rotated
+            logfile could not be found, and so the logfile is read from the
+            beginning.
+        int
+            The inode of the current logfile, which the last range is in.
+        """
+        stat = self.infile.stat()
+
+        if checkpoint is None:
+            return [(self.infile, 0, stat.st_size)], False, stat.st_ino
+
+        inode, offset = checkpoint[:2]
+
+        if inode == stat.st_ino:
+            if stat.st_size < offset:
+                msg = f'{self.infile} was truncated, reading from the start.'
+                warnings.warn(msg)
+                return [(self.infile, 0, stat.st_size)], True, stat.st_ino
+            return [(self.infile, offset, stat.st_size)], False, stat.st_ino
+
+        # The logfile was rotated since the last run.
+        ranges = []
+        lost = False
+        if self.rotated.exists() and self.rotated.stat().st_ino == inode:
+            ranges.append((self.rotated, offset, self.rotated.stat().st_size))
+        else:
+            msg = (
+                f'Could not find the rotated logfile for {self.infile}, '
+                f'some lines may have been missed.'
+            )
+            warnings.warn(msg)
+            lost = True
+        ranges.append((self.infile, 0, stat.st_size))
+
+        return ranges, lost, stat.st_ino
+
+    def read_range(self, path, start, end):
+        """
+        Parse the complete lines between two byte offsets.  A trailing
+        partial line, still being written, is left for the next run.
+
+        Returns
+        -------
+        list
+            The parsed records.
+        int
+            The offset just past the last complete line.
+        """
+        with path.open(mode='rb') as f:
+            f.seek(start)
+            raw = f.read(end - start)
+
+        raw = raw[:raw.rfind(b'\n') + 1]
+
+        data = []
+        for idx, line in enumerate(io.TextIOWrapper(io.BytesIO(raw))):
+            item = match_line(self.regex, idx, line, self.extra_fields)
+            if item is not None:
+                data.append(item)
+
+        return data, start + len(raw)
+
+    def run(self):
+
+        logging.warning(f'Starting incremental ingest of {self.infile}')
+        t0 = time.time()
+
+        self.lock()
+        checkpoint = self.read_checkpoint()
+        ranges, lost, inode = self.pending_ranges(checkpoint)
+
+        data = []
+        budget = int(self.max_mb * 1024 * 1024)
+        for path, start, end in ranges:
+            stop = min(end, start + budget)
+            records, offset = self.read_range(path, start, stop)
+            data.extend(records)
+            budget -= offset - start
+            if stop < end:
+                # Out of budget, the next run carries on from here.
+                if path == self.rotated:
+                    inode = checkpoint[0]
+                break
+
+        df = self.records_to_dataframe(data)
+        df['ua'] = classify_useragents(df['ua'])
+
+        if lost and checkpoint[2] is not None:
+            # Anything stamped before the checkpoint was already ingested, as
+            # were the first rows stamped at it.
+            at = df['timestamp'] == checkpoint[2]
+            seen = at & (at.cumsum() <= (checkpoint[3] or 0))
+            df = df[(df['timestamp'] >= checkpoint[2]) & ~seen]
+
+        with self.conn.cursor() as cursor:
+
+            if df.shape[0] > 0:
+                for date in sorted(df['date'].unique()):
+                    self.create_hits_partition(cursor, date)
+                self.copy_to_staging(cursor, df, table='swlogs.hits')
+                last_timestamp = df['timestamp'].max().to_pydatetime()
+                last_count = int((df['timestamp'] == last_timestamp).sum())
+                if checkpoint is not None and checkpoint[2] == last_timestamp:
+                    # The second carried on from the previous run.
+                    last_count += checkpoint[3] or 0
+            else:
+                last_timestamp = None
+                last_count = None
+
+            # The offset is in the current logfile, unless the budget ran out
+            # in the rotated one.
+            self.write_checkpoint(
+                cursor, inode, offset, last_timestamp, last_count
+            )
+
+        self.conn.commit()
+
+        t1 = time.time()
+        msg = (
+            f'Ending incremental ingest, took {(t1 - t0):.1f} seconds '
+            f'to insert {df.shape[0]} rows.'
+        )
+        logging.warning(msg)
@@ -0,0 +1,52 @@
+"""
+URL categories.  Each url is classified once, when the log is parsed, into a
+small integer of bit flags that is loaded along with the log row, so that
+the summaries only need integer tests rather than regexes.
+"""
+
+# standard library imports
+
+# 3rd party library imports
+import numpy as np
+import pandas as pd
+
+# local imports
+
+# The regex that identifies each category of url.
+URL_CATEGORIES = {
+    'robots': r'/robots.txt',
+    'xmlui': r'/xmlui',
+    'sitemaps': r'/sitemap',
+    'items': r'^/items/\w{8}-\w{4}-\w{4}-\w{4}-\w{12}$',
+}
+
+# The bit of each category in the url_flags column.  These are also the
+# query parameters of the SQL files that test the flags.
+URL_FLAGS = {name: 1 << i for i, name in enumerate(URL_CATEGORIES)}
+
+
+def classify_urls(s):
+    """
+    Compute the category bit flags of a series of urls.  Each distinct url
+    is classified only once.
+
+    Parameters
+    ----------
+    s : pandas.Series
+        Raw urls
+
+    Returns
+    -------
+    pandas.Series
+        The int16 flags of each url.
+    """
+    codes, uniques = pd.factorize(s.to_numpy())
+    uniques = pd.Series(uniques, dtype=object)
+
+    flags = np.zeros(len(uniques) + 1, dtype=np.int16)
+    for name, regex in URL_CATEGORIES.items():
+        matches = uniques.str.contains(regex).fillna(False).to_numpy(bool)
+        flags[:-1][matches] |= URL_FLAGS[name]
+
+    # Missing urls have a code of -1, which picks up the trailing zero.
+    return pd.Series(flags[codes], index=s.index, name='url_flags')
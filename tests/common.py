@@ -1,5 +1,4 @@
 # standard library imports
-import importlib.resources as ir
 import unittest
 
 # 3rd party library imports
@@ -9,6 +8,10 @@ import sqlalchemy
 import testing.postgresql
 
 # local imports
+from swlogs.migrations import migration_files
+
+# The summary tables that every way of loading a logfile writes.
+SUMMARY_TABLES = ['overall', 'bots', 'ip32', 'ip24', 'ip16']
 
 
 class CommonTestCase(unittest.TestCase):
@@ -27,7 +30,7 @@ class CommonTestCase(unittest.TestCase):
         cls.conn = psycopg.connect(cls.connstr, autocommit=True)
 
         with cls.conn.cursor() as cursor:
-            for p in sorted(ir.files('swlogs.migrations').glob('*.sql')):
+            for p in migration_files():
                 text = p.read_text()
                 for statement in text.split('\n\n'):
                     cursor.execute(statement.rstrip().rstrip(';'))
@@ -60,3 +63,15 @@ class CommonTestCase(unittest.TestCase):
 
     def tearDown(self):
         pass
+
+    def read_tables(self, tables=SUMMARY_TABLES):
+        """
+        The rows of each of the tables without their ids, sorted so that two
+        loads can be compared.
+        """
+        d = {}
+        for table in tables:
+            df = pd.read_sql(f'select * from swlogs.{table}', self.engine)
+            df = df.drop(labels='id', axis='columns', errors='ignore')
+            d[table] = df.sort_values(df.columns.tolist(), ignore_index=True)
+        return d
@@ -0,0 +1,135 @@
+# standard library imports
+import importlib.resources as ir
+import pathlib
+import tempfile
+import unittest
+from unittest import mock
+
+# 3rd party library imports
+import pandas as pd
+
+# local imports
+from swlogs import archive
+from swlogs.archive import ParquetArchive
+from swlogs.loglogs import LogLogs
+from .common import CommonTestCase
+
+
+@unittest.skipIf(archive.pa is None, 'pyarrow is not installed')
+@mock.patch('swlogs.common.yaml')
+class TestSuite(CommonTestCase):
+
+    def setUp(self):
+        super().setUp()
+
+        self.tempdir = tempfile.TemporaryDirectory()
+        self.archive_dir = pathlib.Path(self.tempdir.name) / 'archive'
+
+        self.logfile = ir.files('tests.data').joinpath('two-days.log')
+
+    def tearDown(self):
+        self.tempdir.cleanup()
+
+    def read_staging(self):
+        sql = """
+            select
+                s.timestamp,
+                host(s.ip) as ip,
+                d.ua,
+                u.url,
+                s.status,
+                s.bytes,
+                s.url_flags,
+                s.date
+            from swlogs.staging s
+                join swlogs.ua_dim d on d.id = s.ua_id
+                join swlogs.url_dim u on u.id = s.url_id
+        """
+        return self.sort(pd.read_sql(sql, self.engine))
+
+    def sort(self, df):
+        return df.sort_values(df.columns.tolist()).reset_index(drop=True)
+
+    def test_round_trip(self, mock_yaml):
+        """
+        Scenario:  archive a logfile spanning two days while loading it in
+        chunks
+
+        Expected result:  the archive holds one file per day, and reading
+        it back gives the same rows as the staging table
+        """
+        mock_yaml.safe_load.return_value = {'connection_string': self.connstr}
+
+        with LogLogs(
+            self.logfile, chunksize=7, archive_dir=self.archive_dir
+        ) as o:
+            o.run()
+
+        expected = self.read_staging()
+
+        dirs = sorted(p.name for p in self.archive_dir.iterdir())
+        self.assertEqual(
+            dirs, [f'date={x}' for x in sorted(expected['date'].unique())]
+        )
+        for d in self.archive_dir.iterdir():
+            self.assertEqual(len(list(d.glob('*.parquet'))), 1)
+
+        actual = ParquetArchive(self.archive_dir).read(columns=expected.columns.tolist())  # noqa : E501
+        actual = self.sort(actual.astype({'ip': str, 'ua': str, 'url': str}))
+
+        pd.testing.assert_frame_equal(actual, expected, check_dtype=False)
+
+    def test_reload(self, mock_yaml):
+        """
+        Scenario:  archive the same logfile twice, once while computing the
+        summary in process
+
+        Expected result:  the second run replaces the files of the first
+        rather than adding to them
+        """
+        mock_yaml.safe_load.return_value = {'connection_string': self.connstr}
+
+        with LogLogs(self.logfile, archive_dir=self.archive_dir) as o:
+            o.run()
+        expected = ParquetArchive(self.archive_dir).read()
+
+        with LogLogs(
+            self.logfile, summary='in-process', archive_dir=self.archive_dir
+        ) as o:
+            o.run()
+        actual = ParquetArchive(self.archive_dir).read()
+
+        self.assertEqual(len(actual), len(expected))
+        for d in self.archive_dir.iterdir():
+            self.assertEqual(len(list(d.glob('*.parquet'))), 1)
+
+    def test_filters(self, mock_yaml):
+        """
+        Scenario:  read the archive restricted to some columns, a single
+        day, and a single user agent
+
+        Expected result:  only those columns and rows are read
+        """
+        mock_yaml.safe_load.return_value = {'connection_string': self.connstr}
+
+        with LogLogs(self.logfile, archive_dir=self.archive_dir) as o:
+            o.run()
+
+        a = ParquetArchive(self.archive_dir)
+        df = a.read()
+        date = df['date'].min()
+        ua = df['ua'].value_counts().index[0]
+
+        actual = a.read(
+            columns=['timestamp', 'ua'],
+            start_date=date,
+            end_date=date,
+            useragents=[ua]
+        )
+
+        self.assertEqual(actual.columns.tolist(), ['timestamp', 'ua'])
+        self.assertEqual(
+            len(actual), ((df['date'] == date) & (df['ua'] == ua)).sum()
+        )
+        self.assertGreater(len(actual), 0)
+        self.assertTrue((actual['ua'] == ua).all())
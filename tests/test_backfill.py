@@ -0,0 +1,94 @@
+# standard library imports
+import importlib.resources as ir
+import pathlib
+import shutil
+import tempfile
+from unittest import mock
+
+# 3rd party library imports
+import pandas as pd
+
+# local imports
+from swlogs.access_logs import PIPELINE_CHUNK_MB
+from swlogs.backfill import Backfill
+from swlogs.loglogs import LogLogs
+from .common import SUMMARY_TABLES, CommonTestCase
+
+TABLES = [*SUMMARY_TABLES, 'hourly']
+
+
+@mock.patch('swlogs.common.yaml')
+class TestSuite(CommonTestCase):
+
+    def setUp(self):
+        super().setUp()
+
+        self.tempdir = tempfile.TemporaryDirectory()
+        self.logdir = pathlib.Path(self.tempdir.name)
+
+        # Two logfiles from different days.
+        for name in ('smoke.log', '10-items.log'):
+            src = ir.files('tests.data').joinpath(name)
+            shutil.copy(src, self.logdir / f'access-{name}')
+
+    def tearDown(self):
+        self.tempdir.cleanup()
+
+    def test_backfill(self, mock_yaml):
+        """
+        Scenario:  backfill two logfiles from different days with a pool of
+        two processes, then backfill them again
+
+        Expected result:  each day is summarized the same as when its
+        logfile is loaded by itself, and the second backfill replaces the
+        rows of the first rather than adding to them
+        """
+        mock_yaml.safe_load.return_value = {'connection_string': self.connstr}
+
+        for path in sorted(self.logdir.glob('*.log')):
+            with LogLogs(path, summary='in-process', hourly=True) as o:
+                o.run()
+        expected = self.read_tables(TABLES)
+        self.assertEqual(expected['overall'].shape[0], 2)
+
+        super().setUp()
+        for _ in range(2):
+            with Backfill(self.logdir / '*.log', processes=2, hourly=True) as o:  # noqa : E501
+                o.run()
+
+        actual = self.read_tables(TABLES)
+        for table in TABLES:
+            with self.subTest(table=table):
+                pd.testing.assert_frame_equal(actual[table], expected[table])
+
+    def test_chunked(self, mock_yaml):
+        """
+        Scenario:  backfill without a chunk size, with one, and asking for
+        each logfile to be parsed at once
+
+        Expected result:  the logfiles are parsed in chunks of the default
+        size, of the given size, and whole
+        """
+        mock_yaml.safe_load.return_value = {'connection_string': self.connstr}
+
+        pattern = self.logdir / '*.log'
+        cases = [
+            ({}, PIPELINE_CHUNK_MB),
+            ({'chunk_mb': 2}, 2),
+            ({'chunked': False}, None),
+        ]
+        for kwargs, expected in cases:
+            with self.subTest(**kwargs):
+                o = Backfill(pattern, **kwargs)
+                self.assertEqual(o.options.get('chunk_mb'), expected)
+
+    def test_no_logfiles(self, mock_yaml):
+        """
+        Scenario:  backfill a glob pattern that matches nothing
+
+        Expected result:  ValueError
+        """
+        mock_yaml.safe_load.return_value = {'connection_string': self.connstr}
+
+        with self.assertRaises(ValueError):
+            Backfill(self.logdir / '*.gz')
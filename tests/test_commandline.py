@@ -1,4 +1,5 @@
 # standard library imports
+import datetime as dt
 import importlib.resources as ir
 import unittest
 from unittest import mock
@@ -14,6 +15,26 @@ from swlogs import commandline
 @mock.patch('swlogs.common.yaml')
 class TestSuite(unittest.TestCase):
 
+    def run_command(self, command, target, argv):
+        """
+        Run a command line program with the class that it drives mocked out.
+
+        Returns
+        -------
+        dict
+            The keyword arguments that the class was constructed with.
+        """
+        with (
+            mock.patch('sys.argv', new=argv),
+            mock.patch(f'swlogs.commandline.{target}') as mock_class,
+        ):
+            command()
+
+        mock_class.assert_called_once()
+        o = mock_class.return_value.__enter__.return_value
+        o.run.assert_called_once()
+        return mock_class.call_args.kwargs
+
     def test_plot_bots(self, mock_yaml, mock_psycopg, mock_sqlalchemy):
         """
         Scenario:  run command line program
@@ -199,6 +220,204 @@ class TestSuite(unittest.TestCase):
 
         self.assertTrue(True)
 
+    def test_loglogs_chunked(self, mock_yaml, mock_psycopg, mock_sqlalchemy):
+        """
+        Scenario:  run command line program, streaming in chunks
+
+        Expected result:  the chunk size reaches LogLogs
+        """
+        logfile = ir.files('tests.data').joinpath('smoke.log')
+        new = ['', '--logfile', str(logfile), '--chunksize', '10']
+
+        kwargs = self.run_command(commandline.loglogs, 'LogLogs', new)
+
+        self.assertLessEqual({'chunksize': 10}.items(), kwargs.items())
+
+    def test_loglogs_workers(self, mock_yaml, mock_psycopg, mock_sqlalchemy):
+        """
+        Scenario:  run command line program with parallel parsing
+
+        Expected result:  the number of workers reaches LogLogs
+        """
+        logfile = ir.files('tests.data').joinpath('smoke.log')
+        new = ['', '--logfile', str(logfile), '--workers', '4']
+
+        kwargs = self.run_command(commandline.loglogs, 'LogLogs', new)
+
+        self.assertLessEqual({'workers': 4}.items(), kwargs.items())
+
+    def test_loglogs_no_resolve(self, mock_yaml, mock_psycopg, mock_sqlalchemy):  # noqa : E501
+        """
+        Scenario:  run command line program without hostname resolution
+
+        Expected result:  LogLogs does not resolve hostnames
+        """
+        logfile = ir.files('tests.data').joinpath('smoke.log')
+        new = ['', '--logfile', str(logfile), '--no-resolve']
+
+        kwargs = self.run_command(commandline.loglogs, 'LogLogs', new)
+
+        expected = {'resolve_hostnames': False}
+        self.assertLessEqual(expected.items(), kwargs.items())
+
+    def test_loglogs_binary_copy(self, mock_yaml, mock_psycopg, mock_sqlalchemy):  # noqa : E501
+        """
+        Scenario:  run command line program with binary COPY
+
+        Expected result:  the COPY format reaches LogLogs
+        """
+        logfile = ir.files('tests.data').joinpath('smoke.log')
+        new = ['', '--logfile', str(logfile), '--copy-format', 'binary']
+
+        kwargs = self.run_command(commandline.loglogs, 'LogLogs', new)
+
+        self.assertLessEqual({'copy_format': 'binary'}.items(), kwargs.items())
+
+    def test_loglogs_serial_summary(self, mock_yaml, mock_psycopg, mock_sqlalchemy):  # noqa : E501
+        """
+        Scenario:  run command line program with one summary query per table
+
+        Expected result:  the summary method reaches LogLogs
+        """
+        logfile = ir.files('tests.data').joinpath('smoke.log')
+        new = ['', '--logfile', str(logfile), '--summary', 'serial']
+
+        kwargs = self.run_command(commandline.loglogs, 'LogLogs', new)
+
+        self.assertLessEqual({'summary': 'serial'}.items(), kwargs.items())
+
+    def test_loglogs_concurrent_summary(self, mock_yaml, mock_psycopg, mock_sqlalchemy):  # noqa : E501
+        """
+        Scenario:  run command line program with the summary queries run
+        concurrently
+
+        Expected result:  the summary method reaches LogLogs
+        """
+        logfile = ir.files('tests.data').joinpath('smoke.log')
+        new = ['', '--logfile', str(logfile), '--summary', 'concurrent']
+
+        kwargs = self.run_command(commandline.loglogs, 'LogLogs', new)
+
+        self.assertLessEqual({'summary': 'concurrent'}.items(), kwargs.items())
+
+    def test_loglogs_in_process_summary(self, mock_yaml, mock_psycopg, mock_sqlalchemy):  # noqa : E501
+        """
+        Scenario:  run command line program computing the summary tables in
+        python
+
+        Expected result:  the summary method reaches LogLogs
+        """
+        logfile = ir.files('tests.data').joinpath('smoke.log')
+        new = ['', '--logfile', str(logfile), '--summary', 'in-process']
+
+        kwargs = self.run_command(commandline.loglogs, 'LogLogs', new)
+
+        self.assertLessEqual({'summary': 'in-process'}.items(), kwargs.items())
+
+    def test_loglogs_keep_raw(self, mock_yaml, mock_psycopg, mock_sqlalchemy):
+        """
+        Scenario:  run command line program keeping the raw log rows for 30
+        days
+
+        Expected result:  the retention reaches LogLogs
+        """
+        logfile = ir.files('tests.data').joinpath('smoke.log')
+        new = [
+            '', '--logfile', str(logfile), '--keep-raw',
+            '--retention-days', '30'
+        ]
+
+        kwargs = self.run_command(commandline.loglogs, 'LogLogs', new)
+
+        expected = {'keep_raw': True, 'retention_days': 30}
+        self.assertLessEqual(expected.items(), kwargs.items())
+
+    def test_loglogs_tail(self, mock_yaml, mock_psycopg, mock_sqlalchemy):
+        """
+        Scenario:  run command line program incrementally ingesting a live
+        logfile
+
+        Expected result:  the logfile reaches TailLogs
+        """
+        logfile = ir.files('tests.data').joinpath('smoke.log')
+        new = ['', '--tail', str(logfile), '--no-resolve']
+
+        kwargs = self.run_command(commandline.loglogs, 'TailLogs', new)
+
+        expected = {'logfile': str(logfile), 'resolve_hostnames': False}
+        self.assertLessEqual(expected.items(), kwargs.items())
+
+    def test_loglogs_raw_date(self, mock_yaml, mock_psycopg, mock_sqlalchemy):
+        """
+        Scenario:  run command line program summarizing a day of raw log rows
+
+        Expected result:  the date reaches LogLogs
+        """
+        new = ['', '--raw-date', '2024-11-07']
+
+        kwargs = self.run_command(commandline.loglogs, 'LogLogs', new)
+
+        expected = {'raw_date': dt.date(2024, 11, 7)}
+        self.assertLessEqual(expected.items(), kwargs.items())
+
+    def test_loglogs_sketch_capacity(self, mock_yaml, mock_psycopg, mock_sqlalchemy):  # noqa : E501
+        """
+        Scenario:  run command line program with heavy hitter sketches
+
+        Expected result:  the sketch capacity reaches LogLogs
+        """
+        logfile = ir.files('tests.data').joinpath('smoke.log')
+        new = [
+            '', '--logfile', str(logfile), '--summary', 'in-process',
+            '--sketch-capacity', '1000'
+        ]
+
+        kwargs = self.run_command(commandline.loglogs, 'LogLogs', new)
+
+        expected = {'summary': 'in-process', 'sketch_capacity': 1000}
+        self.assertLessEqual(expected.items(), kwargs.items())
+
+    def test_loglogs_distinct_counts(self, mock_yaml, mock_psycopg, mock_sqlalchemy):  # noqa : E501
+        """
+        Scenario:  run command line program keeping distinct count sketches
+
+        Expected result:  LogLogs keeps the distinct counts
+        """
+        logfile = ir.files('tests.data').joinpath('smoke.log')
+        new = ['', '--logfile', str(logfile), '--distinct-counts']
+
+        kwargs = self.run_command(commandline.loglogs, 'LogLogs', new)
+
+        self.assertLessEqual({'distinct_counts': True}.items(), kwargs.items())
+
+    def test_loglogs_hourly(self, mock_yaml, mock_psycopg, mock_sqlalchemy):
+        """
+        Scenario:  run command line program keeping the hourly rollup
+
+        Expected result:  LogLogs keeps the hourly rollup
+        """
+        logfile = ir.files('tests.data').joinpath('smoke.log')
+        new = ['', '--logfile', str(logfile), '--hourly']
+
+        kwargs = self.run_command(commandline.loglogs, 'LogLogs', new)
+
+        self.assertLessEqual({'hourly': True}.items(), kwargs.items())
+
+    def test_loglogs_prefixes(self, mock_yaml, mock_psycopg, mock_sqlalchemy):
+        """
+        Scenario:  run command line program tagging the ip tables with the
+        owners of local prefixes
+
+        Expected result:  the prefix files reach LogLogs
+        """
+        logfile = ir.files('tests.data').joinpath('smoke.log')
+        new = ['', '--logfile', str(logfile), '--prefixes', 'a.csv', 'b.csv']
+
+        kwargs = self.run_command(commandline.loglogs, 'LogLogs', new)
+
+        expected = {'prefixes': ['a.csv', 'b.csv']}
+        self.assertLessEqual(expected.items(), kwargs.items())
+
     def test_loglogs_no_optional_arguments(self, mock_yaml, mock_psycopg, mock_sqlalchemy):  # noqa : E501
         """
         Scenario:  run command line program
@@ -216,3 +435,189 @@ class TestSuite(unittest.TestCase):
             commandline.loglogs()
 
         self.assertTrue(True)
+
+    def test_swlogs_live(self, mock_yaml, mock_psycopg, mock_sqlalchemy):
+        """
+        Scenario:  run the live monitor from the command line
+
+        Expected result:  the window reaches LiveMonitor
+        """
+        logfile = ir.files('tests.data').joinpath('smoke.log')
+        new = ['', 'live', '--logfile', str(logfile), '--window', '3']
+
+        kwargs = self.run_command(
+            commandline.swlogs_command, 'LiveMonitor', new
+        )
+
+        expected = {'logfile': str(logfile), 'window': 3, 'from_start': False}
+        self.assertLessEqual(expected.items(), kwargs.items())
+
+    def test_swlogs_reclassify(self, mock_yaml, mock_psycopg, mock_sqlalchemy):
+        """
+        Scenario:  rebuild the bots table for a range of dates from the
+        command line
+
+        Expected result:  the dates reach Reclassify
+        """
+        new = [
+            '', 'reclassify',
+            '--start-date', '2024-11-01', '--end-date', '2024-11-07',
+        ]
+
+        kwargs = self.run_command(
+            commandline.swlogs_command, 'Reclassify', new
+        )
+
+        expected = {
+                'start_date': dt.date(2024, 11, 1),
+                'end_date': dt.date(2024, 11, 7),
+            }
+        self.assertLessEqual(expected.items(), kwargs.items())
+
+    def test_swlogs_backfill(self, mock_yaml, mock_psycopg, mock_sqlalchemy):
+        """
+        Scenario:  backfill logfiles matching a glob pattern from the command
+        line
+
+        Expected result:  the pattern and the options reach Backfill, which parses
+        in chunks
+        """
+        new = ['', 'backfill', 'access.log.*', '--processes', '2', '--hourly']
+
+        kwargs = self.run_command(commandline.swlogs_command, 'Backfill', new)
+
+        expected = {
+            'processes': 2, 'chunked': True, 'chunk_mb': None, 'hourly': True
+        }
+        self.assertLessEqual(expected.items(), kwargs.items())
+
+    def test_swlogs_backfill_whole_file(self, mock_yaml, mock_psycopg, mock_sqlalchemy):  # noqa : E501
+        """
+        Scenario:  backfill logfiles, each parsed all at once
+
+        Expected result:  Backfill is asked not to parse in chunks
+        """
+        new = ['', 'backfill', 'access.log.*', '--whole-file']
+
+        kwargs = self.run_command(commandline.swlogs_command, 'Backfill', new)
+
+        self.assertLessEqual({'chunked': False}.items(), kwargs.items())
+
+    def test_loglogs_ua_histogram(self, mock_yaml, mock_psycopg, mock_sqlalchemy):  # noqa : E501
+        """
+        Scenario:  run command line program keeping the user agent histogram
+
+        Expected result:  LogLogs keeps the user agent histogram
+        """
+        logfile = ir.files('tests.data').joinpath('smoke.log')
+        new = ['', '--logfile', str(logfile), '--ua-histogram']
+
+        kwargs = self.run_command(commandline.loglogs, 'LogLogs', new)
+
+        self.assertLessEqual({'ua_histogram': True}.items(), kwargs.items())
+
+    def test_loglogs_pipeline(self, mock_yaml, mock_psycopg, mock_sqlalchemy):
+        """
+        Scenario:  run command line program with the pipelined ingest
+
+        Expected result:  LogLogs pipelines the ingest
+        """
+        logfile = ir.files('tests.data').joinpath('smoke.log')
+        new = ['', '--logfile', str(logfile), '--pipeline']
+
+        kwargs = self.run_command(commandline.loglogs, 'LogLogs', new)
+
+        self.assertLessEqual({'pipeline': True}.items(), kwargs.items())
+
+    def test_swreport_distinct(self, mock_yaml, mock_psycopg, mock_sqlalchemy):
+        """
+        Scenario:  report the distinct visitors of a user agent over a range
+        of dates
+
+        Expected result:  the user agent and the dates reach SWReport
+        """
+        new = [
+            '', '--useragent', 'bingbot/2.0', '--distinct',
+            '--start-date', '2024-11-01', '--date', '2024-11-07'
+        ]
+
+        kwargs = self.run_command(commandline.swreport, 'SWReport', new)
+
+        expected = {
+                'useragent': 'bingbot/2.0',
+                'distinct': True,
+                'start_date': dt.date(2024, 11, 1),
+                'thedate': dt.date(2024, 11, 7),
+            }
+        self.assertLessEqual(expected.items(), kwargs.items())
+
+    def test_swreport_hourly(self, mock_yaml, mock_psycopg, mock_sqlalchemy):
+        """
+        Scenario:  report the hourly traffic of a user agent
+
+        Expected result:  the hourly report is asked of SWReport
+        """
+        new = ['', '--hourly', '--useragent', 'bingbot/2.0']
+
+        kwargs = self.run_command(commandline.swreport, 'SWReport', new)
+
+        expected = {'hourly': True, 'useragent': 'bingbot/2.0'}
+        self.assertLessEqual(expected.items(), kwargs.items())
+
+    def test_loglogs_extra_fields(self, mock_yaml, mock_psycopg, mock_sqlalchemy):  # noqa : E501
+        """
+        Scenario:  run command line program keeping optional fields
+
+        Expected result:  the fields reach LogLogs
+        """
+        logfile = ir.files('tests.data').joinpath('smoke.log')
+        new = [
+            '',
+            '--logfile', str(logfile),
+            '--extra-fields', 'country', 'referer',
+        ]
+
+        kwargs = self.run_command(commandline.loglogs, 'LogLogs', new)
+
+        expected = {'extra_fields': ['country', 'referer']}
+        self.assertLessEqual(expected.items(), kwargs.items())
+
+    def test_loglogs_archive_dir(self, mock_yaml, mock_psycopg, mock_sqlalchemy):  # noqa : E501
+        """
+        Scenario:  run command line program writing a parquet archive
+
+        Expected result:  the archive directory reaches LogLogs
+        """
+        logfile = ir.files('tests.data').joinpath('smoke.log')
+        new = ['', '--logfile', str(logfile), '--archive-dir', 'archive']
+
+        kwargs = self.run_command(commandline.loglogs, 'LogLogs', new)
+
+        expected = {'archive_dir': 'archive'}
+        self.assertLessEqual(expected.items(), kwargs.items())
+
+    def test_swreport_countries(self, mock_yaml, mock_psycopg, mock_sqlalchemy):  # noqa : E501
+        """
+        Scenario:  report the traffic from each country
+
+        Expected result:  the countries report is asked of SWReport
+        """
+        new = ['', '--countries', '--date', '2024-11-07']
+
+        kwargs = self.run_command(commandline.swreport, 'SWReport', new)
+
+        expected = {'countries': True, 'thedate': dt.date(2024, 11, 7)}
+        self.assertLessEqual(expected.items(), kwargs.items())
+
+    def test_plot_hourly(self, mock_yaml, mock_psycopg, mock_sqlalchemy):
+        """
+        Scenario:  plot the hourly hits on a date
+
+        Expected result:  the hourly plot is asked of Plot
+        """
+        new = ['', '--hourly', '--date', '2024-11-07']
+
+        kwargs = self.run_command(commandline.plot, 'Plot', new)
+
+        expected = {'hourly': True, 'thedate': dt.date(2024, 11, 7)}
+        self.assertLessEqual(expected.items(), kwargs.items())
@@ -1,14 +1,19 @@
 # standard library imports
+import concurrent.futures
 import datetime as dt
 import importlib.resources as ir
+import pathlib
+import tempfile
 from unittest import mock
 
 # 3rd party library imports
 import pandas as pd
 
 # local imports
+from swlogs.access_logs import AccessLog
 from swlogs.loglogs import LogLogs
-from .common import CommonTestCase
+from swlogs.swreports import SWReport
+from .common import SUMMARY_TABLES, CommonTestCase
 
 
 @mock.patch('swlogs.common.yaml')
@@ -49,10 +54,15 @@ class TestSuite(CommonTestCase):
             'sitemaps': [False, False, False],
             'item_pct': [0.0, 0.0, 0.0],
             'date': [
-                dt.date.today() - dt.timedelta(days=1),
-                dt.date.today() - dt.timedelta(days=1),
-                dt.date.today() - dt.timedelta(days=1),
-            ]
+                dt.date(2024, 11, 7),
+                dt.date(2024, 11, 7),
+                dt.date(2024, 11, 7),
+            ],
+            'log_date': [
+                dt.date(2024, 11, 7),
+                dt.date(2024, 11, 7),
+                dt.date(2024, 11, 7),
+            ],
         }
         expected = pd.DataFrame(index=index, data=data)
 
@@ -75,6 +85,7 @@ class TestSuite(CommonTestCase):
         data = {
             'bytes': [1233768],
             'hits': [100],
+            'log_date': [dt.date(2024, 11, 7)],
         }
         expected = pd.DataFrame(index=index, data=data)
 
@@ -88,15 +99,22 @@ class TestSuite(CommonTestCase):
         )
 
         data = [
-            dt.date.today() - dt.timedelta(days=1),
-            dt.date.today() - dt.timedelta(days=1),
-            dt.date.today() - dt.timedelta(days=1),
+            dt.date(2024, 11, 7),
+            dt.date(2024, 11, 7),
+            dt.date(2024, 11, 7),
         ]
         index = pd.Index(data, name='date')
         data = {
             'ip': ['24.57.50.0/24', '52.167.144.0/24', '153.90.6.0/24'],
             'hits': [2, 12, 86],
-            'error_pct': [0.0, 0.0, 7.0]
+            'error_pct': [0.0, 0.0, 7.0],
+            'asn': [None, None, None],
+            'owner': [None, None, None],
+            'log_date': [
+                dt.date(2024, 11, 7),
+                dt.date(2024, 11, 7),
+                dt.date(2024, 11, 7),
+            ],
         }
         expected = pd.DataFrame(index=index, data=data)
 
@@ -112,15 +130,22 @@ class TestSuite(CommonTestCase):
         )
 
         data = [
-            dt.date.today() - dt.timedelta(days=1),
-            dt.date.today() - dt.timedelta(days=1),
-            dt.date.today() - dt.timedelta(days=1),
+            dt.date(2024, 11, 7),
+            dt.date(2024, 11, 7),
+            dt.date(2024, 11, 7),
         ]
         index = pd.Index(data, name='date')
         data = {
             'ip': ['24.57.50.45/32', '52.167.144.22/32', '153.90.6.244/32'],
             'hits': [2, 12, 86],
-            'error_pct': [0.0, 0.0, 7.0]
+            'error_pct': [0.0, 0.0, 7.0],
+            'asn': [None, None, None],
+            'owner': [None, None, None],
+            'log_date': [
+                dt.date(2024, 11, 7),
+                dt.date(2024, 11, 7),
+                dt.date(2024, 11, 7),
+            ],
         }
         expected = pd.DataFrame(index=index, data=data)
 
@@ -163,7 +188,8 @@ class TestSuite(CommonTestCase):
         Scenario:  read log file that is split over two days.  99 hits are
         from today, 1 hit from previous day
 
-        Expected result:  no errors
+        Expected result:  the overall rows are dated by the log rows, and
+        both record the day of the logfile as the one with most of the hits
         """
         mock_yaml.safe_load.return_value = {'connection_string': self.connstr}
 
@@ -183,6 +209,7 @@ class TestSuite(CommonTestCase):
         data = {
             'bytes': [9352, 1224416],
             'hits': [1, 99],
+            'log_date': [dt.date(2024, 11, 7), dt.date(2024, 11, 7)],
         }
         expected = pd.DataFrame(index=index, data=data)
 
@@ -220,13 +247,1052 @@ class TestSuite(CommonTestCase):
             'sitemaps': [False, False, False],
             'item_pct': [0.0, 0.0, 0.0],
             'date': [
-                dt.date.today() - dt.timedelta(days=1),
-                dt.date.today() - dt.timedelta(days=1),
-                dt.date.today() - dt.timedelta(days=1),
-            ]
+                dt.date(2024, 11, 7),
+                dt.date(2024, 11, 7),
+                dt.date(2024, 11, 7),
+            ],
+            'log_date': [
+                dt.date(2024, 11, 7),
+                dt.date(2024, 11, 7),
+                dt.date(2024, 11, 7),
+            ],
         }
         expected = pd.DataFrame(index=index, data=data)
 
         pd.testing.assert_frame_equal(
             actual, expected, check_exact=False, rtol=0.1
         )
+
+    def test_chunked(self, mock_yaml):
+        """
+        Scenario:  stream a log file into the database in small chunks
+
+        Expected result:  the overall and bots tables are the same as when the
+        file is read all at once
+        """
+        mock_yaml.safe_load.return_value = {'connection_string': self.connstr}
+
+        logfile = ir.files('tests.data').joinpath('two-days.log')
+        with LogLogs(logfile, chunksize=7) as o:
+            o.run()
+
+        actual = pd.read_sql(
+            'select * from swlogs.overall', self.engine, index_col='date'
+        )
+        actual = actual.drop(labels='id', axis='columns')
+
+        data = [dt.date(2024, 11, 6), dt.date(2024, 11, 7)]
+        index = pd.Index(data, name='date')
+        data = {
+            'bytes': [9352, 1224416],
+            'hits': [1, 99],
+            'log_date': [dt.date(2024, 11, 7), dt.date(2024, 11, 7)],
+        }
+        expected = pd.DataFrame(index=index, data=data)
+
+        pd.testing.assert_frame_equal(actual, expected)
+
+    def test_chunked_by_megabytes(self, mock_yaml):
+        """
+        Scenario:  stream a log file into the database in chunks bounded by
+        size rather than rows
+
+        Expected result:  the bots table is the same as when the file is read
+        all at once
+        """
+        mock_yaml.safe_load.return_value = {'connection_string': self.connstr}
+
+        logfile = ir.files('tests.data').joinpath('smoke.log')
+        with LogLogs(logfile, chunk_mb=0.002) as o:
+            o.run()
+
+        actual = pd.read_sql(
+            'select ua, hits from swlogs.bots order by hits desc',
+            self.engine,
+            index_col='ua'
+        )
+
+        data = [
+            'dspace-internal', 'bingbot/2.0', "Safari/iOS/WebKit/iPhone"
+        ]
+        index = pd.Index(data, name='ua')
+        expected = pd.DataFrame(index=index, data={'hits': [86, 12, 2]})
+
+        pd.testing.assert_frame_equal(actual, expected)
+
+    def test_parallel_parse(self, mock_yaml):
+        """
+        Scenario:  parse a log file with a pool of worker processes, using
+        byte ranges small enough that several ranges are needed
+
+        Expected result:  the overall and bots tables are the same as when the
+        file is parsed serially
+        """
+        mock_yaml.safe_load.return_value = {'connection_string': self.connstr}
+
+        logfile = ir.files('tests.data').joinpath('two-days.log')
+        with (
+            mock.patch('swlogs.access_logs.MIN_BYTE_RANGE', new=1024),
+            LogLogs(logfile, chunk_mb=0.002, workers=2) as o,
+        ):
+            o.run()
+
+        actual = pd.read_sql(
+            'select * from swlogs.overall', self.engine, index_col='date'
+        )
+        actual = actual.drop(labels='id', axis='columns')
+
+        data = [dt.date(2024, 11, 6), dt.date(2024, 11, 7)]
+        index = pd.Index(data, name='date')
+        data = {
+            'bytes': [9352, 1224416],
+            'hits': [1, 99],
+            'log_date': [dt.date(2024, 11, 7), dt.date(2024, 11, 7)],
+        }
+        expected = pd.DataFrame(index=index, data=data)
+
+        pd.testing.assert_frame_equal(actual, expected)
+
+    def test_parallel_parse_bounded(self, mock_yaml):
+        """
+        Scenario:  parse a log file of many byte ranges with a pool of two
+        workers, but only take the first range
+
+        Expected result:  only a couple of ranges per worker have been
+        submitted to the pool
+        """
+        mock_yaml.safe_load.return_value = {'connection_string': self.connstr}
+
+        submitted = []
+
+        class Executor(concurrent.futures.ThreadPoolExecutor):
+            def submit(self, fn, *args, **kwargs):
+                submitted.append(args)
+                return super().submit(fn, *args, **kwargs)
+
+        logfile = ir.files('tests.data').joinpath('two-days.log')
+        with (
+            mock.patch('swlogs.access_logs.MIN_BYTE_RANGE', new=1024),
+            mock.patch(
+                'swlogs.access_logs.concurrent.futures.ProcessPoolExecutor',
+                new=Executor
+            ),
+            AccessLog(logfile, chunk_mb=0.001, workers=2) as o,
+        ):
+            it = o.iter_records_parallel()
+            next(it)
+            it.close()
+
+        self.assertEqual(len(submitted), 4)
+
+    def test_parallel_parse_chunksize(self, mock_yaml):
+        """
+        Scenario:  ask for a parallel parse in chunks of a number of rows
+
+        Expected result:  ValueError, the chunks are byte ranges
+        """
+        mock_yaml.safe_load.return_value = {'connection_string': self.connstr}
+
+        logfile = ir.files('tests.data').joinpath('two-days.log')
+        with self.assertRaises(ValueError):
+            AccessLog(logfile, chunksize=7, workers=2)
+
+    def test_binary_copy(self, mock_yaml):
+        """
+        Scenario:  load the raw log rows with binary COPY
+
+        Expected result:  the staging table holds the same rows as with CSV
+        COPY
+        """
+        mock_yaml.safe_load.return_value = {'connection_string': self.connstr}
+
+        logfile = ir.files('tests.data').joinpath('smoke.log')
+        sql = 'select * from swlogs.staging order by timestamp, url_id, ip'
+
+        with LogLogs(logfile) as o:
+            o.run()
+        expected = pd.read_sql(sql, self.engine)
+
+        with LogLogs(logfile, copy_format='binary') as o:
+            o.run()
+        actual = pd.read_sql(sql, self.engine)
+
+        pd.testing.assert_frame_equal(actual, expected)
+
+    def test_single_scan_summary(self, mock_yaml):
+        """
+        Scenario:  compute the summary tables with a single scan of staging
+
+        Expected result:  the summary tables are the same as when each one is
+        computed with its own query
+        """
+        mock_yaml.safe_load.return_value = {'connection_string': self.connstr}
+
+        for name in ['smoke.log', '10-items.log', 'two-days.log']:
+
+            logfile = ir.files('tests.data').joinpath(name)
+
+            with LogLogs(logfile, summary='serial') as o:
+                o.run()
+            expected = self.read_tables()
+
+            self.setUp()
+
+            with LogLogs(logfile) as o:
+                o.run()
+            actual = self.read_tables()
+
+            self.setUp()
+
+            for table in SUMMARY_TABLES:
+                with self.subTest(logfile=name, table=table):
+                    pd.testing.assert_frame_equal(
+                        actual[table], expected[table]
+                    )
+
+    def test_in_process_summary(self, mock_yaml):
+        """
+        Scenario:  compute the summary tables in python while parsing, both
+        all at once and in chunks
+
+        Expected result:  the summary tables are the same as when they are
+        computed from the staging table, and the staging table is not used
+        """
+        mock_yaml.safe_load.return_value = {'connection_string': self.connstr}
+
+        for name in ['smoke.log', '10-items.log', 'two-days.log']:
+
+            logfile = ir.files('tests.data').joinpath(name)
+
+            with LogLogs(logfile) as o:
+                o.run()
+            expected = self.read_tables()
+
+            for chunksize in [None, 7]:
+
+                self.setUp()
+
+                with LogLogs(
+                    logfile, chunksize=chunksize, summary='in-process'
+                ) as o:
+                    o.run()
+                actual = self.read_tables()
+
+                df = pd.read_sql('select * from swlogs.staging', self.engine)
+                self.assertEqual(df.shape[0], 0)
+
+                for table in SUMMARY_TABLES:
+                    with self.subTest(
+                        logfile=name, chunksize=chunksize, table=table
+                    ):
+                        pd.testing.assert_frame_equal(
+                            actual[table], expected[table]
+                        )
+
+            self.setUp()
+
+    def test_concurrent_summary(self, mock_yaml):
+        """
+        Scenario:  run the summary queries concurrently
+
+        Expected result:  the summary tables are the same as when the queries
+        are run one at a time
+        """
+        mock_yaml.safe_load.return_value = {'connection_string': self.connstr}
+
+        logfile = ir.files('tests.data').joinpath('two-days.log')
+
+        with LogLogs(logfile, summary='serial') as o:
+            o.run()
+        expected = self.read_tables()
+
+        self.setUp()
+
+        with LogLogs(logfile, summary='concurrent') as o:
+            o.run()
+        actual = self.read_tables()
+
+        for table in SUMMARY_TABLES:
+            with self.subTest(table=table):
+                self.assertGreater(actual[table].shape[0], 0)
+                pd.testing.assert_frame_equal(actual[table], expected[table])
+
+    def test_keep_raw(self, mock_yaml):
+        """
+        Scenario:  keep the raw rows of a logfile spanning two days, then load
+        the same logfile again
+
+        Expected result:  the rows land in one partition per day, and the
+        second load replaces the rows of the first rather than duplicating
+        them
+        """
+        mock_yaml.safe_load.return_value = {'connection_string': self.connstr}
+
+        logfile = ir.files('tests.data').joinpath('two-days.log')
+
+        sql = """
+            select tableoid::regclass::text as partition, count(*) as hits
+            from swlogs.hits
+            group by 1
+            order by 1
+        """
+
+        with LogLogs(logfile, keep_raw=True) as o:
+            o.run()
+        expected = pd.read_sql(sql, self.engine)
+
+        with LogLogs(logfile, keep_raw=True) as o:
+            o.run()
+        actual = pd.read_sql(sql, self.engine)
+
+        pd.testing.assert_frame_equal(actual, expected)
+
+        staging = pd.read_sql('select * from swlogs.staging', self.engine)
+        self.assertEqual(actual['hits'].sum(), staging.shape[0])
+        self.assertEqual(
+            actual['partition'].str.startswith('hits_').tolist(),
+            [True, True]
+        )
+
+    def test_retention(self, mock_yaml):
+        """
+        Scenario:  load a logfile with a retention period when there is a
+        partition older than that period and one newer
+
+        Expected result:  the old partition is dropped, the newer one is kept
+        """
+        mock_yaml.safe_load.return_value = {'connection_string': self.connstr}
+
+        logfile = ir.files('tests.data').joinpath('smoke.log')
+
+        old = dt.date.today() - dt.timedelta(days=31)
+        new = dt.date.today() - dt.timedelta(days=1)
+
+        with LogLogs(logfile, retention_days=30) as o:
+            with o.conn.cursor() as cursor:
+                o.create_hits_partition(cursor, old)
+                o.create_hits_partition(cursor, new)
+            o.conn.commit()
+            o.run()
+
+        sql = """
+            select c.relname
+            from pg_inherits i
+                join pg_class c on c.oid = i.inhrelid
+            where i.inhparent = 'swlogs.hits'::regclass
+        """
+        df = pd.read_sql(sql, self.engine)
+        self.assertEqual(df['relname'].tolist(), [f'hits_{new:%Y%m%d}'])
+
+    def test_sketch_summary(self, mock_yaml):
+        """
+        Scenario:  compute the summary tables in python with heavy hitter
+        sketches with room for every distinct key
+
+        Expected result:  the summary tables are the same as the exact ones
+        computed by the SQL
+        """
+        mock_yaml.safe_load.return_value = {'connection_string': self.connstr}
+
+        for name in ['smoke.log', '10-items.log', 'two-days.log']:
+
+            logfile = ir.files('tests.data').joinpath(name)
+
+            with LogLogs(logfile) as o:
+                o.run()
+            expected = self.read_tables()
+
+            self.setUp()
+
+            with LogLogs(
+                logfile, chunksize=7, summary='in-process', sketch_capacity=100
+            ) as o:
+                o.run()
+            actual = self.read_tables()
+
+            self.setUp()
+
+            for table in SUMMARY_TABLES:
+                with self.subTest(logfile=name, table=table):
+                    pd.testing.assert_frame_equal(
+                        actual[table], expected[table]
+                    )
+
+    def test_distinct_counts(self, mock_yaml):
+        """
+        Scenario:  keep sketches of the distinct ips and items of the top user
+        agents, then report on a user agent
+
+        Expected result:  the estimates match the exact distinct counts from
+        the staging table
+        """
+        mock_yaml.safe_load.return_value = {'connection_string': self.connstr}
+
+        logfile = ir.files('tests.data').joinpath('10-items.log')
+        with LogLogs(logfile, chunksize=7, distinct_counts=True) as o:
+            o.run()
+
+        sql = r"""
+            select
+                b.ua,
+                count(distinct s.ip) as ips,
+                count(distinct s.url_id) filter (
+                    where u.url ~ '^/items/\w{8}-\w{4}-\w{4}-\w{4}-\w{12}$'
+                ) as items
+            from swlogs.bots b
+                join swlogs.ua_dim d on d.ua = b.ua
+                join swlogs.staging s on s.ua_id = d.id
+                join swlogs.url_dim u on u.id = s.url_id
+            group by b.ua
+            order by b.ua
+        """
+        expected = pd.read_sql(sql, self.engine)
+        self.assertGreater(expected['items'].max(), 0)
+
+        date = dt.date(2024, 11, 10)
+        for ua, ips, items in expected.itertuples(index=False):
+            with self.subTest(ua=ua):
+                with SWReport(useragent=ua, distinct=True) as o:
+                    daily, totals = o.run_distinct_report()
+                self.assertEqual(totals, {'ips': ips, 'items': items})
+                self.assertEqual(daily.index.tolist(), [date])
+
+    def test_hourly(self, mock_yaml):
+        """
+        Scenario:  keep the hourly rollup while loading a logfile spanning two
+        days, then report on one of the days
+
+        Expected result:  the rollup matches the hourly counts of the staging
+        table, and the report covers only the hours of the requested day
+        """
+        mock_yaml.safe_load.return_value = {'connection_string': self.connstr}
+
+        logfile = ir.files('tests.data').joinpath('two-days.log')
+        with LogLogs(logfile, chunksize=7, hourly=True) as o:
+            o.run()
+
+        sql = """
+            select
+                d.ua,
+                date_trunc('hour', timestamp) as hour,
+                count(*) as hits,
+                sum(bytes) as bytes,
+                sum((status > 399)::int) as errors,
+                sum((status = 429)::int) as c429
+            from swlogs.staging
+                join swlogs.ua_dim d on d.id = ua_id
+            group by 1, 2
+            order by 1, 2
+        """
+        expected = pd.read_sql(sql, self.engine)
+
+        sql = """
+            select ua, hour, hits, bytes, errors, c429
+            from swlogs.hourly
+            order by ua, hour
+        """
+        actual = pd.read_sql(sql, self.engine)
+
+        pd.testing.assert_frame_equal(actual, expected, check_dtype=False)
+
+        date = expected['hour'].dt.date.min()
+        with SWReport(hourly=True, thedate=date) as o:
+            df = o.run_hourly_report()
+
+        self.assertEqual(
+            df['hits'].sum(),
+            expected.loc[expected['hour'].dt.date == date, 'hits'].sum()
+        )
+
+    def test_hourly_reload(self, mock_yaml):
+        """
+        Scenario:  keep the hourly rollup while loading a logfile twice
+
+        Expected result:  the second load replaces the hours of the first
+        rather than adding to them
+        """
+        mock_yaml.safe_load.return_value = {'connection_string': self.connstr}
+
+        sql = 'select * from swlogs.hourly order by ua, hour'
+
+        logfile = ir.files('tests.data').joinpath('two-days.log')
+        with LogLogs(logfile, hourly=True) as o:
+            o.run()
+        expected = pd.read_sql(sql, self.engine)
+
+        with LogLogs(logfile, hourly=True) as o:
+            o.run()
+        actual = pd.read_sql(sql, self.engine)
+
+        pd.testing.assert_frame_equal(actual, expected)
+
+    def test_url_flags(self, mock_yaml):
+        """
+        Scenario:  load a logfile with both COPY formats
+
+        Expected result:  the url flags loaded into the staging table agree
+        with matching the urls against the category regexes in postgresql
+        """
+        mock_yaml.safe_load.return_value = {'connection_string': self.connstr}
+
+        logfile = ir.files('tests.data').joinpath('10-items.log')
+
+        sql = """
+            select
+                url_flags,
+                (u.url ~ '/robots.txt')::int
+                + 2 * (u.url ~ '/xmlui')::int
+                + 4 * (u.url ~ '/sitemap')::int
+                + 8 * (u.url ~ '^/items/\\w{8}-\\w{4}-\\w{4}-\\w{4}-\\w{12}$')::int
+                    as expected
+            from swlogs.staging
+                join swlogs.url_dim u on u.id = url_id
+        """
+
+        for copy_format in ('csv', 'binary'):
+            with self.subTest(copy_format=copy_format):
+                with LogLogs(logfile, copy_format=copy_format) as o:
+                    o.run()
+                df = pd.read_sql(sql, self.engine)
+                self.assertGreater(df['url_flags'].sum(), 0)
+                pd.testing.assert_series_equal(
+                    df['url_flags'], df['expected'], check_names=False,
+                    check_dtype=False
+                )
+
+    def test_prefixes(self, mock_yaml):
+        """
+        Scenario:  tag the ip tables with the owners of local prefixes
+
+        Expected result:  each row gets the most specific prefix containing
+        the whole address or network
+        """
+        mock_yaml.safe_load.return_value = {'connection_string': self.connstr}
+
+        logfile = ir.files('tests.data').joinpath('smoke.log')
+        prefixes = ir.files('tests.data').joinpath('prefixes.csv')
+        with LogLogs(logfile, prefixes=prefixes) as o:
+            o.run()
+
+        expected = {
+            'ip32': {
+                '24.57.50.45/32': (5645, 'TekSavvy'),
+                '52.167.144.22/32': (8075, 'Bingbot'),
+                '153.90.6.244/32': (11044, 'Montana State University'),
+            },
+            'ip24': {
+                '24.57.50.0/24': (5645, 'TekSavvy'),
+                '52.167.144.0/24': (8075, 'Bingbot'),
+                '153.90.6.0/24': (11044, 'Montana State University'),
+            },
+            'ip16': {
+                '24.57.0.0/16': (5645, 'TekSavvy'),
+                '52.167.0.0/16': (8075, 'Microsoft'),
+                '153.90.0.0/16': (11044, 'Montana State University'),
+            },
+        }
+        for table in expected:
+            with self.subTest(table=table):
+                df = pd.read_sql(
+                    f'select ip::text as ip, asn, owner from swlogs.{table}',
+                    self.engine
+                )
+                actual = {
+                    ip: (asn, owner)
+                    for ip, asn, owner in df.itertuples(index=False)
+                }
+                self.assertEqual(actual, expected[table])
+
+    def test_prefixes_blank_owner(self, mock_yaml):
+        """
+        Scenario:  tag the ip tables with a prefix that has an asn but a
+        blank owner, then load another logfile
+
+        Expected result:  the rows in the prefix get the asn and a null
+        owner, and the rows of the first logfile are left as they were
+        """
+        mock_yaml.safe_load.return_value = {'connection_string': self.connstr}
+
+        with tempfile.TemporaryDirectory() as tempdir:
+
+            prefixes = pathlib.Path(tempdir) / 'prefixes.csv'
+            prefixes.write_text(
+                'prefix,asn,owner\n'
+                '153.90.6.0/24,11044,\n'
+            )
+
+            logfile = ir.files('tests.data').joinpath('smoke.log')
+            with LogLogs(logfile, prefixes=prefixes) as o:
+                o.run()
+
+            # A prefix that would match the rows of the first logfile too.
+            prefixes.write_text(
+                'prefix,asn,owner\n'
+                '0.0.0.0/0,,everything\n'
+            )
+
+            logfile = ir.files('tests.data').joinpath('10-items.log')
+            with LogLogs(logfile, prefixes=prefixes) as o:
+                o.run()
+
+        sql = """
+            select ip::text as ip, asn, owner
+            from swlogs.ip32
+            where log_date = %(date)s
+        """
+        params = {'date': dt.date(2024, 11, 7)}
+        df = pd.read_sql(sql, self.engine, params=params)
+        actual = {
+            ip: (None if pd.isna(asn) else asn, owner)
+            for ip, asn, owner in df.itertuples(index=False)
+        }
+
+        expected = {
+            '24.57.50.45/32': (None, None),
+            '52.167.144.22/32': (None, None),
+            '153.90.6.244/32': (11044, None),
+        }
+        self.assertEqual(actual, expected)
+
+    def test_countries(self, mock_yaml):
+        """
+        Scenario:  keep the country field of a logfile, summarizing in the
+        database and in python
+
+        Expected result:  the traffic from each country is summarized, with
+        a null country where the log did not know it
+        """
+        mock_yaml.safe_load.return_value = {'connection_string': self.connstr}
+
+        logfile = ir.files('tests.data').joinpath('countries.log')
+
+        sql = """
+            select country, hits, errors, c429
+            from swlogs.countries
+            order by hits desc, country
+        """
+
+        expected = pd.DataFrame({
+            'country': ['US', 'DE', None, 'BR', 'CN'],
+            'hits': [8, 4, 4, 2, 2],
+            'errors': [1, 0, 1, 0, 1],
+            'c429': [0, 0, 0, 0, 0],
+        })
+
+        for summary in ('single-scan', 'in-process'):
+            with self.subTest(summary=summary):
+                super().setUp()
+                with LogLogs(
+                    logfile, summary=summary, extra_fields=['country']
+                ) as o:
+                    o.run()
+                actual = pd.read_sql(sql, self.engine)
+                pd.testing.assert_frame_equal(actual, expected)
+
+    def test_extra_fields(self, mock_yaml):
+        """
+        Scenario:  load all of the optional fields with both COPY formats
+
+        Expected result:  the optional fields are in the staging table, and
+        the usual fields are the same as without them
+        """
+        mock_yaml.safe_load.return_value = {'connection_string': self.connstr}
+
+        logfile = ir.files('tests.data').joinpath('countries.log')
+
+        with LogLogs(logfile) as o:
+            o.run()
+        sql = 'select * from swlogs.staging order by timestamp, url_id'
+        expected = pd.read_sql(sql, self.engine)
+        self.assertTrue(expected['country'].isna().all())
+
+        extra_fields = ['country', 'referer', 'query_string', 'content_type', 'remote_port']  # noqa : E501
+        for copy_format in ('csv', 'binary'):
+            with self.subTest(copy_format=copy_format):
+                with LogLogs(
+                    logfile, copy_format=copy_format, extra_fields=extra_fields
+                ) as o:
+                    o.run()
+                actual = pd.read_sql(sql, self.engine)
+
+                pd.testing.assert_frame_equal(
+                    actual.drop(labels=extra_fields, axis='columns'),
+                    expected.drop(labels=extra_fields, axis='columns')
+                )
+                self.assertEqual(actual['country'].notna().sum(), 16)
+                self.assertEqual((actual['remote_port'] == 443).sum(), 2)
+                self.assertEqual((actual['content_type'] == 'text/html').sum(), 2)  # noqa : E501
+                self.assertEqual((actual['referer'] == '-').sum(), 20)
+                self.assertGreater(actual['query_string'].notna().sum(), 0)
+
+    def test_dimensions(self, mock_yaml):
+        """
+        Scenario:  load the same logfile twice, once with each COPY format
+
+        Expected result:  each distinct user agent and url is added to its
+        dimension table only once, the second load reuses the keys of the
+        first, and every staging row has both keys
+        """
+        mock_yaml.safe_load.return_value = {'connection_string': self.connstr}
+
+        logfile = ir.files('tests.data').joinpath('10-items.log')
+
+        sql = """
+            select
+                (select count(*) from swlogs.ua_dim) as ua_dim,
+                (select count(*) from swlogs.url_dim) as url_dim,
+                count(distinct ua_id) as ua_ids,
+                count(distinct url_id) as url_ids,
+                count(*) filter (
+                    where ua_id is null or url_id is null
+                ) as missing
+            from swlogs.staging
+        """
+
+        keys_sql = """
+            select d.ua, u.url, s.ua_id, s.url_id
+            from swlogs.staging s
+                join swlogs.ua_dim d on d.id = s.ua_id
+                join swlogs.url_dim u on u.id = s.url_id
+            order by s.timestamp, s.ip, s.url_id
+        """
+
+        keys = []
+        for copy_format in ('csv', 'binary'):
+            with self.subTest(copy_format=copy_format):
+                with LogLogs(logfile, copy_format=copy_format) as o:
+                    o.run()
+
+                counts = pd.read_sql(sql, self.engine).iloc[0]
+                self.assertEqual(counts['missing'], 0)
+                self.assertEqual(counts['ua_dim'], counts['ua_ids'])
+                self.assertEqual(counts['url_dim'], counts['url_ids'])
+                self.assertGreater(counts['url_dim'], 1)
+
+                keys.append(pd.read_sql(keys_sql, self.engine))
+
+        pd.testing.assert_frame_equal(keys[0], keys[1])
+
+    def test_reload(self, mock_yaml):
+        """
+        Scenario:  load the same logfile twice, computing the summary both in
+        postgresql and in process
+
+        Expected result:  the second load replaces the summary rows of the
+        logfile's day rather than adding to them
+        """
+        mock_yaml.safe_load.return_value = {'connection_string': self.connstr}
+
+        logfile = ir.files('tests.data').joinpath('smoke.log')
+
+        tables = [*SUMMARY_TABLES, 'countries']
+
+        for summary in ('single-scan', 'in-process'):
+            with self.subTest(summary=summary):
+                self.setUp()
+
+                with LogLogs(logfile, summary=summary) as o:
+                    o.run()
+                expected = self.read_tables(tables)
+                self.assertEqual(o.log_date, dt.date(2024, 11, 7))
+
+                with LogLogs(logfile, summary=summary) as o:
+                    o.run()
+                actual = self.read_tables(tables)
+
+                for table in tables:
+                    pd.testing.assert_frame_equal(
+                        actual[table], expected[table]
+                    )
+
+    def test_reload_from_before_log_date(self, mock_yaml):
+        """
+        Scenario:  the overall row of a day was stored before the rows
+        recorded the day of their logfile, then the migration is applied and
+        the day's logfile is loaded again
+
+        Expected result:  the old row is replaced rather than added to
+        """
+        mock_yaml.safe_load.return_value = {'connection_string': self.connstr}
+
+        logfile = ir.files('tests.data').joinpath('smoke.log')
+        with LogLogs(logfile) as o:
+            o.run()
+        expected = self.read_tables(['overall'])['overall']
+
+        migration = ir.files('swlogs.migrations').joinpath('migration13.sql')
+        with self.conn.cursor() as cursor:
+            cursor.execute('update swlogs.overall set log_date = null')
+            for statement in migration.read_text().split('\n\n'):
+                cursor.execute(statement.rstrip().rstrip(';'))
+
+        with LogLogs(logfile) as o:
+            o.run()
+        actual = self.read_tables(['overall'])['overall']
+
+        pd.testing.assert_frame_equal(actual, expected)
+
+    def test_reload_without_options(self, mock_yaml):
+        """
+        Scenario:  load a logfile keeping every optional summary table, then
+        load it again without them
+
+        Expected result:  the optional tables of the first load are kept,
+        only the tables that the second load writes are replaced
+        """
+        mock_yaml.safe_load.return_value = {'connection_string': self.connstr}
+
+        logfile = ir.files('tests.data').joinpath('countries.log')
+
+        tables = ['hourly', 'ua_histogram', 'bots_distinct', 'countries']
+        sql = ' union all '.join(
+            f"select '{table}' as name, count(*) as n from swlogs.{table}"
+            for table in tables
+        )
+
+        with LogLogs(
+            logfile,
+            hourly=True,
+            ua_histogram=True,
+            distinct_counts=True,
+            extra_fields=['country']
+        ) as o:
+            o.run()
+        expected = pd.read_sql(sql, self.engine)
+        self.assertTrue((expected['n'] > 0).all())
+
+        with LogLogs(logfile) as o:
+            o.run()
+        actual = pd.read_sql(sql, self.engine)
+
+        pd.testing.assert_frame_equal(actual, expected)
+
+    def test_unresolved_hostnames(self, mock_yaml):
+        """
+        Scenario:  load a logfile whose busiest client is logged by
+        hostname, without resolving it, computing the summary each of the
+        ways
+
+        Expected result:  the tables are the same each way, and the errors
+        of the null ip are counted
+        """
+        mock_yaml.safe_load.return_value = {'connection_string': self.connstr}
+
+        text = ir.files('tests.data').joinpath('smoke.log').read_text()
+
+        with tempfile.TemporaryDirectory() as tempdir:
+
+            logfile = pathlib.Path(tempdir) / 'access.log'
+            logfile.write_text(
+                text.replace('153.90.6.244', 'crawler.bots.example.com')
+            )
+
+            tables = {}
+            for summary in ('single-scan', 'serial', 'concurrent', 'in-process'):  # noqa : E501
+                self.setUp()
+                with LogLogs(
+                    logfile, summary=summary, resolve_hostnames=False
+                ) as o:
+                    o.run()
+                tables[summary] = self.read_tables()
+
+        for summary in ('serial', 'concurrent', 'in-process'):
+            for table in SUMMARY_TABLES:
+                with self.subTest(summary=summary, table=table):
+                    pd.testing.assert_frame_equal(
+                        tables[summary][table], tables['single-scan'][table]
+                    )
+
+        df = tables['serial']['ip32']
+        error_pct = df.loc[df['ip'].isnull(), 'error_pct'].tolist()
+        self.assertEqual(len(error_pct), 1)
+        self.assertAlmostEqual(error_pct[0], 6 / 86 * 100, places=4)
+
+    def test_days_of_split_logfile(self, mock_yaml):
+        """
+        Scenario:  load a logfile that spans midnight, computing the summary
+        each of the ways
+
+        Expected result:  each table has rows for both days, dated by the
+        log rows and recording the day of the logfile
+        """
+        mock_yaml.safe_load.return_value = {'connection_string': self.connstr}
+
+        logfile = ir.files('tests.data').joinpath('two-days.log')
+
+        sql = """
+            select date, log_date, sum(hits) as hits
+            from swlogs.{table}
+            group by date, log_date
+            order by date
+        """
+
+        data = {
+            'date': [dt.date(2024, 11, 6), dt.date(2024, 11, 7)],
+            'log_date': [dt.date(2024, 11, 7), dt.date(2024, 11, 7)],
+            'hits': [1, 99],
+        }
+        expected = pd.DataFrame(data)
+
+        for summary in ('single-scan', 'serial', 'concurrent', 'in-process'):
+            self.setUp()
+
+            with LogLogs(logfile, summary=summary) as o:
+                o.run()
+
+            for table in ('overall', 'bots', 'ip32', 'ip24', 'ip16'):
+                with self.subTest(summary=summary, table=table):
+                    actual = pd.read_sql(sql.format(table=table), self.engine)
+                    pd.testing.assert_frame_equal(
+                        actual, expected, check_dtype=False
+                    )
+
+    def test_end_of_daylight_saving_time(self, mock_yaml):
+        """
+        Scenario:  load a logfile from the day that daylight saving time
+        ends, so that it has two UTC offsets, each of the ways, while
+        keeping the hourly rollup and the user agent histogram
+
+        Expected result:  every row is on the log-local date, and the hours
+        are the same instants under either offset
+        """
+        mock_yaml.safe_load.return_value = {'connection_string': self.connstr}
+
+        logfile = ir.files('tests.data').joinpath('dst.log')
+        date = dt.date(2024, 11, 3)
+
+        cases = [
+            {'summary': 'single-scan'},
+            {'summary': 'serial'},
+            {'summary': 'concurrent'},
+            {'summary': 'in-process'},
+            {'summary': 'single-scan', 'copy_format': 'binary'},
+            {'summary': 'in-process', 'chunksize': 7},
+        ]
+        for kwargs in cases:
+            self.setUp()
+
+            with LogLogs(
+                logfile, hourly=True, ua_histogram=True, **kwargs
+            ) as o:
+                o.run()
+
+            with self.subTest(**kwargs):
+                sql = 'select date, hits from swlogs.overall'
+                actual = pd.read_sql(sql, self.engine)
+                self.assertEqual(actual.values.tolist(), [[date, 100]])
+
+                sql = 'select sum(hits) from swlogs.ua_histogram where date = %(date)s'  # noqa : E501
+                actual = pd.read_sql(sql, self.engine, params={'date': date})
+                self.assertEqual(actual.iloc[0, 0], 100)
+
+                sql = """
+                    select hour at time zone 'UTC' as hour, sum(hits) as hits
+                    from swlogs.hourly
+                    group by 1
+                    order by 1
+                """
+                actual = pd.read_sql(sql, self.engine)
+                expected = pd.DataFrame({
+                    'hour': pd.to_datetime(
+                        ['2024-11-03 07:00', '2024-11-03 08:00']
+                    ),
+                    'hits': [50, 50],
+                })
+                pd.testing.assert_frame_equal(
+                    actual, expected, check_dtype=False
+                )
+
+    def test_merge_split_day(self, mock_yaml):
+        """
+        Scenario:  load the logfile of a day, then the next logfile which has
+        the last hit of that day, then the next logfile again
+
+        Expected result:  the reports merge the rows of the day from both
+        logfiles, and reloading the next logfile does not count its part of
+        the day twice
+        """
+        mock_yaml.safe_load.return_value = {'connection_string': self.connstr}
+
+        logfile = ir.files('tests.data').joinpath('two-days.log')
+        lines = logfile.read_text().splitlines(keepends=True)
+
+        with tempfile.TemporaryDirectory() as tempdir:
+
+            # The logfile of the first day, with just the one hit.
+            first = pathlib.Path(tempdir) / 'access.log.2'
+            first.write_text(lines[0])
+
+            with LogLogs(first) as o:
+                o.run()
+            with LogLogs(logfile, summary='in-process') as o:
+                o.run()
+
+            date = dt.date(2024, 11, 6)
+            with SWReport(thedate=date) as o:
+                bots = o.run_bots_report()
+            with SWReport(thedate=date, ip32=True) as o:
+                ip32 = o.run_ip32_report()
+
+            self.assertEqual(bots.shape[0], 1)
+            self.assertEqual(bots['hits'].tolist(), [2])
+            self.assertEqual(ip32['hits'].tolist(), [2])
+
+            with LogLogs(logfile) as o:
+                o.run()
+
+            with SWReport(thedate=date) as o:
+                actual = o.run_bots_report()
+
+            pd.testing.assert_frame_equal(actual, bots)
+
+    def test_pipeline(self, mock_yaml):
+        """
+        Scenario:  load logfiles with the pipelined ingest, into the staging
+        table and in process, from a gzipped logfile and with a pool of
+        worker processes
+
+        Expected result:  the staging table and the summary tables are the
+        same as when the logfiles are loaded one step at a time
+        """
+        mock_yaml.safe_load.return_value = {'connection_string': self.connstr}
+
+        staging_sql = """
+            select s.timestamp, host(s.ip) as ip, d.ua, s.status, s.bytes
+            from swlogs.staging s
+                join swlogs.ua_dim d on d.id = s.ua_id
+            order by s.timestamp, s.ip, d.ua, s.status, s.bytes
+        """
+
+        cases = [
+            ('gzipped.log.gz', 'single-scan', {'chunksize': 7}),
+            ('gzipped.log.gz', 'in-process', {}),
+            ('two-days.log', 'single-scan', {'chunk_mb': 0.002, 'workers': 2}),  # noqa : E501
+        ]
+        for name, summary, kwargs in cases:
+
+            logfile = ir.files('tests.data').joinpath(name)
+
+            self.setUp()
+            with LogLogs(logfile, summary=summary) as o:
+                o.run()
+            expected = self.read_tables()
+            expected_staging = pd.read_sql(staging_sql, self.engine)
+
+            self.setUp()
+            with (
+                mock.patch('swlogs.access_logs.MIN_BYTE_RANGE', new=1024),
+                LogLogs(
+                    logfile, summary=summary, pipeline=True, **kwargs
+                ) as o,
+            ):
+                o.run()
+            actual = self.read_tables()
+            actual_staging = pd.read_sql(staging_sql, self.engine)
+
+            with self.subTest(logfile=name, summary=summary):
+                pd.testing.assert_frame_equal(actual_staging, expected_staging)
+                for table in expected:
+                    pd.testing.assert_frame_equal(
+                        actual[table], expected[table]
+                    )
@@ -0,0 +1,32 @@
+# standard library imports
+import unittest
+
+# 3rd party library imports
+import pandas as pd
+
+# local imports
+from swlogs.extras import country_name, encode_countries
+
+
+class TestSuite(unittest.TestCase):
+
+    def test_countries(self):
+        """
+        Scenario:  pack country codes, unknown countries, and junk into small
+        integers
+
+        Expected result:  the two letter codes are packed into distinct
+        integers that unpack to the same codes, and anything else is missing
+        """
+        s = pd.Series(['US', 'DE', '-', 'US', None, 'ZZ', 'AA', 'us', 'USA'])
+
+        actual = encode_countries(s)
+
+        self.assertEqual(actual.dtype, 'Int16')
+        self.assertEqual(
+            [country_name(x) for x in actual],
+            ['US', 'DE', None, 'US', None, 'ZZ', 'AA', None, None]
+        )
+        self.assertEqual(actual[0], 538)
+        self.assertEqual(actual[6], 0)
+        self.assertEqual(actual[5], 26 * 26 - 1)
@@ -0,0 +1,70 @@
+# standard library imports
+import ipaddress
+import unittest
+
+# 3rd party library imports
+import pandas as pd
+
+# local imports
+from swlogs.ips import ip_prefix, network_from_key, network_keys
+
+
+class TestSuite(unittest.TestCase):
+
+    def test_network_keys(self):
+        """
+        Scenario:  compute the /24 and /16 keys of IPv4 and IPv6 addresses,
+        repeated addresses, and things that are not addresses
+
+        Expected result:  addresses in the same network get the same key,
+        the keys map back to the same networks that the ipaddress module
+        finds, and anything that is not an address gets a missing key
+        """
+        ips = [
+            '10.1.2.3',
+            '10.1.2.200',
+            '10.1.9.9',
+            '192.168.255.254',
+            '2001:db8:abcd::1',
+            '2001:db8:ab00::2',
+            '::ffff:10.1.2.3',
+            '10.1.2.3',
+        ]
+        s = pd.Series(ips + [None, 'crawler.example.com', '300.1.2.3'])
+
+        keys = network_keys(s)
+
+        for masklen in (24, 16):
+            with self.subTest(masklen=masklen):
+                k = keys[masklen]
+                self.assertEqual(k.dtype, 'Int64')
+                self.assertTrue(k.iloc[len(ips):].isna().all())
+
+                actual = [network_from_key(key, masklen) for key in k.iloc[:len(ips)]]  # noqa : E501
+                expected = [
+                    str(ipaddress.ip_network(f'{ip}/{masklen}', strict=False))
+                    for ip in ips
+                ]
+                self.assertEqual(actual, expected)
+
+        self.assertEqual(keys[24][0], keys[24][1])
+        self.assertNotEqual(keys[24][0], keys[24][2])
+        self.assertEqual(keys[16][0], keys[16][2])
+        self.assertEqual(keys[24][4], keys[24][5])
+
+    def test_ip_prefix(self):
+        """
+        Scenario:  find the /24 network of an IPv4 address, an IPv6 address,
+        and a hostname, one at a time
+
+        Expected result:  the networks agree with network_keys, and the
+        hostname has none
+        """
+        s = pd.Series(['10.1.2.3', '2001:db8:abcd::1'])
+        keys = network_keys(s, masklens=(24,))[24]
+
+        for ip, key in zip(s, keys):
+            with self.subTest(ip=ip):
+                self.assertEqual(ip_prefix(ip, 24), network_from_key(key, 24))
+
+        self.assertIsNone(ip_prefix('crawler.example.com', 24))
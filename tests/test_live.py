@@ -0,0 +1,156 @@
+# standard library imports
+import datetime as dt
+import importlib.resources as ir
+import pathlib
+import tempfile
+import unittest
+
+# 3rd party library imports
+
+# local imports
+from swlogs.live import LiveMonitor
+
+TZ = dt.timezone(dt.timedelta(hours=-7))
+
+
+class TestSuite(unittest.TestCase):
+
+    def setUp(self):
+        self.tempdir = tempfile.TemporaryDirectory()
+        self.logfile = pathlib.Path(self.tempdir.name) / 'access.log'
+        self.logfile.touch()
+
+        text = ir.files('tests.data').joinpath('smoke.log').read_text()
+        self.lines = text.splitlines(keepends=True)
+
+    def tearDown(self):
+        self.tempdir.cleanup()
+
+    def append(self, lines):
+        with self.logfile.open(mode='a') as f:
+            f.writelines(lines)
+
+    def test_counts(self):
+        """
+        Scenario:  follow a logfile as lines are appended to it
+
+        Expected result:  every line is counted once, classified by user
+        agent and /24 network
+        """
+        with LiveMonitor(self.logfile) as o:
+            self.append(self.lines[:40])
+            for line in o.read_lines():
+                o.update(line)
+            self.append(self.lines[40:])
+            for line in o.read_lines():
+                o.update(line)
+
+            totals = o.totals()
+            text = o.render()
+
+        self.assertEqual(totals.hits, 100)
+        self.assertEqual(totals.useragents['dspace-internal'], 86)
+        self.assertEqual(totals.useragents['bingbot/2.0'], 12)
+        self.assertEqual(totals.networks['153.90.6.0/24'], 86)
+        self.assertIn('bingbot/2.0', text)
+
+    def test_starts_at_end(self):
+        """
+        Scenario:  start following a logfile that already has lines in it
+
+        Expected result:  only the lines appended afterwards are read, unless
+        reading from the start is asked for
+        """
+        self.append(self.lines[:40])
+
+        with LiveMonitor(self.logfile) as o:
+            self.append(self.lines[40:50])
+            self.assertEqual(len(o.read_lines()), 10)
+
+        with LiveMonitor(self.logfile, from_start=True) as o:
+            self.assertEqual(len(o.read_lines()), 50)
+
+    def test_rotation(self):
+        """
+        Scenario:  the logfile is rotated while being followed
+
+        Expected result:  the rest of the old logfile and the new logfile are
+        both read
+        """
+        with LiveMonitor(self.logfile) as o:
+            self.append(self.lines[:10])
+            lines = o.read_lines()
+
+            self.append(self.lines[10:20])
+            self.logfile.rename(self.logfile.with_name('access.log.1'))
+            self.append(self.lines[20:25])
+            lines.extend(o.read_lines())
+
+        self.assertEqual(lines, self.lines[:25])
+
+    def test_window(self):
+        """
+        Scenario:  the log covers more minutes than the window
+
+        Expected result:  only the most recent minutes are kept
+        """
+        with LiveMonitor(self.logfile, window=2, from_start=True) as o:
+            for minute in range(5):
+                line = self.lines[0].replace('00:00:57', f'00:0{minute}:57')
+                o.update(line)
+
+            self.assertEqual(
+                sorted(o.minutes.keys()),
+                [
+                    dt.datetime(2024, 11, 7, 0, 3, tzinfo=TZ),
+                    dt.datetime(2024, 11, 7, 0, 4, tzinfo=TZ),
+                ]
+            )
+            self.assertEqual(o.totals().hits, 2)
+
+    def test_late_lines(self):
+        """
+        Scenario:  lines arrive out of order across a month boundary
+
+        Expected result:  a late line for a minute still in the window is
+        counted in that minute, a line too late for the window is dropped
+        rather than evicting a newer minute
+        """
+        timestamps = [
+            '31/Oct/2024:23:58:57',
+            '01/Nov/2024:00:00:57',
+            '31/Oct/2024:23:59:57',
+            '31/Oct/2024:23:58:57',
+            '01/Nov/2024:00:00:58',
+        ]
+        with LiveMonitor(self.logfile, window=2, from_start=True) as o:
+            for timestamp in timestamps:
+                line = self.lines[0].replace('07/Nov/2024:00:00:57', timestamp)
+                o.update(line)
+
+            actual = {
+                minute: counts.hits for minute, counts in o.minutes.items()
+            }
+
+        expected = {
+            dt.datetime(2024, 10, 31, 23, 59, tzinfo=TZ): 1,
+            dt.datetime(2024, 11, 1, 0, 0, tzinfo=TZ): 2,
+        }
+        self.assertEqual(actual, expected)
+
+    def test_bounded(self):
+        """
+        Scenario:  many more distinct networks than the bound
+
+        Expected result:  the counters never exceed the bound, and the heavy
+        hitter is kept
+        """
+        with LiveMonitor(self.logfile, max_keys=100) as o:
+            for i in range(1000):
+                o.update(self.lines[0])
+                other = f'10.{i // 250}.{i % 250}.1'
+                o.update(self.lines[0].replace('153.90.6.244', other))
+
+            counts = next(iter(o.minutes.values()))
+            self.assertLessEqual(len(counts.networks), 100)
+            self.assertEqual(counts.networks['153.90.6.0/24'], 1000)
@@ -0,0 +1,96 @@
+# standard library imports
+import threading
+import unittest
+
+# 3rd party library imports
+
+# local imports
+from swlogs.pipeline import prefetch
+
+
+class TestSuite(unittest.TestCase):
+
+    def test_order(self):
+        """
+        Scenario:  chain two stages of prefetching threads
+
+        Expected result:  the items come out in order
+        """
+        actual = list(prefetch(map(str, prefetch(range(100)))))
+
+        self.assertEqual(actual, [str(x) for x in range(100)])
+
+    def test_bounded(self):
+        """
+        Scenario:  consume nothing from a stage
+
+        Expected result:  the thread gets no further ahead than the size of
+        its queue plus the item it is trying to put
+        """
+        produced = []
+        blocked = threading.Event()
+
+        def produce():
+            for x in range(100):
+                produced.append(x)
+                if len(produced) == 4:
+                    blocked.set()
+                yield x
+
+        it = prefetch(produce(), maxsize=2)
+        self.assertEqual(next(it), 0)
+
+        blocked.wait(timeout=5)
+        # Give the thread a chance to overrun, if it would.
+        threading.Event().wait(0.3)
+
+        self.assertEqual(len(produced), 4)
+        it.close()
+
+    def test_exception(self):
+        """
+        Scenario:  the first stage of a chain raises an exception
+
+        Expected result:  it is raised again in the consumer, after the items
+        produced before it
+        """
+        def produce():
+            yield 1
+            yield 2
+            raise RuntimeError('bad line')
+
+        actual = []
+        with self.assertRaisesRegex(RuntimeError, 'bad line'):
+            for x in prefetch(map(str, prefetch(produce()))):
+                actual.append(x)
+
+        self.assertEqual(actual, ['1', '2'])
+
+    def test_stop_early(self):
+        """
+        Scenario:  the consumer stops after a few items of an endless stage
+
+        Expected result:  the thread and the iterable it was reading from
+        are both stopped
+        """
+        closed = threading.Event()
+
+        def produce():
+            try:
+                x = 0
+                while True:
+                    yield x
+                    x += 1
+            finally:
+                closed.set()
+
+        nthreads = threading.active_count()
+
+        it = prefetch(produce())
+        for x in it:
+            if x == 3:
+                break
+        it.close()
+
+        self.assertTrue(closed.is_set())
+        self.assertEqual(threading.active_count(), nthreads)
@@ -72,3 +72,36 @@ class TestSuite(unittest.TestCase):
                 o.run()
 
             self.assertEqual(len(mock_sns_plots.mock_calls), 1)
+
+    def test_smoke_hourly(self, mock_yaml, mock_psycopg, mock_sqlalchemy):
+        """
+        Scenario:  hourly plot of a single user agent
+
+        Expected result:  no errors, there was one seaborn plot call
+        """
+        mock_yaml.safe_load.return_value = {'connection_string': None}
+        mock_psycopg.connect.return_value = None
+        mock_sqlalchemy.create_engine.return_value = None
+
+        hours = pd.date_range('2024-11-07', periods=24, freq='h', tz='UTC')
+        df = pd.DataFrame({'hour': hours, 'ua': 'bingbot/2.0', 'hits': 10})
+
+        with (
+            patch('swlogs.plots.pd.read_sql') as mock_read_sql,
+            patch('swlogs.plots.plt.subplots') as mock_subplots,
+            patch('swlogs.plots.plt.show'),
+            patch('swlogs.plots.sns.lineplot') as mock_sns_plots,
+        ):
+            mock_read_sql.return_value = df
+            mock_subplots.return_value = (Mock(), Mock())
+
+            with Plot(
+                hourly=True,
+                useragent='bingbot/2.0',
+                thedate=dt.date(2024, 11, 7)
+            ) as o:
+                o.run()
+
+            self.assertEqual(len(mock_sns_plots.mock_calls), 1)
+            params = mock_read_sql.call_args.kwargs['params']
+            self.assertEqual(params['useragent'], 'bingbot/2.0')
@@ -0,0 +1,115 @@
+# standard library imports
+import ipaddress
+import pathlib
+import random
+import tempfile
+import unittest
+
+# 3rd party library imports
+import pandas as pd
+
+# local imports
+from swlogs.prefixes import PrefixTable
+
+
+class TestSuite(unittest.TestCase):
+
+    def setUp(self):
+        self.tempdir = tempfile.TemporaryDirectory()
+
+    def tearDown(self):
+        self.tempdir.cleanup()
+
+    def write_prefixes(self, text, name='prefixes.csv'):
+        path = pathlib.Path(self.tempdir.name) / name
+        path.write_text(text)
+        return path
+
+    def test_longest_prefix_match(self):
+        """
+        Scenario:  look up random addresses and networks against many random,
+        nested, and duplicated prefixes
+
+        Expected result:  each gets the most specific prefix containing all
+        of it, the last listed among duplicates, the same as a brute force
+        search finds
+        """
+        r = random.Random(0)
+        rows = []
+        for i in range(300):
+            masklen = r.choice([8, 12, 16, 20, 24, 28])
+            # Keep the addresses in a few /8s so that prefixes nest.
+            address = (r.choice([10, 52, 153]) << 24) | r.getrandbits(24)
+            network = ipaddress.ip_network((address, masklen), strict=False)
+            rows.append((str(network), i, f'owner {i}'))
+        rows.extend(rows[:10])
+        df = pd.DataFrame(rows, columns=['prefix', 'asn', 'owner'])
+        path = self.write_prefixes(df.to_csv(index=False))
+
+        values = []
+        for _ in range(500):
+            # Some are outside of every prefix.
+            address = (r.choice([10, 52, 153, 200]) << 24) | r.getrandbits(24)
+            masklen = r.choice([16, 24, 32])
+            network = ipaddress.ip_network((address, masklen), strict=False)
+            values.append(str(network.network_address) if masklen == 32 else str(network))  # noqa : E501
+
+        actual = PrefixTable(path).lookup(pd.Series(values))
+
+        networks = [ipaddress.ip_network(prefix) for prefix, _, _ in rows]
+        expected = []
+        for value in values:
+            target = ipaddress.ip_network(value)
+            best = (-1, None, None)
+            for network, (_, asn, owner) in zip(networks, rows):
+                if target.subnet_of(network) and network.prefixlen >= best[0]:
+                    best = (network.prefixlen, asn, owner)
+            expected.append(best[1:])
+
+        actual = [
+            (None if pd.isna(asn) else asn, owner)
+            for asn, owner in actual.itertuples(index=False)
+        ]
+        self.assertEqual(actual, expected)
+        self.assertGreater(sum(owner is not None for _, owner in actual), 0)
+        self.assertGreater(sum(owner is None for _, owner in actual), 0)
+
+    def test_ipv6_and_missing(self):
+        """
+        Scenario:  look up IPv6 addresses, hostnames, and missing values
+        against IPv4 and IPv6 prefixes from two files, some with a blank asn
+        or owner
+
+        Expected result:  IPv6 addresses match only IPv6 prefixes, and
+        anything that is not an address is not matched
+        """
+        path1 = self.write_prefixes(
+            'prefix,asn,owner\n'
+            '0.0.0.0/0,,everything\n'
+            '2001:db8::/32,64500,\n',
+            name='asn.csv'
+        )
+        path2 = self.write_prefixes(
+            'prefix,asn,owner\n'
+            '2001:db8:ab00::/40,,Example crawler\n',
+            name='crawlers.csv'
+        )
+        s = pd.Series([
+            '2001:db8:abcd::1',
+            '2001:db8:1::1',
+            '2001:db9::1',
+            '10.1.2.3',
+            'crawler.example.com',
+            None,
+        ])
+
+        actual = PrefixTable([path1, path2]).lookup(s)
+
+        expected = pd.DataFrame({
+            'asn': pd.array([None, 64500, None, None, None, None], dtype='Int64'),  # noqa : E501
+            'owner': pd.Series(
+                ['Example crawler', None, None, 'everything', None, None],
+                dtype=object
+            ),
+        })
+        pd.testing.assert_frame_equal(actual, expected)
@@ -0,0 +1,98 @@
+# standard library imports
+import datetime as dt
+import importlib.resources as ir
+from unittest import mock
+
+# 3rd party library imports
+import pandas as pd
+
+# local imports
+from swlogs.loglogs import LogLogs
+from swlogs.reclassify import Reclassify
+from .common import CommonTestCase
+
+
+@mock.patch('swlogs.common.yaml')
+class TestSuite(CommonTestCase):
+
+    def setUp(self):
+        super().setUp()
+
+        self.logfile = ir.files('tests.data').joinpath('smoke.log')
+        self.date = dt.date(2024, 11, 7)
+
+    def read_bots(self):
+        sql = 'select * from swlogs.bots order by date, ua'
+        df = pd.read_sql(sql, self.engine)
+        return df.drop(labels='id', axis='columns')
+
+    def test_same_rules(self, mock_yaml):
+        """
+        Scenario:  keep the user agent histogram while loading a logfile,
+        computing the summary both in postgresql and in process, then
+        rebuild the bots table from the histogram
+
+        Expected result:  the histogram counts every row, and with the same
+        user agent rules the rebuilt bots table is the same as the one
+        computed from the logfile
+        """
+        mock_yaml.safe_load.return_value = {'connection_string': self.connstr}
+
+        for summary in ('single-scan', 'in-process'):
+            with self.subTest(summary=summary):
+                super().setUp()
+
+                with LogLogs(
+                    self.logfile, chunksize=50, summary=summary,
+                    ua_histogram=True
+                ) as o:
+                    o.run()
+
+                sql = 'select sum(hits) as hits from swlogs.ua_histogram'
+                hits = pd.read_sql(sql, self.engine).loc[0, 'hits']
+                nlines = len(self.logfile.read_text().splitlines())
+                self.assertEqual(hits, nlines)
+
+                expected = self.read_bots()
+
+                with Reclassify(self.date) as o:
+                    o.run()
+
+                actual = self.read_bots()
+
+                pd.testing.assert_frame_equal(actual, expected)
+
+    def test_new_rules(self, mock_yaml):
+        """
+        Scenario:  rebuild the bots table after the user agent rules change
+        so that every user agent is classified the same
+
+        Expected result:  the day has a single bots row with all of the
+        hits, and the bots rows of days without a histogram are left alone
+        """
+        mock_yaml.safe_load.return_value = {'connection_string': self.connstr}
+
+        with LogLogs(self.logfile, ua_histogram=True) as o:
+            o.run()
+
+        sql = """
+            insert into swlogs.bots (ua, hits, date)
+            values ('old', 1, '2024-11-01')
+        """
+        with self.engine.begin() as conn:
+            conn.exec_driver_sql(sql)
+
+        def classify(s):
+            return pd.Series('everyone', index=s.index)
+
+        with (
+            mock.patch('swlogs.reclassify.classify_useragents', new=classify),
+            Reclassify(dt.date(2024, 11, 1), self.date) as o,
+        ):
+            o.run()
+
+        actual = self.read_bots()
+
+        nlines = len(self.logfile.read_text().splitlines())
+        self.assertEqual(actual['ua'].tolist(), ['old', 'everyone'])
+        self.assertEqual(actual['hits'].tolist(), [1, nlines])
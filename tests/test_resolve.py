@@ -0,0 +1,150 @@
+# standard library imports
+import pathlib
+import socket
+import tempfile
+import time
+import unittest
+from unittest import mock
+
+# 3rd party library imports
+
+# local imports
+from swlogs.resolve import HostnameResolver
+
+
+class TestSuite(unittest.TestCase):
+
+    def setUp(self):
+        self.tempdir = tempfile.TemporaryDirectory()
+        self.cachefile = pathlib.Path(self.tempdir.name) / 'hostnames.json'
+
+    def tearDown(self):
+        self.tempdir.cleanup()
+
+    def test_each_hostname_resolved_once(self):
+        """
+        Scenario:  resolve a list of hostnames with many repeats, twice
+
+        Expected result:  each distinct hostname is looked up only once
+        """
+        addresses = {
+            'crawl-1.example.com': '10.0.0.1',
+            'crawl-2.example.com': '10.0.0.2',
+        }
+        with mock.patch(
+            'swlogs.resolve.socket.gethostbyname', side_effect=addresses.get
+        ) as mock_lookup:
+            o = HostnameResolver(cachefile=None)
+            hostnames = list(addresses.keys()) * 1000
+            actual = o.resolve(hostnames)
+            o.resolve(hostnames)
+
+        self.assertEqual(actual, addresses)
+        self.assertEqual(mock_lookup.call_count, 2)
+
+    def test_failed_lookup(self):
+        """
+        Scenario:  a hostname cannot be resolved
+
+        Expected result:  it maps to None
+        """
+        with mock.patch(
+            'swlogs.resolve.socket.gethostbyname',
+            side_effect=socket.gaierror
+        ):
+            o = HostnameResolver(cachefile=None)
+            actual = o.resolve(['no-such-host.example.com'])
+
+        self.assertEqual(actual, {'no-such-host.example.com': None})
+
+    def test_timeout(self):
+        """
+        Scenario:  a lookup hangs
+
+        Expected result:  the hostname maps to None after the timeout, and it
+        is not persisted to the cache file
+        """
+        def lookup(hostname):
+            time.sleep(1)
+            return '10.0.0.1'
+
+        with mock.patch(
+            'swlogs.resolve.socket.gethostbyname', side_effect=lookup
+        ):
+            o = HostnameResolver(cachefile=self.cachefile, timeout=0.1)
+            actual = o.resolve(['slow.example.com'])
+
+        self.assertEqual(actual, {'slow.example.com': None})
+        self.assertEqual(self.cachefile.read_text(), '{}')
+
+    def test_persisted_cache(self):
+        """
+        Scenario:  a second resolver is created after a first one resolved a
+        hostname
+
+        Expected result:  the second resolver uses the on-disk cache and does
+        no lookups
+        """
+        with mock.patch(
+            'swlogs.resolve.socket.gethostbyname', return_value='10.0.0.1'
+        ):
+            o = HostnameResolver(cachefile=self.cachefile)
+            o.resolve(['crawl.example.com'])
+
+        with mock.patch('swlogs.resolve.socket.gethostbyname') as mock_lookup:
+            o = HostnameResolver(cachefile=self.cachefile)
+            actual = o.resolve(['crawl.example.com'])
+
+        self.assertEqual(actual, {'crawl.example.com': '10.0.0.1'})
+        mock_lookup.assert_not_called()
+
+    def test_expired_cache(self):
+        """
+        Scenario:  the on-disk cache entry is older than the TTL
+
+        Expected result:  the hostname is looked up again
+        """
+        with mock.patch(
+            'swlogs.resolve.socket.gethostbyname', return_value='10.0.0.1'
+        ):
+            o = HostnameResolver(cachefile=self.cachefile)
+            o.resolve(['crawl.example.com'])
+
+        with mock.patch(
+            'swlogs.resolve.socket.gethostbyname', return_value='10.0.0.2'
+        ) as mock_lookup:
+            o = HostnameResolver(cachefile=self.cachefile, ttl=0)
+            actual = o.resolve(['crawl.example.com'])
+
+        self.assertEqual(actual, {'crawl.example.com': '10.0.0.2'})
+        mock_lookup.assert_called_once()
+
+    def test_shared_cache(self):
+        """
+        Scenario:  two resolvers, e.g. in the workers of a backfill, share a
+        cache file and each resolve a different hostname
+
+        Expected result:  the cache file keeps both hostnames, and no
+        temporary files are left behind
+        """
+        addresses = {
+            'crawl-1.example.com': '10.0.0.1',
+            'crawl-2.example.com': '10.0.0.2',
+        }
+        with mock.patch(
+            'swlogs.resolve.socket.gethostbyname', side_effect=addresses.get
+        ):
+            a = HostnameResolver(cachefile=self.cachefile)
+            b = HostnameResolver(cachefile=self.cachefile)
+            a.resolve(['crawl-1.example.com'])
+            b.resolve(['crawl-2.example.com'])
+
+        with mock.patch('swlogs.resolve.socket.gethostbyname') as mock_lookup:
+            o = HostnameResolver(cachefile=self.cachefile)
+            actual = o.resolve(addresses.keys())
+
+        self.assertEqual(actual, addresses)
+        mock_lookup.assert_not_called()
+        self.assertEqual(
+            list(self.cachefile.parent.iterdir()), [self.cachefile]
+        )
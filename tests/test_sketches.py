@@ -0,0 +1,129 @@
+# standard library imports
+import collections
+import random
+import unittest
+
+# 3rd party library imports
+import numpy as np
+import pandas as pd
+
+# local imports
+from swlogs.sketches import HyperLogLog, SpaceSaving
+
+
+class TestSuite(unittest.TestCase):
+
+    def test_exact_within_capacity(self):
+        """
+        Scenario:  count fewer distinct keys than the capacity
+
+        Expected result:  the counts and extra quantities are exact
+        """
+        o = SpaceSaving(10)
+        for key in 'abracadabra':
+            o.update(key, extra=np.array([1, key == 'a']))
+
+        actual = [(key, count, error) for key, count, error, _ in o.top()]
+        expected = [('a', 5, 0), ('b', 2, 0), ('r', 2, 0), ('c', 1, 0), ('d', 1, 0)]  # noqa : E501
+        self.assertEqual(actual, expected)
+
+        extra = o.top(1)[0][3]
+        np.testing.assert_array_equal(extra, [5, 5])
+
+    def test_guarantees(self):
+        """
+        Scenario:  count a skewed stream with many more distinct keys than
+        the capacity
+
+        Expected result:  the capacity is respected, every count brackets the
+        true count, every error is within N / capacity, and every key more
+        frequent than N / capacity is found
+        """
+        rng = random.Random(0)
+        keys = [int(rng.paretovariate(1.0)) for _ in range(20000)]
+        exact = collections.Counter(keys)
+
+        capacity = 50
+        o = SpaceSaving(capacity)
+        for key in keys:
+            o.update(key)
+
+        self.assertEqual(len(o), capacity)
+        self.assertEqual(o.total, len(keys))
+
+        bound = len(keys) / capacity
+        for key, count, error, _ in o.top():
+            with self.subTest(key=key):
+                self.assertLessEqual(count - error, exact[key])
+                self.assertGreaterEqual(count, exact[key])
+                self.assertLessEqual(error, bound)
+
+        monitored = {key for key, _, _, _ in o.top()}
+        for key, n in exact.items():
+            if n > bound:
+                self.assertIn(key, monitored)
+
+    def test_weighted(self):
+        """
+        Scenario:  weighted updates
+
+        Expected result:  the same as that many unit updates
+        """
+        o = SpaceSaving(2)
+        o.update('a', 3)
+        o.update('b', 2)
+        o.update('c', 1)
+
+        # "b" has the smallest count and is replaced by "c", which inherits
+        # its count as the error.
+        actual = [(key, count, error) for key, count, error, _ in o.top()]
+        self.assertEqual(actual, [('a', 3, 0), ('c', 3, 2)])
+
+    def test_bad_capacity(self):
+        """
+        Scenario:  a capacity of zero
+
+        Expected result:  ValueError
+        """
+        with self.assertRaises(ValueError):
+            SpaceSaving(0)
+
+    def test_hyperloglog_accuracy(self):
+        """
+        Scenario:  count a large number of distinct values, many repeated
+
+        Expected result:  the estimate is within a few standard errors
+        """
+        values = pd.Series([f'10.0.{i % 250}.{i // 250}' for i in range(50000)])  # noqa : E501
+        o = HyperLogLog()
+        o.add(pd.concat([values, values]))
+
+        self.assertLess(abs(o.count() - 50000) / 50000, 0.05)
+
+    def test_hyperloglog_small(self):
+        """
+        Scenario:  count a small number of distinct values
+
+        Expected result:  the estimate is exact
+        """
+        o = HyperLogLog()
+        o.add(pd.Series(['a', 'b', 'c', 'a', 'b']))
+        self.assertEqual(o.count(), 3)
+
+    def test_hyperloglog_merge(self):
+        """
+        Scenario:  merge the sketches of two overlapping sets of values,
+        after a round trip through bytes
+
+        Expected result:  the count is that of the union
+        """
+        a = HyperLogLog()
+        a.add(pd.Series([str(i) for i in range(0, 3000)]))
+        b = HyperLogLog()
+        b.add(pd.Series([str(i) for i in range(2000, 5000)]))
+
+        b = HyperLogLog.from_bytes(b.to_bytes())
+        self.assertEqual(len(b.to_bytes()), 4096)
+
+        a.merge(b)
+        self.assertLess(abs(a.count() - 5000) / 5000, 0.05)
@@ -0,0 +1,249 @@
+# standard library imports
+import datetime as dt
+import importlib.resources as ir
+import pathlib
+import tempfile
+import threading
+from unittest import mock
+
+# 3rd party library imports
+import pandas as pd
+
+# local imports
+from swlogs.loglogs import LogLogs
+from swlogs.tail import TailLogs
+from .common import CommonTestCase
+
+
+@mock.patch('swlogs.common.yaml')
+class TestSuite(CommonTestCase):
+
+    def setUp(self):
+        super().setUp()
+
+        self.tempdir = tempfile.TemporaryDirectory()
+        self.logfile = pathlib.Path(self.tempdir.name) / 'access.log'
+
+        text = ir.files('tests.data').joinpath('smoke.log').read_text()
+        self.lines = text.splitlines(keepends=True)
+
+    def tearDown(self):
+        self.tempdir.cleanup()
+
+    def append(self, lines, path=None):
+        path = self.logfile if path is None else path
+        with path.open(mode='a') as f:
+            f.writelines(lines)
+
+    def count_hits(self):
+        df = pd.read_sql('select count(*) as n from swlogs.hits', self.engine)
+        return df.loc[0, 'n']
+
+    def test_appended_lines(self, mock_yaml):
+        """
+        Scenario:  ingest a live logfile, then again with nothing appended,
+        then again after more lines are appended
+
+        Expected result:  each line is ingested exactly once, and the
+        checkpoint is at the end of the logfile
+        """
+        mock_yaml.safe_load.return_value = {'connection_string': self.connstr}
+
+        self.append(self.lines[:60])
+        with TailLogs(self.logfile, resolve_hostnames=False) as o:
+            o.run()
+        self.assertEqual(self.count_hits(), 60)
+
+        with TailLogs(self.logfile, resolve_hostnames=False) as o:
+            o.run()
+        self.assertEqual(self.count_hits(), 60)
+
+        self.append(self.lines[60:])
+        with TailLogs(self.logfile, resolve_hostnames=False) as o:
+            o.run()
+            checkpoint = o.read_checkpoint()
+        self.assertEqual(self.count_hits(), 100)
+
+        self.assertEqual(checkpoint[0], self.logfile.stat().st_ino)
+        self.assertEqual(checkpoint[1], self.logfile.stat().st_size)
+
+    def test_partial_line(self, mock_yaml):
+        """
+        Scenario:  the last line of the logfile is still being written
+
+        Expected result:  the partial line is not ingested until it is
+        complete
+        """
+        mock_yaml.safe_load.return_value = {'connection_string': self.connstr}
+
+        self.append(self.lines[:10])
+        self.append([self.lines[10][:20]])
+        with TailLogs(self.logfile, resolve_hostnames=False) as o:
+            o.run()
+        self.assertEqual(self.count_hits(), 10)
+
+        self.append([self.lines[10][20:]])
+        with TailLogs(self.logfile, resolve_hostnames=False) as o:
+            o.run()
+        self.assertEqual(self.count_hits(), 11)
+
+    def test_rotation(self, mock_yaml):
+        """
+        Scenario:  the logfile is rotated after lines were appended to it
+        since the previous run
+
+        Expected result:  the rest of the rotated logfile and all of the new
+        logfile are ingested
+        """
+        mock_yaml.safe_load.return_value = {'connection_string': self.connstr}
+
+        self.append(self.lines[:30])
+        with TailLogs(self.logfile, resolve_hostnames=False) as o:
+            o.run()
+
+        self.append(self.lines[30:50])
+        self.logfile.rename(self.logfile.with_name('access.log.1'))
+        self.append(self.lines[50:])
+
+        with TailLogs(self.logfile, resolve_hostnames=False) as o:
+            o.run()
+        self.assertEqual(self.count_hits(), 100)
+
+    def test_lost_position(self, mock_yaml):
+        """
+        Scenario:  the logfile is replaced by a copy of itself with more
+        lines, after a run that ended partway through a second
+
+        Expected result:  the rows already ingested, including those stamped
+        with the checkpoint's second, are not ingested again
+        """
+        mock_yaml.safe_load.return_value = {'connection_string': self.connstr}
+
+        # The second 00:00:58 starts at line 10 and ends at line 44.
+        self.append(self.lines[:20])
+        with TailLogs(self.logfile, resolve_hostnames=False) as o:
+            o.run()
+        self.append(self.lines[20:30])
+        with TailLogs(self.logfile, resolve_hostnames=False) as o:
+            o.run()
+            checkpoint = o.read_checkpoint()
+        self.assertEqual(checkpoint[3], 20)
+
+        copy = self.logfile.with_name('copy.log')
+        self.append(self.lines[:50], path=copy)
+        copy.replace(self.logfile)
+
+        with (
+            TailLogs(self.logfile, resolve_hostnames=False) as o,
+            self.assertWarns(UserWarning),
+        ):
+            o.run()
+        self.assertEqual(self.count_hits(), 50)
+
+    def test_end_of_daylight_saving_time(self, mock_yaml):
+        """
+        Scenario:  ingest a logfile with two UTC offsets, from the day that
+        daylight saving time ends
+
+        Expected result:  every row is ingested into the partition of the
+        log-local date
+        """
+        mock_yaml.safe_load.return_value = {'connection_string': self.connstr}
+
+        text = ir.files('tests.data').joinpath('dst.log').read_text()
+        self.append(text.splitlines(keepends=True))
+        with TailLogs(self.logfile, resolve_hostnames=False) as o:
+            o.run()
+
+        sql = 'select date, count(*) as n from swlogs.hits group by date'
+        df = pd.read_sql(sql, self.engine)
+        self.assertEqual(df.values.tolist(), [[dt.date(2024, 11, 3), 100]])
+
+    def test_overlapping_runs(self, mock_yaml):
+        """
+        Scenario:  a run starts while another run on the same logfile holds
+        its lock
+
+        Expected result:  the second run waits for the first to commit, and
+        then only ingests what the first did not
+        """
+        mock_yaml.safe_load.return_value = {'connection_string': self.connstr}
+
+        self.append(self.lines[:60])
+
+        first = TailLogs(self.logfile, resolve_hostnames=False)
+        first.lock()
+
+        second = TailLogs(self.logfile, resolve_hostnames=False)
+        thread = threading.Thread(target=second.run)
+        thread.start()
+        thread.join(timeout=0.5)
+        self.assertTrue(thread.is_alive())
+
+        first.run()
+        thread.join(timeout=10)
+        self.assertFalse(thread.is_alive())
+
+        self.assertEqual(self.count_hits(), 60)
+
+    def test_max_mb(self, mock_yaml):
+        """
+        Scenario:  more has been appended to the logfile, and then to its
+        rotated successor, than a run may read
+
+        Expected result:  each run reads only part of it, and together the
+        runs ingest every line exactly once
+        """
+        mock_yaml.safe_load.return_value = {'connection_string': self.connstr}
+
+        self.append(self.lines[:10])
+        with TailLogs(self.logfile, resolve_hostnames=False) as o:
+            o.run()
+
+        self.append(self.lines[10:50])
+        self.logfile.rename(self.logfile.with_name('access.log.1'))
+        self.append(self.lines[50:])
+
+        counts = []
+        for _ in range(20):
+            with TailLogs(
+                self.logfile, resolve_hostnames=False, max_mb=0.01
+            ) as o:
+                o.run()
+            counts.append(self.count_hits())
+
+        self.assertLess(counts[0], 100)
+        self.assertEqual(counts[-1], 100)
+
+    def test_summarize_raw(self, mock_yaml):
+        """
+        Scenario:  ingest a logfile incrementally, then compute the summary
+        tables from the day's raw rows
+
+        Expected result:  the summary tables are the same as when the logfile
+        is processed all at once
+        """
+        mock_yaml.safe_load.return_value = {'connection_string': self.connstr}
+
+        logfile = ir.files('tests.data').joinpath('smoke.log')
+        with LogLogs(logfile, resolve_hostnames=False) as o:
+            o.run()
+        expected = pd.read_sql('select * from swlogs.bots', self.engine)
+
+        super().setUp()
+
+        self.append(self.lines[:50])
+        with TailLogs(self.logfile, resolve_hostnames=False) as o:
+            o.run()
+        self.append(self.lines[50:])
+        with TailLogs(self.logfile, resolve_hostnames=False) as o:
+            o.run()
+
+        with LogLogs(raw_date=dt.date(2024, 11, 7)) as o:
+            o.run()
+        actual = pd.read_sql('select * from swlogs.bots', self.engine)
+
+        pd.testing.assert_frame_equal(
+            actual.drop(labels='id', axis='columns'),
+            expected.drop(labels='id', axis='columns')
+        )
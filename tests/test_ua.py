@@ -0,0 +1,148 @@
+# standard library imports
+import gzip
+import importlib.resources as ir
+import re
+import unittest
+from unittest import mock
+
+# 3rd party library imports
+import pandas as pd
+
+# local imports
+from swlogs.access_logs import (
+    LOGFILE_REGEX, UA_PREFILTER, apply_regexes, classify_useragents
+)
+from swlogs.prefilter import RulePrefilter, required_words
+from swlogs.ua_regex import UA_REGEX_REPLACE
+
+
+class TestSuite(unittest.TestCase):
+
+    def test_classify_useragents(self):
+        """
+        Scenario:  classify a series of raw user agents with many repeats
+
+        Expected result:  the labels are the same as classifying row by row,
+        and each distinct user agent is classified only once
+        """
+        bingbot = (
+            'Mozilla/5.0 AppleWebKit/537.36 (KHTML, like Gecko; compatible; '
+            'bingbot/2.0; +http://www.bing.com/bingbot.htm) Chrome/116.0.1938.76 '  # noqa : E501
+            'Safari/537.36'
+        )
+        unknown = 'not-a-known-user-agent'
+        s = pd.Series([bingbot, unknown, bingbot, bingbot, unknown], name='ua')
+
+        apply_regexes.cache_clear()
+        actual = classify_useragents(s)
+
+        expected = s.apply(apply_regexes)
+        pd.testing.assert_series_equal(actual, expected)
+
+        self.assertEqual(actual[0], 'bingbot/2.0')
+        self.assertEqual(apply_regexes.cache_info().misses, 2)
+
+    def test_classify_empty(self):
+        """
+        Scenario:  classify an empty series
+
+        Expected result:  an empty series
+        """
+        s = pd.Series([], name='ua', dtype=object)
+        actual = classify_useragents(s)
+        self.assertEqual(len(actual), 0)
+
+    def test_required_words(self):
+        """
+        Scenario:  find the words required by a user agent rule
+
+        Expected result:  only words bounded by non-word characters are found
+        """
+        regex = re.compile(
+            r"""
+            Mozilla/5.0
+            \s
+            \(compatible;\sYandexBot/3.0;\s\+http://yandex.com/bots\)
+            """,
+            re.VERBOSE
+        )
+        actual = required_words(regex)
+        expected = {'compatible', 'YandexBot', 'http', 'bots'}
+        self.assertEqual(actual, expected)
+
+    def test_required_words_case_insensitive(self):
+        """
+        Scenario:  find the words required by a case insensitive rule
+
+        Expected result:  no words can be relied upon
+        """
+        regex = re.compile(r'\sYandexBot/', re.IGNORECASE)
+        self.assertEqual(required_words(regex), set())
+
+    def test_prefilter_first_match_wins(self):
+        """
+        Scenario:  two rules both match a user agent
+
+        Expected result:  the earlier rule wins, as with a linear scan
+        """
+        rules = [
+            re.compile(r'\(compatible;\sFooBot/'),
+            re.compile(r'compatible'),
+            re.compile(r'\sFooBot/'),
+        ]
+        o = RulePrefilter(rules)
+
+        self.assertIs(o.first_match('x (compatible; FooBot/1.0)'), rules[0])
+        self.assertIs(o.first_match('x (compatible; BarBot/1.0)'), rules[1])
+        self.assertIs(o.first_match('x FooBot/1.0'), rules[2])
+        self.assertIsNone(o.first_match('x BarBot/1.0'))
+
+    def test_prefilter_same_as_linear_scan(self):
+        """
+        Scenario:  classify every user agent in the test logs
+
+        Expected result:  the prefilter picks the same rule as trying every
+        rule in order
+        """
+        regex = re.compile(LOGFILE_REGEX, re.X)
+        uas = set()
+        for p in ir.files('tests.data').iterdir():
+            if p.name.endswith('.log'):
+                text = p.read_text()
+            elif p.name.endswith('.gz'):
+                text = gzip.decompress(p.read_bytes()).decode()
+            else:
+                continue
+            for line in text.splitlines():
+                if (m := regex.match(line)) is not None:
+                    uas.add(m.group('user_agent'))
+
+        for ua in uas:
+            expected = next(
+                filter(lambda x: x.search(ua), UA_REGEX_REPLACE.keys()),
+                None
+            )
+            with self.subTest(ua=ua):
+                self.assertIs(UA_PREFILTER.first_match(ua), expected)
+
+    def test_prefilter_without_parser(self):
+        """
+        Scenario:  the private regex parser of the re module is missing, or
+        has changed shape
+
+        Expected result:  no rule requires any words, so every rule is tried
+        in order and the first match is still found
+        """
+        patches = [
+            mock.patch('swlogs.prefilter.sre_parse', new=None),
+            mock.patch('swlogs.prefilter.sre_constants', new=object()),
+        ]
+        rules = [
+            re.compile(r'\(compatible;\sFooBot/'),
+            re.compile(r'\sFooBot/'),
+        ]
+        for patch in patches:
+            with self.subTest(patch=patch.attribute), patch:
+                o = RulePrefilter(rules)
+                self.assertEqual(o.always, [0, 1])
+                self.assertIs(o.first_match('x FooBot/1.0'), rules[1])
@@ -0,0 +1,57 @@
+# standard library imports
+import unittest
+
+# 3rd party library imports
+import pandas as pd
+
+# local imports
+from swlogs.urls import URL_FLAGS, classify_urls
+
+
+class TestSuite(unittest.TestCase):
+
+    def test_flags(self):
+        """
+        Scenario:  classify urls of each category, of none, and a missing url
+
+        Expected result:  each url gets the bits of the categories it is in
+        """
+        s = pd.Series([
+            '/robots.txt',
+            '/xmlui/handle/1/2',
+            '/sitemap_0.xml',
+            '/items/0a1b2c3d-0a1b-0a1b-0a1b-0a1b2c3d4e5f',
+            '/items/0a1b2c3d-0a1b-0a1b-0a1b-0a1b2c3d4e5f/full',
+            '/xmlui/sitemap',
+            '/server/api',
+            None,
+            '/robots.txt',
+        ], index=range(10, 19))
+
+        actual = classify_urls(s)
+
+        expected = pd.Series([
+            URL_FLAGS['robots'],
+            URL_FLAGS['xmlui'],
+            URL_FLAGS['sitemaps'],
+            URL_FLAGS['items'],
+            0,
+            URL_FLAGS['xmlui'] | URL_FLAGS['sitemaps'],
+            0,
+            0,
+            URL_FLAGS['robots'],
+        ], index=s.index, dtype='int16', name='url_flags')
+        pd.testing.assert_series_equal(actual, expected)
+
+    def test_distinct_bits(self):
+        """
+        Scenario:  inspect the category flags
+
+        Expected result:  each category has its own bit, and they all fit
+        in the smallint column
+        """
+        flags = list(URL_FLAGS.values())
+        self.assertEqual(len(set(flags)), len(flags))
+        for flag in flags:
+            self.assertEqual(flag & (flag - 1), 0)
+        self.assertLess(sum(flags), 2**15)